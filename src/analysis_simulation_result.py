@@ -1,23 +1,14 @@
 import json
 import os
 
-from src.utils.llm import call_chatgpt
+from src.utils.llm import call_chatgpt, llm_context
+from src.utils.scenario_store import ScenarioStore
 
 
 def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def load_jsonl(path):
-    scenario_info_map = {}
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            record = json.loads(line)
-            name = record.get("作戦名")
-            if name:
-                scenario_info_map[name] = record
-    return scenario_info_map
-
 def summarize_scenario(scenario_name, enemy_data, fortress_data, history_data, scenario_info=None):
     header = f"シナリオ名: {scenario_name}\n\n"
     if scenario_info:
@@ -44,9 +35,10 @@ def summarize_scenario(scenario_name, enemy_data, fortress_data, history_data, s
     )
     return header
 
+@llm_context(stage="analysis")
 def process_all_logs(base_path="results/simulation_logs", output_dir="results/simulation_analysis_result", scenario_info_path="results/scenarios.jsonl"):
     os.makedirs(output_dir, exist_ok=True)
-    scenario_info_map = load_jsonl(scenario_info_path)
+    scenarios = ScenarioStore(scenario_info_path)
 
     for scenario_name in os.listdir(base_path):
         scenario_path = os.path.join(base_path, scenario_name)
@@ -60,7 +52,7 @@ def process_all_logs(base_path="results/simulation_logs", output_dir="results/si
                 fortress_data = load_json(fortress_path)
                 history_data = load_json(history_path)
 
-                scenario_info = scenario_info_map.get(scenario_name)
+                scenario_info = scenarios.get(scenario_name)
                 prompt = summarize_scenario(scenario_name, enemy_data, fortress_data, history_data, scenario_info)
                 result = call_chatgpt(
                                 [
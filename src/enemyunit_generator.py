@@ -1,34 +1,69 @@
 import json
+import os
 import re
 
-from src.simulations.models import ExpendableWeapon, Fortress, Weapon
-from src.utils.llm import call_chatgpt
+from src.definitions.predefined_japanese_defenses import (DEFENSES_PATH,
+                                                          FORTRESS_TEMPLATES)
+from src.simulations.models import Fortress
+from src.simulations.templates import UNIT_DIR
+from src.simulations.unit_spec import (UnitSpecError, dump_spec, parse_spec,
+                                       write_spec)
+from src.utils.llm import call_chatgpt, llm_context
+from src.utils.scenario_store import get_store
+
+# 形式の誤りを伝えて生成し直す回数の上限
+MAX_ATTEMPTS = 3
 
 ENEMY_UNIT_PROMPT_TEMPLATE = """
-あなたは軍事アナリストでありエンジニアです。
-以下のシナリオをもとにmodels.pyのEnemyUnitの初期化パラメータを作成してくださいweapon_stock、ammo_stock、ammo_defsに関しては敵国独自のものを使用してください。
-Jammer以外のWeaponのammo_typeに関しては必ず何かしら一つは指定してください。ammo_stock、ammo_typeを定義せずにWeaponを定義することはできません
-predefined_japanese_defenses.pyクラス定義を参考にして、同様のファイルとして読み込めるようにコードだけを出してください。
-他の説明などは何も出力しないでください。攻撃対象のbaseにはpredefined_japanese_defenses.pyで定義されているFortressを使用してください。
-EnemyUnitはsrc.simulations.modelsからimportして、japanese fortressはsrc.definitions.predefined_japanese_defensesからimportしてください
-そのほかのmodels.pyで定義されている様々な武器クラスもsrc.simulations.modelsからimportしてください。
-retreat_cost_thresholdはWeaponのコストとシナリオの目的や戦力投入レベルを参照して設定してください。
+あなたは軍事アナリストです。
+以下のシナリオをもとに、敵ユニットのユニット定義（JSON）を作成してください。weapons、ammoに関しては敵国独自のものを使用してください。
+type が weapon の武器の ammo_type には、必ず ammo で定義した弾薬を一つ指定してください。ammo を定義せずに weapon を定義することはできません。
+ammo の stock は敵ユニットが保有する弾薬の数量です。
+target_base には日本の防衛拠点の定義にある拠点の name をそのまま使用してください。
+retreat_cost_thresholdは武器のcostとシナリオの目的や戦力投入レベルを参照して設定してください。
 基本的にはweaponが一個壊されたらその分のコストが加算されるのと、そのweaponを使うたびに対応するammo分のコストも追加されます。
 もし戦力投入レベルが高い場合は武器がかなり壊されても退却しないように設定し、低い場合は武器が壊れるのをあまり好まないように設定してください。
-敵のunitは一つだけ設定し、変数名はenemy_unitで固定してください。また、緯度、経度はtarget_baseから100km以内に収まるようにかなり近いものにしてください。
+敵のunitは enemy_units に一つだけ設定してください。また、緯度、経度はtarget_baseから100km以内に収まるようにかなり近いものにしてください。
 具体的にはtarget baseの緯度、経度からそれぞれ1度以上離れないようにしてください。
+JSONだけを出力し、他の説明などは何も出力しないでください。
 
+## 出力の形式
+{unit_format}
 
 ## シナリオ
 {scenario}
 
-## predefined_japanese_defenses.py
-{predefined_japanese_defenses}
+## 日本の防衛拠点の定義
+{japanese_defenses}
+"""
+
+RETRY_PROMPT_TEMPLATE = """
+出力したユニット定義に以下の誤りがありました。誤りを直したユニット定義（JSON）だけを出力してください。
 
-## models.py
-{models}
+{errors}
 """
 
+UNIT_FORMAT = {
+    "version": 1,
+    "enemy_units": [{
+        "name": "敵ユニット名",
+        "target_base": "攻撃対象の拠点名",
+        "latitude": 27.5,
+        "longitude": 129.0,
+        "speed": 30,
+        "retreat_cost_threshold": 500000,
+        "ammo": {
+            "弾薬名": {"cost_per_unit": 150, "move_distance_per_turn": 200, "stock": 400},
+        },
+        "weapons": [
+            {"type": "weapon", "name": "武器名", "count": 12, "range_": 200, "power": 130, "ammo_type": "弾薬名",
+             "ammo_per_shot": 2, "move_distance_per_turn": 140, "cost": 16000, "hp": 120},
+            {"type": "jammer", "name": "妨害装置名", "count": 2, "range_": 300, "jam_turns": 3,
+             "move_distance_per_turn": 160, "cost": 50000, "hp": 100},
+        ],
+    }],
+}
+
 
 def summarize_fortresses(fortresses: list[Fortress]) -> str:
     lines = []
@@ -42,32 +77,6 @@ def summarize_fortresses(fortresses: list[Fortress]) -> str:
         )
     return "\n".join(lines)
 
-def load_fortresses_from_file(path: str) -> list[Fortress]:
-    with open(path, "r") as f:
-        data = json.load(f)
-
-    fortresses = []
-    for fd in data:
-        ammo_defs = {
-            name: ExpendableWeapon(name, **props)
-            for name, props in fd["ammo_defs"].items()
-        }
-        weapons = {
-            wname: [
-                Weapon(name=w["name"], range_=w["range_"], power=w["power"],
-                       move_distance_per_turn=w["move_distance_per_turn"], cost=w["cost"],
-                       hp=w["hp"], ammo_type=w["ammo_type"], ammo_per_shot=w["ammo_per_shot"])
-                for w in wlist
-            ]
-            for wname, wlist in fd["weapon_stock"].items()
-        }
-
-        fortresses.append(Fortress(
-            name=fd["name"], latitude=fd["latitude"], longitude=fd["longitude"], weapon_stock=weapons, ammo_stock=fd["ammo_stock"], ammo_defs=ammo_defs
-        ))
-    return fortresses
-
-
 def extract_scenearios(text: str) -> list[dict]:
     scenario_blocks = re.split(r'(【軍事シナリオ\d+】)', text)
     scenarios = []
@@ -94,23 +103,48 @@ def extract_scenearios(text: str) -> list[dict]:
         scenarios.append(data)
     return scenarios
 
-def generate_enemy_unit(scenario) -> str:
-    predefined_japanese_defenses = open("src/definitions/predefined_japanese_defenses.py").read()
-    models = open("src/simulations/models.py").read()
-    prompt = ENEMY_UNIT_PROMPT_TEMPLATE.format(scenario=scenario, predefined_japanese_defenses=predefined_japanese_defenses, models=models)
+def extract_json(response: str) -> str:
+    return re.sub(r"^```(?:json)?\s*|```$", "", response.strip(), flags=re.MULTILINE)
+
+
+@llm_context(stage="enemy_unit")
+def generate_enemy_unit(scenario) -> dict:
+    """
+    シナリオの敵ユニットのユニット定義を生成する。形式に誤りがあれば、誤りを伝えて MAX_ATTEMPTS 回まで生成し直す。
+
+    Returns:
+        dict: 検査済みのユニット定義。
 
-    response = call_chatgpt(
-        messages=[{"role": "user", "content": prompt}],
+    Raises:
+        UnitSpecError: MAX_ATTEMPTS 回生成しても誤りが残った場合。
+    """
+    with open(DEFENSES_PATH, encoding="utf-8") as f:
+        japanese_defenses = f.read()
+    prompt = ENEMY_UNIT_PROMPT_TEMPLATE.format(
+        scenario=scenario,
+        unit_format=json.dumps(UNIT_FORMAT, indent=2, ensure_ascii=False),
+        japanese_defenses=japanese_defenses,
     )
-    return re.sub(r"^```python\s*|```$", "", response.strip(), flags=re.MULTILINE)
+    fortress_names = [template.name for template in FORTRESS_TEMPLATES]
+    messages = [{"role": "user", "content": prompt}]
+    for attempt in range(MAX_ATTEMPTS):
+        response = call_chatgpt(messages=messages)
+        try:
+            # 検査を通った定義を、既定の項目順に書き直して返す
+            spec = parse_spec(extract_json(response), fortress_names)
+            return dump_spec(enemy_units=[spec.enemy_unit])
+        except UnitSpecError as e:
+            error = e
+            print(f"⚠️ ユニット定義の誤り（{attempt + 1}/{MAX_ATTEMPTS}回目）:\n{e}")
+        messages += [
+            {"role": "assistant", "content": response},
+            {"role": "user", "content": RETRY_PROMPT_TEMPLATE.format(errors="\n".join(f"- {e}" for e in error.errors))},
+        ]
+    raise error
 
 if __name__ == "__main__":
     # Fortressとニュースを取得
-    with open("results/scenarios.jsonl") as f:
-        scenarios = [json.loads(line) for line in f]
-    for scenario in scenarios:
+    for scenario in get_store():
         print(scenario)
         enemy_unit = generate_enemy_unit(scenario=scenario)
-        with open(f"results/enemy_units/{scenario['作戦名']}.py", "w") as fw:
-            fw.write(enemy_unit)
-        
\ No newline at end of file
+        write_spec(enemy_unit, os.path.join(UNIT_DIR, f"{scenario['作戦名']}.json"))
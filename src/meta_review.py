@@ -2,7 +2,7 @@ import glob
 import json
 import os
 
-from src.utils.llm import call_chatgpt
+from src.utils.llm import call_chatgpt, llm_context
 
 
 # 1. results配下の*.txtからシナリオ情報を抽出し、検索クエリ生成
@@ -98,6 +98,7 @@ def save_output(content, output_dir="results/meta_review_result", emotion="passi
     return output_path
 
 # 実行関数
+@llm_context(stage="meta_review")
 def main():
     scenarios, queries = load_scenarios_and_generate_queries()
     defense_results = search_defense_documents(queries)
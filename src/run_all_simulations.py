@@ -0,0 +1,111 @@
+import argparse
+import contextvars
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.run_simulation_template import run_scenario
+from src.simulations.batch import trial_outcome
+from src.simulations.templates import UNIT_DIR
+from src.utils.llm import llm_context
+from src.utils.scenario_store import get_store
+
+TABLE_COLUMNS = ["code_name", "winner", "turns", "enemy_cost", "fortress_cost",
+                 "enemy_destroyed", "fortress_destroyed", "elapsed_s"]
+
+
+def discover_units(unit_dir: str = UNIT_DIR) -> list[str]:
+    """unit_dir にある敵ユニットの定義（<作戦名>.json と従来の <作戦名>.py）の作戦名を名前順に返す。"""
+    paths = glob.glob(os.path.join(unit_dir, "*.json")) + glob.glob(os.path.join(unit_dir, "*.py"))
+    names = {os.path.splitext(os.path.basename(path))[0] for path in paths}
+    return sorted(name for name in names if not name.startswith("__"))
+
+
+def run_one(code_name: str, scenario: dict, **kwargs) -> dict:
+    """1つの作戦を実行し、集計表の1行を返す。LLMの計測値には作戦名のタグを付ける。"""
+    print(f"🚀 開始: {code_name}")
+    start = time.perf_counter()
+    with llm_context(scenario=code_name):
+        sim = run_scenario(code_name, scenario, console=False, **kwargs)
+    return {"code_name": code_name, **trial_outcome(sim), "elapsed_s": round(time.perf_counter() - start, 1)}
+
+
+def run_all(code_names: list[str], scenarios: dict[str, dict], workers: int = 4, **kwargs) -> tuple[list[dict], dict]:
+    """
+    複数の作戦のシミュレーションを1つのプロセスのスレッドプールで同時に実行する。
+    LLMの呼び出しは同じプロセスの共有の制限（同時実行数・送信レート）を通るので、作戦を増やしても上限は変わらない。
+
+    Args:
+        code_names (list): 実行する作戦名。
+        scenarios (dict): 作戦名ごとのシナリオ。
+        workers (int): 同時に実行する作戦の数。
+        **kwargs: run_scenario に渡す引数（concurrent_decisions, resume など）。
+
+    Returns:
+        tuple: (作戦名順の集計表の行のリスト, 作戦名から失敗の内容への辞書)
+    """
+    rows, failures = [], {}
+    runnable = []
+    for code_name in code_names:
+        if code_name in scenarios:
+            runnable.append(code_name)
+        else:
+            failures[code_name] = "対応するシナリオが見つかりません"
+            print(f"❌ 失敗: {code_name} ({failures[code_name]})")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # 呼び出し元のcontextvars（LLMの実行ステージなど）を各スレッドに引き継ぐ
+        futures = {
+            executor.submit(contextvars.copy_context().run, run_one, code_name, scenarios[code_name], **kwargs): code_name
+            for code_name in runnable
+        }
+        for future in as_completed(futures):
+            code_name = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                failures[code_name] = f"{type(e).__name__}: {e}"
+                print(f"❌ 失敗: {code_name} ({failures[code_name]})")
+                continue
+            rows.append(row)
+            print(f"✅ 完了: {code_name} ({row['winner']}, {row['turns']} ターン, {row['elapsed_s']} 秒)")
+
+    order = {code_name: i for i, code_name in enumerate(code_names)}
+    rows.sort(key=lambda row: order[row["code_name"]])
+    return rows, failures
+
+
+def print_report(rows: list[dict], failures: dict):
+    """集計表と失敗の一覧を表示する。"""
+    print("\n=== 集計 ===")
+    print("\t".join(TABLE_COLUMNS))
+    for row in rows:
+        print("\t".join(str(row[c]) for c in TABLE_COLUMNS))
+    winners = {}
+    for row in rows:
+        winners[row["winner"]] = winners.get(row["winner"], 0) + 1
+    print("勝者: " + (", ".join(f"{winner} {count}" for winner, count in winners.items()) or "なし"))
+    if failures:
+        print(f"\n=== 失敗 ({len(failures)}) ===")
+        for code_name, reason in failures.items():
+            print(f"{code_name}\t{reason}")
+        print("途中で止まった作戦は --resume を付けて再実行すると、最後に完了したターンの次から再開します。")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="全作戦のシミュレーションを1つのプロセスで同時に実行する")
+    parser.add_argument("code_names", nargs="*", help="実行する作戦名（省略すると results/enemy_units の全作戦）")
+    parser.add_argument("--workers", type=int, default=4, help="同時に実行する作戦の数")
+    parser.add_argument("--concurrent", action="store_true", help="各作戦で拠点の司令官の判断を同時に行う")
+    parser.add_argument("--resume", action="store_true", help="checkpoint.json のある作戦は途中から再開する")
+    args = parser.parse_args()
+
+    code_names = args.code_names or discover_units()
+    store = get_store()
+    scenarios = {name: store.get(name) for name in code_names if name in store}
+    rows, failures = run_all(code_names, scenarios, workers=args.workers,
+                             concurrent_decisions=args.concurrent, resume=args.resume)
+    print_report(rows, failures)
+    sys.exit(1 if failures else 0)
@@ -1,45 +1,77 @@
-import json
+import os
 import sys
-from importlib import import_module
 
-from src.definitions.predefined_japanese_defenses import (fortress_amami,
-                                                          fortress_kadena,
-                                                          fortress_kanoya,
-                                                          fortress_naha,
-                                                          fortress_sasebo)
+from src.definitions.predefined_japanese_defenses import make_fortresses
+from src.simulations.checkpoint import (Checkpointer, load_checkpoint,
+                                        restore_state)
 from src.simulations.models import Simulation
+from src.simulations.observers import ConsoleObserver, JsonlStreamWriter
+from src.simulations.templates import load_unit_template
+from src.utils.scenario_store import get_store
 
 
-def main(enemy_code_name: str):
-    # 動的 import（例：results.enemy_units.天空の盾）
-    module_path = f"results.enemy_units.{enemy_code_name}"
-    module = import_module(module_path)
+def run_scenario(enemy_code_name: str, enemy_scenario: dict, concurrent_decisions: bool = False,
+                 resume: bool = False, console: bool = True, output_base: str = "results/simulation_logs",
+                 fortress_commander_cls=None, enemy_commander_cls=None) -> Simulation:
+    """
+    1つの作戦のシミュレーションを実行し、結果を output_base/<作戦名> に書き出す。
 
-    enemy_unit = getattr(module, "enemy_unit")
+    Args:
+        enemy_code_name (str): 作戦名（results/enemy_units のユニット定義のファイル名）。
+        enemy_scenario (dict): 作戦のシナリオ。
+        concurrent_decisions (bool): 拠点の司令官の判断を同時に行うかどうか。
+        resume (bool): checkpoint.json があれば最後に完了したターンの次から再開するかどうか。
+        console (bool): 経過を標準出力に表示するかどうか。
+        output_base (str): 作戦ごとの出力ディレクトリを置くディレクトリ。
+        fortress_commander_cls: 拠点の司令官のクラス。NoneならLLMの司令官。
+        enemy_commander_cls: 敵ユニットの司令官のクラス。NoneならLLMの司令官。
 
-    # 対応するシナリオを取得
-    datal = [json.loads(line) for line in open("results/scenarios.jsonl", encoding="utf-8")]
-    scenario_list = [data for data in datal if data["作戦名"] == enemy_code_name]
-    
-    if not scenario_list:
-        print(f"❌ 作戦名 '{enemy_code_name}' に対応するシナリオが見つかりません")
-        return
-    
-    enemy_scenario = scenario_list[0]
+    Returns:
+        Simulation: 実行後のシミュレーション。
+    """
+    # 拠点と敵ユニット（results/enemy_units/<作戦名>.json の定義）をこのシミュレーション用に新しく作る
+    fortresses = make_fortresses()
+    enemy_unit = load_unit_template(enemy_code_name).instantiate(fortresses)
 
-    # シミュレーション実行
+    # シミュレーション実行（経過は result_stream.jsonl に、再開用の状態は checkpoint.json にターンごとに書き出す）
+    output_dir = f"{output_base}/{enemy_scenario['作戦名']}"
+    checkpoint_path = f"{output_dir}/checkpoint.json"
+    resume = resume and os.path.exists(checkpoint_path)
+    observers = [ConsoleObserver()] if console else []
     simulator = Simulation(
-        fortresses=[fortress_naha, fortress_amami, fortress_sasebo, fortress_kadena, fortress_kanoya],
+        fortresses=fortresses,
         enemy_unit=enemy_unit,
         enemy_scenario=enemy_scenario,
-        max_turns=10
+        max_turns=10,
+        concurrent_decisions=concurrent_decisions,
+        fortress_commander_cls=fortress_commander_cls,
+        enemy_commander_cls=enemy_commander_cls,
+        observers=[
+            *observers,
+            JsonlStreamWriter(f"{output_dir}/result_stream.jsonl", append=resume),
+            Checkpointer(checkpoint_path),
+        ],
     )
+    if resume:
+        restore_state(simulator, load_checkpoint(checkpoint_path))
+        print(f"↩️ {enemy_code_name}: Turn {simulator.turn} から再開します")
     simulator.run()
-    simulator.export_results(output_dir=f"results/simulation_logs/{enemy_scenario['作戦名']}")
+    simulator.export_results(output_dir=output_dir)
+    return simulator
+
+
+def main(enemy_code_name: str, concurrent_decisions: bool = False, resume: bool = False):
+    # 対応するシナリオを取得
+    enemy_scenario = get_store().get(enemy_code_name)
+    if enemy_scenario is None:
+        print(f"❌ 作戦名 '{enemy_code_name}' に対応するシナリオが見つかりません")
+        return
+
+    run_scenario(enemy_code_name, enemy_scenario, concurrent_decisions=concurrent_decisions, resume=resume)
     print(f"✅ 完了: {enemy_code_name}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("使い方: python run_simulation_template.py <作戦名>")
+        print("使い方: python run_simulation_template.py <作戦名> [--concurrent] [--resume]")
         sys.exit(1)
-    main(sys.argv[1])
+    main(sys.argv[1], concurrent_decisions="--concurrent" in sys.argv[2:], resume="--resume" in sys.argv[2:])
@@ -1,14 +1,10 @@
-import json
 import re
 
-from src.definitions.predefined_japanese_defenses import (fortress_amami,
-                                                          fortress_kadena,
-                                                          fortress_kanoya,
-                                                          fortress_naha,
-                                                          fortress_sasebo)
-from src.simulations.models import ExpendableWeapon, Fortress, Weapon
+from src.definitions.predefined_japanese_defenses import make_fortresses
+from src.simulations.models import Fortress
 from src.tools.get_latest_news import GetLatestNewsTool
-from src.utils.llm import call_chatgpt
+from src.utils.llm import call_chatgpt, llm_context
+from src.utils.scenario_store import get_store
 
 SCENARIO_PROMPT_TEMPLATE = """
 あなたは軍事アナリストです。
@@ -52,32 +48,6 @@ def summarize_fortresses(fortresses: list[Fortress]) -> str:
         )
     return "\n".join(lines)
 
-def load_fortresses_from_file(path: str) -> list[Fortress]:
-    with open(path, "r") as f:
-        data = json.load(f)
-
-    fortresses = []
-    for fd in data:
-        ammo_defs = {
-            name: ExpendableWeapon(name, **props)
-            for name, props in fd["ammo_defs"].items()
-        }
-        weapons = {
-            wname: [
-                Weapon(name=w["name"], range_=w["range_"], power=w["power"],
-                       move_distance_per_turn=w["move_distance_per_turn"], cost=w["cost"],
-                       hp=w["hp"], ammo_type=w["ammo_type"], ammo_per_shot=w["ammo_per_shot"])
-                for w in wlist
-            ]
-            for wname, wlist in fd["weapon_stock"].items()
-        }
-
-        fortresses.append(Fortress(
-            name=fd["name"], latitude=fd["latitude"], longitude=fd["longitude"], weapon_stock=weapons, ammo_stock=fd["ammo_stock"], ammo_defs=ammo_defs
-        ))
-    return fortresses
-
-
 def extract_scenearios(text: str) -> list[dict]:
     scenario_blocks = re.split(r'(【軍事シナリオ\d+】)', text)
     scenarios = []
@@ -104,6 +74,7 @@ def extract_scenearios(text: str) -> list[dict]:
         scenarios.append(data)
     return scenarios
 
+@llm_context(stage="scenario")
 def generate_natural_scenarios(news_text: str, fortresses: list[Fortress]) -> str:
     fortress_summary = summarize_fortresses(fortresses)
     prompt = SCENARIO_PROMPT_TEMPLATE.format(news_text=news_text, fortress_summary=fortress_summary)
@@ -117,19 +88,11 @@ def generate_natural_scenarios(news_text: str, fortresses: list[Fortress]) -> st
 
 if __name__ == "__main__":
     # Fortressとニュースを取得
-    fortresses = [
-        fortress_naha,
-        fortress_amami,
-        fortress_sasebo,
-        fortress_kadena,
-        fortress_kanoya,
-    ]
+    fortresses = make_fortresses()
     news = GetLatestNewsTool().use_tool("南西諸島")
 
     # シナリオ生成
     scenarios = generate_natural_scenarios(news, fortresses)
     print("=== 作戦シナリオ ===")
     print(scenarios)
-    with open("results/scenarios.jsonl", "w") as fw:
-        for scenario in scenarios:
-            fw.write(json.dumps(scenario, ensure_ascii=False) + "\n")
+    get_store().rewrite(scenarios)
@@ -0,0 +1,169 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import random
+from typing import Optional
+
+from src.simulations.models import Simulation
+from src.simulations.policies import (RuleBasedEnemyCommander,
+                                      RuleBasedFortressCommander)
+from src.simulations.templates import load_unit_template
+from src.utils.calculate_distance import move_point
+
+
+class UnitScenarioBuilder:
+    """
+    results/enemy_units/<作戦名>.json の敵ユニットと既定の防衛拠点から、試行ごとに新しい状態を作るクラス。
+    プロセスプールに渡せるよう、モジュール名などの軽い情報だけを保持する。
+
+    Attributes:
+        code_name (str): 作戦名（敵ユニットのモジュール名）。
+        enemy_scenario (dict): シナリオ。
+        position_jitter_km (float): 敵ユニットの初期位置をずらす最大距離（km）。
+        threshold_jitter (float): 撤退コスト閾値を増減させる最大の割合。
+    """
+    def __init__(self, code_name: str, enemy_scenario: Optional[dict] = None,
+                 position_jitter_km: float = 20.0, threshold_jitter: float = 0.1):
+        self.code_name = code_name
+        self.enemy_scenario = enemy_scenario or {"作戦名": code_name, "目的": ""}
+        self.position_jitter_km = position_jitter_km
+        self.threshold_jitter = threshold_jitter
+
+    def __call__(self, rng: random.Random) -> dict:
+        from src.definitions.predefined_japanese_defenses import make_fortresses
+
+        # 変更不可の定義から毎回新しい拠点とユニットを作り、target_base を作った拠点に結び付ける
+        fortresses = make_fortresses()
+        enemy_unit = load_unit_template(self.code_name).instantiate(fortresses)
+
+        bearing = rng.uniform(0, 360)
+        offset = rng.uniform(0, self.position_jitter_km)
+        enemy_unit.latitude, enemy_unit.longitude = move_point(enemy_unit.latitude, enemy_unit.longitude, offset, bearing)
+        enemy_unit.retreat_cost_threshold *= 1 + rng.uniform(-self.threshold_jitter, self.threshold_jitter)
+        return {"fortresses": fortresses, "enemy_units": [enemy_unit], "enemy_scenario": self.enemy_scenario}
+
+
+def trial_outcome(sim: Simulation) -> dict:
+    """
+    1回のシミュレーションの結果を集計表の1行にまとめる。
+
+    Returns:
+        dict: 勝者、ターン数、各陣営のコストと破壊数。
+    """
+    unit_names = {u.name for u in sim.enemy_units}
+    outcomes = [h.action for h in sim.history if h.name in unit_names and h.action in ("win", "lost", "retreat")]
+    if "win" in outcomes:
+        winner = "enemy"
+    elif outcomes:
+        winner = "defender"
+    else:
+        winner = "draw"
+    row = {
+        "winner": winner,
+        "turns": sim.turn,
+        "enemy_cost": sum(u.current_cost for u in sim.enemy_units),
+        "fortress_cost": sum(f.current_cost for f in sim.fortresses),
+        "enemy_destroyed": sum(u.weapon_stock.destroyed_count(n) for u in sim.enemy_units for n in u.weapon_stock),
+        "fortress_destroyed": sum(f.weapon_stock.destroyed_count(n) for f in sim.fortresses for n in f.weapon_stock),
+    }
+    for f in sim.fortresses:
+        row[f"cost:{f.name}"] = f.current_cost
+    return row
+
+
+def run_trial(args) -> dict:
+    """プロセスプールの各ワーカーで1回分の試行を実行する。"""
+    trial, seed, builder, max_turns, fortress_commander_cls, enemy_commander_cls = args
+    trial_seed = seed * 1_000_003 + trial
+    state = builder(random.Random(trial_seed))
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulation(
+            fortresses=state["fortresses"],
+            enemy_units=state["enemy_units"],
+            enemy_scenario=state["enemy_scenario"],
+            max_turns=max_turns,
+            fortress_commander_cls=fortress_commander_cls,
+            enemy_commander_cls=enemy_commander_cls,
+        )
+        sim.run()
+    return {"trial": trial, "seed": trial_seed, **trial_outcome(sim)}
+
+
+def simulate_many(builder, n_trials: int, processes: Optional[int] = None, seed: int = 0, max_turns: int = 10,
+                  fortress_commander_cls=RuleBasedFortressCommander, enemy_commander_cls=RuleBasedEnemyCommander,
+                  output_path: Optional[str] = None) -> list[dict]:
+    """
+    同じシナリオをn_trials回、プロセスプールで並列にシミュレーションし、試行ごとの結果を集める。
+
+    Args:
+        builder: 乱数生成器を受け取り fortresses / enemy_units / enemy_scenario の辞書を返す、pickle可能な呼び出し可能オブジェクト。
+        n_trials (int): 試行回数。
+        processes (int or None): ワーカー数。Noneなら全コアを使う。
+        seed (int): 乱数の元になるシード。
+        max_turns (int): 1試行の最大ターン数。
+        fortress_commander_cls: 拠点の司令官のクラス。
+        enemy_commander_cls: 敵ユニットの司令官のクラス。
+        output_path (str or None): 指定すると、試行が終わるたびに結果の行をCSVへ追記する。
+
+    Returns:
+        list[dict]: 試行番号順の結果の行。
+    """
+    tasks = [(trial, seed, builder, max_turns, fortress_commander_cls, enemy_commander_cls) for trial in range(n_trials)]
+    rows = []
+    writer = None
+    output = None
+    try:
+        with multiprocessing.Pool(processes) as pool:
+            for row in pool.imap_unordered(run_trial, tasks):
+                rows.append(row)
+                if output_path:
+                    if writer is None:
+                        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+                        output = open(output_path, "w", encoding="utf-8", newline="")
+                        writer = csv.DictWriter(output, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
+                    output.flush()
+    finally:
+        if output:
+            output.close()
+    return sorted(rows, key=lambda row: row["trial"])
+
+
+def summarize_trials(rows: list[dict]) -> dict:
+    """
+    試行ごとの結果を集計する。
+
+    Returns:
+        dict: 試行数、各勝者の割合、ターン数・コスト・破壊数の平均。
+    """
+    n = len(rows)
+    if not n:
+        return {"trials": 0}
+    summary = {"trials": n}
+    for winner in ("enemy", "defender", "draw"):
+        summary[f"{winner}_rate"] = sum(row["winner"] == winner for row in rows) / n
+    for key in ("turns", "enemy_cost", "fortress_cost", "enemy_destroyed", "fortress_destroyed"):
+        summary[f"mean_{key}"] = sum(row[key] for row in rows) / n
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ルールベースの司令官でモンテカルロシミュレーションを行う")
+    parser.add_argument("code_name", help="作戦名（results/enemy_units/<作戦名>.json）")
+    parser.add_argument("--trials", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=10)
+    parser.add_argument("--output", default=None, help="試行ごとの結果を書き出すCSVのパス")
+    args = parser.parse_args()
+
+    output_path = args.output or f"results/monte_carlo/{args.code_name}.csv"
+    rows = simulate_many(UnitScenarioBuilder(args.code_name), args.trials, processes=args.processes, seed=args.seed,
+                         max_turns=args.max_turns, output_path=output_path)
+    print(json.dumps(summarize_trials(rows), indent=2, ensure_ascii=False))
+    print(f"✅ 試行ごとの結果を保存しました: {output_path}")
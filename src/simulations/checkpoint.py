@@ -0,0 +1,220 @@
+import ast
+import itertools
+import json
+import os
+from dataclasses import asdict
+
+from src.simulations.models import (ColumnarStock, Convoy, ExpendableWeapon,
+                                    History, JammerSpec, WeaponColumn,
+                                    WeaponSpec, WeaponStock, intern_spec)
+from src.simulations.observers import SimulationObserver
+from src.simulations.replay import Decision, DecisionLog
+
+CHECKPOINT_VERSION = 1
+
+
+def encode_spec(spec) -> dict:
+    return {"type": "jammer" if isinstance(spec, JammerSpec) else "weapon", **asdict(spec)}
+
+
+def decode_spec(data: dict):
+    data = dict(data)
+    spec_cls = JammerSpec if data.pop("type") == "jammer" else WeaponSpec
+    return intern_spec(spec_cls(**data))
+
+
+def encode_weapons(weapons) -> dict:
+    """同一種類の武器（リストまたはWeaponColumn）を、定義と個体ごとの状態の配列にまとめる。"""
+    if isinstance(weapons, WeaponColumn):
+        return {
+            "spec": encode_spec(weapons.spec),
+            "hp": weapons.hp.tolist(),
+            "destroyed": weapons.destroyed.tolist(),
+            "jammed_until": weapons.jammed_until.tolist(),
+        }
+    return {
+        "spec": encode_spec(weapons[0].spec),
+        "hp": [w.hp for w in weapons],
+        "destroyed": [w.destroyed for w in weapons],
+        "jammed_until": [getattr(w, "jammed_until", 0) for w in weapons],
+    }
+
+
+def decode_weapons(data: dict) -> list:
+    spec = decode_spec(data["spec"])
+    weapons = []
+    for hp, destroyed, jammed_until in zip(data["hp"], data["destroyed"], data["jammed_until"]):
+        weapon = spec.instantiate()
+        weapon.hp = hp
+        weapon.destroyed = destroyed
+        if not isinstance(spec, JammerSpec):
+            weapon.jammed_until = jammed_until
+        weapons.append(weapon)
+    return weapons
+
+
+def encode_stock(weapon_stock: WeaponStock) -> dict:
+    return {
+        "columnar": isinstance(weapon_stock, ColumnarStock),
+        "weapons": {name: encode_weapons(ws) for name, ws in weapon_stock.items()},
+    }
+
+
+def decode_column(data: dict) -> WeaponColumn:
+    return WeaponColumn(decode_spec(data["spec"]), data["hp"], data["destroyed"], data["jammed_until"])
+
+
+def decode_stock(data: dict) -> WeaponStock:
+    if data["columnar"]:
+        return ColumnarStock({name: decode_column(ws) for name, ws in data["weapons"].items()})
+    return WeaponStock({name: decode_weapons(ws) for name, ws in data["weapons"].items()})
+
+
+def encode_ammo_defs(ammo_defs: dict) -> dict:
+    return {name: [d.cost_per_unit, d.move_distance_per_turn] for name, d in ammo_defs.items()}
+
+
+def decode_ammo_defs(data: dict, known: dict) -> dict:
+    """定義が変わっていない弾薬は既存のオブジェクトをそのまま使う。"""
+    ammo_defs = {}
+    for name, (cost_per_unit, move_distance_per_turn) in data.items():
+        ammo_def = known.get(name)
+        if ammo_def is None or (ammo_def.cost_per_unit, ammo_def.move_distance_per_turn) != (cost_per_unit, move_distance_per_turn):
+            ammo_def = ExpendableWeapon(name, cost_per_unit, move_distance_per_turn)
+        ammo_defs[name] = ammo_def
+    return ammo_defs
+
+
+def encode_entity(entity) -> dict:
+    state = {
+        "lat": entity.latitude,
+        "lon": entity.longitude,
+        "current_cost": entity.current_cost,
+        "weapon_stock": encode_stock(entity.weapon_stock),
+        "ammo_stock": dict(entity.ammo_stock),
+        "ammo_defs": encode_ammo_defs(entity.ammo_defs),
+    }
+    if hasattr(entity, "retreating"):
+        state["retreating"] = entity.retreating
+    return state
+
+
+def encode_plan(plan) -> str:
+    # JSONにするとタプルがリストになり、履歴の文字列（＝プロンプト）が変わるのでreprで保存する
+    return repr(plan)
+
+
+def decode_plan(text: str):
+    return ast.literal_eval(text)
+
+
+def capture_state(sim) -> dict:
+    """
+    シミュレーションの次のターンを始めるのに必要な状態を、JSONにできる辞書にまとめる。
+    拠点・敵ユニット（位置、コスト、撤退フラグ、武器の個体ごとの hp/destroyed/jammed_until、弾薬）、
+    輸送中の輸送隊、履歴、司令官の判断の記録を含む。ターンの途中で呼んだ場合はそのターンの途中の状態になる。
+    """
+    queue = []
+    for arrival_turn, seq, convoy in sorted(sim.weapon_transfer_queue, key=lambda entry: entry[:2]):
+        by_name = {}
+        for weapon in convoy.weapons:
+            by_name.setdefault(weapon.name, []).append(weapon)
+        queue.append({
+            "seq": seq,
+            "arrival_turn": arrival_turn,
+            "origin": convoy.origin.name,
+            "destination": convoy.destination.name,
+            "weapons": [encode_weapons(ws) for ws in by_name.values()],
+            "ammo": {name: [ammo_def.cost_per_unit, ammo_def.move_distance_per_turn, amount]
+                     for name, (ammo_def, amount) in convoy.ammo.items()},
+        })
+    return {
+        "version": CHECKPOINT_VERSION,
+        "turn": sim.turn,
+        "fortresses": {f.name: encode_entity(f) for f in sim.fortresses},
+        "enemy_units": {u.name: encode_entity(u) for u in sim.enemy_units},
+        "transfer_queue": queue,
+        "history": [{**asdict(h), "plan": encode_plan(h.plan)} for h in sim.history],
+        "decisions": [{**asdict(d), "plan": encode_plan(d.plan)} for _, d in sorted(sim.decision_log.decisions.items())],
+    }
+
+
+def restore_state(sim, state: dict):
+    """
+    capture_state の状態を、同じ拠点・敵ユニット構成で作り直した Simulation に書き戻す。
+
+    Raises:
+        ValueError: 版が違う、または拠点・敵ユニットの名前が一致しない場合。
+    """
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {state.get('version')}")
+    fortresses = {f.name: f for f in sim.fortresses}
+    units = {u.name: u for u in sim.enemy_units}
+    if set(fortresses) != set(state["fortresses"]) or set(units) != set(state["enemy_units"]):
+        raise ValueError("Checkpoint does not match the simulation's fortresses and enemy units")
+
+    for entities, saved in ((fortresses, state["fortresses"]), (units, state["enemy_units"])):
+        for name, data in saved.items():
+            entity = entities[name]
+            entity.latitude, entity.longitude = data["lat"], data["lon"]
+            entity.current_cost = data["current_cost"]
+            entity.weapon_stock = decode_stock(data["weapon_stock"])
+            entity.ammo_stock = dict(data["ammo_stock"])
+            entity.ammo_defs = decode_ammo_defs(data["ammo_defs"], entity.ammo_defs)
+            if "retreating" in data:
+                entity.retreating = data["retreating"]
+            sim.geometry.invalidate(entity)
+
+    sim.weapon_transfer_queue = []
+    for entry in state["transfer_queue"]:
+        destination = fortresses[entry["destination"]]
+        ammo = {}
+        for name, (cost_per_unit, move_distance_per_turn, amount) in entry["ammo"].items():
+            ammo_def = decode_ammo_defs({name: [cost_per_unit, move_distance_per_turn]}, destination.ammo_defs)[name]
+            ammo[name] = (ammo_def, amount)
+        convoy = Convoy(
+            origin=fortresses[entry["origin"]],
+            destination=destination,
+            arrival_turn=entry["arrival_turn"],
+            weapons=[w for group in entry["weapons"] for w in decode_weapons(group)],
+            ammo=ammo,
+        )
+        sim.weapon_transfer_queue.append((entry["arrival_turn"], entry["seq"], convoy))
+    # 保存時にソート済みなのでヒープの条件を満たす
+    sim._transfer_seq = itertools.count(max((entry["seq"] for entry in state["transfer_queue"]), default=-1) + 1)
+
+    sim.history = [History(**{**h, "plan": decode_plan(h["plan"])}) for h in state["history"]]
+    sim.decision_log = DecisionLog([Decision(**{**d, "plan": decode_plan(d["plan"])}) for d in state["decisions"]])
+    sim.turn = state["turn"]
+
+
+def save_checkpoint(state: dict, path: str):
+    """書き込み途中で止まっても前のチェックポイントが壊れないよう、一時ファイルに書いてから置き換える。"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Checkpointer(SimulationObserver):
+    """
+    ターンの終わりごとにシミュレーションの状態を path に保存する observer。
+    途中で例外（LLMの応答の解析失敗やAPIエラー）が起きても、restore_state で最後に完了したターンの次から再開できる。
+
+    Attributes:
+        path (str): チェックポイントのパス。
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def on_turn_end(self, sim, turn, phase_ns):
+        state = capture_state(sim)
+        # on_turn_end はターン数を進める前に呼ばれるので、再開するのは次のターンから
+        state["turn"] = turn + 1
+        save_checkpoint(state, self.path)
@@ -0,0 +1,134 @@
+import math
+from itertools import combinations
+
+from src.utils.calculate_distance import calc_distance, calc_distance_batch
+
+
+class GeometryCache:
+    """
+    拠点やユニット間の距離をメモ化するクラス。
+    拠点同士の距離は位置が変わらないため初期化時に一度だけ計算し、
+    ユニットを含む距離はそのユニットが移動するまで使い回す。
+
+    Attributes:
+        static_ids (set): 位置が変わらない（拠点の）オブジェクトのid。
+    """
+    def __init__(self, fortresses=()):
+        self.static_ids = {id(f) for f in fortresses}
+        self._static_distances = {
+            self._key(a, b): calc_distance(a.latitude, a.longitude, b.latitude, b.longitude)
+            for a, b in combinations(fortresses, 2)
+        }
+        self._distances = {}
+        self._keys_by_id = {}
+
+    @staticmethod
+    def _key(a, b):
+        return (id(a), id(b)) if id(a) <= id(b) else (id(b), id(a))
+
+    def distance(self, a, b) -> float:
+        """
+        2つのオブジェクト間の距離をkm単位で返す。
+
+        Args:
+            a: FortressやEnemyUnitなど、latitude/longitudeを持つオブジェクト。
+            b: 同上。
+
+        Returns:
+            float: 距離（km）。
+        """
+        key = self._key(a, b)
+        if key in self._static_distances:
+            return self._static_distances[key]
+        if key not in self._distances:
+            self._distances[key] = calc_distance(a.latitude, a.longitude, b.latitude, b.longitude)
+            for obj_id in key:
+                if obj_id not in self.static_ids:
+                    self._keys_by_id.setdefault(obj_id, set()).add(key)
+        return self._distances[key]
+
+    def invalidate(self, obj):
+        """
+        位置が変わったオブジェクトを含む距離のメモを破棄する。
+
+        Args:
+            obj: 移動したオブジェクト。
+        """
+        for key in self._keys_by_id.pop(id(obj), ()):
+            self._distances.pop(key, None)
+
+
+KM_PER_DEGREE = math.pi * 6371 / 180
+
+
+class SpatialIndex:
+    """
+    緯度経度の格子で位置を索引化し、半径内にあるオブジェクトの候補を絞り込むクラス。
+    全組み合わせの距離計算を避け、近傍の格子に入っているものだけを距離判定する。
+    日付変更線をまたぐ範囲は考慮しない。
+
+    Attributes:
+        cell_deg (float): 格子1マスの大きさ（度）。
+    """
+    def __init__(self, objects=(), cell_deg: float = 1.0):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self.rebuild(objects)
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    def rebuild(self, objects):
+        """
+        索引を作り直す。
+
+        Args:
+            objects (list): latitude/longitudeを持つオブジェクトのリスト。
+        """
+        self._cells = {}
+        for obj in objects:
+            self._cells.setdefault(self._cell(obj.latitude, obj.longitude), []).append(obj)
+
+    def candidates(self, latitude: float, longitude: float, radius_km: float) -> list:
+        """
+        指定地点から半径radius_km以内にある可能性のあるオブジェクトを返す。
+
+        Args:
+            latitude (float): 中心の緯度。
+            longitude (float): 中心の経度。
+            radius_km (float): 半径（km）。
+
+        Returns:
+            list: 近傍の格子に入っているオブジェクト。
+        """
+        lat_span = radius_km / KM_PER_DEGREE
+        max_abs_lat = min(abs(latitude) + lat_span, 89.9)
+        lon_span = min(radius_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat))), 180.0)
+        lat_lo, lon_lo = self._cell(latitude - lat_span, longitude - lon_span)
+        lat_hi, lon_hi = self._cell(latitude + lat_span, longitude + lon_span)
+        if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) > len(self._cells):
+            cells = [c for c in self._cells if lat_lo <= c[0] <= lat_hi and lon_lo <= c[1] <= lon_hi]
+        else:
+            cells = [(i, j) for i in range(lat_lo, lat_hi + 1) for j in range(lon_lo, lon_hi + 1)]
+        return [obj for cell in cells for obj in self._cells.get(cell, ())]
+
+    def within(self, center, radius_km: float) -> list:
+        """
+        centerから半径radius_km以内にあるオブジェクトを距離の近い順に返す。
+        候補との距離は1回の配列計算でまとめて求める。
+
+        Args:
+            center: latitude/longitudeを持つ中心のオブジェクト。
+            radius_km (float): 半径（km）。
+
+        Returns:
+            list[tuple[float, object]]: (距離, オブジェクト) のリスト。
+        """
+        candidates = self.candidates(center.latitude, center.longitude, radius_km)
+        if not candidates:
+            return []
+        distances = calc_distance_batch(center.latitude, center.longitude,
+                                        [obj.latitude for obj in candidates], [obj.longitude for obj in candidates])
+        hits = [(float(distance), obj) for distance, obj in zip(distances, candidates) if distance <= radius_km]
+        hits.sort(key=lambda hit: hit[0])
+        return hits
@@ -0,0 +1,77 @@
+import re
+from collections import Counter
+from typing import Optional
+
+DESTROYED_PATTERN = re.compile(r"destroyed (\d+)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークン数の概算。英数字は4文字で1トークン、日本語などそれ以外の文字は1文字1トークンとみなす。
+    """
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return ascii_chars // 4 + (len(text) - ascii_chars)
+
+
+class HistoryPolicy:
+    """
+    司令官のプロンプトに入れる履歴の組み立て方。
+    直近 recent_turns ターンはそのまま載せ、それより古いターンは行動の集計・撃破数・コストの1行の要約に置き換える。
+    合計が max_tokens を超える場合は、そのまま載せるターンを減らし、それでも超えれば古い要約から省く。
+
+    Attributes:
+        recent_turns (int): そのまま載せる直近のターン数。
+        max_tokens (int): 履歴全体のトークン数の上限（概算）。
+    """
+    def __init__(self, recent_turns: int = 3, max_tokens: int = 6000):
+        self.recent_turns = recent_turns
+        self.max_tokens = max_tokens
+
+    def render(self, history: list) -> str:
+        turns = sorted({h.turn for h in history})
+        recent_turns = min(self.recent_turns, len(turns))
+        while True:
+            recent = set(turns[len(turns) - recent_turns:])
+            verbatim = [str(h) for h in history if h.turn in recent]
+            if recent_turns <= 1 or estimate_tokens("\n".join(verbatim)) <= self.max_tokens:
+                break
+            recent_turns -= 1
+
+        summaries = [self.summarize_turn(turn, [h for h in history if h.turn == turn])
+                     for turn in turns if turn not in recent]
+        budget = self.max_tokens - estimate_tokens("\n".join(verbatim))
+        omitted = 0
+        while summaries and estimate_tokens("\n".join(summaries)) > budget:
+            summaries.pop(0)
+            omitted += 1
+        lines = []
+        if omitted:
+            lines.append(f"（古い{omitted}ターン分の履歴は省略）")
+        return "\n".join(lines + summaries + verbatim)
+
+    @staticmethod
+    def summarize_turn(turn: int, entries: list) -> str:
+        """
+        1ターン分の履歴を、行動の集計・各拠点/ユニットの撃破数・ターン終了時の累積コストの1行にまとめる。
+        """
+        actions = Counter(h.action for h in entries)
+        destroyed = Counter()
+        costs = {}
+        for h in entries:
+            destroyed[h.name] += sum(int(n) for n in DESTROYED_PATTERN.findall(h.result or ""))
+            if getattr(h, "cost", None) is not None:
+                costs[h.name] = h.cost
+        parts = [
+            "行動: " + ", ".join(f"{action}×{count}" for action, count in actions.items()),
+            "撃破: " + (", ".join(f"{name} {count}" for name, count in destroyed.items() if count) or "なし"),
+        ]
+        if costs:
+            parts.append("累積コスト: " + ", ".join(f"{name} {cost}" for name, cost in costs.items()))
+        return f"[Turn {turn} 要約] " + " | ".join(parts)
+
+
+def render_history(history: list, policy: Optional[HistoryPolicy] = None) -> str:
+    """policyがNoneなら従来どおり全履歴をそのまま並べる。"""
+    if policy is None:
+        return "\n".join(str(h) for h in history)
+    return policy.render(history)
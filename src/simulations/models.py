@@ -1,18 +1,156 @@
 import ast
+import contextlib
+import contextvars
+import copy
+import heapq
+import itertools
 import json
 import math
 import os
 import re
-from collections import deque
-from dataclasses import dataclass, field
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from typing import Optional, Union
 
+import numpy as np
+
+from src.simulations.geometry import GeometryCache, SpatialIndex
+from src.simulations.history import HistoryPolicy, render_history
+from src.simulations.observers import ConsoleObserver
+from src.simulations.replay import DecisionLog, prompt_hash
+from src.simulations.snapshot import TurnSnapshot
 from src.utils.calculate_distance import calc_distance, move_towards_target
-from src.utils.llm import call_chatgpt
+from src.utils.llm import call_chatgpt, llm_context
+
+
+# 武器の種類ごとの静的な定義
+@dataclass(frozen=True)
+class WeaponSpec:
+    """
+    攻撃可能な武器の種類ごとの静的な定義。同じ定義は1つのオブジェクトを全個体で共有する。
+
+    Attributes:
+        name (str): 武器名。
+        range_ (float): 最大射程距離（km）。
+        power (int): 攻撃力。
+        move_distance_per_turn (int): 1ターンで何km輸送できるか
+        cost (int): 武器の製造価格（破壊時に損害として加算）。100万円単位。
+        hp (int): 初期の耐久値。
+        ammo_type (str or None): 必要な弾薬の種類。
+        ammo_per_shot (int): 1発の発射に必要な弾薬数。
+    """
+    name: str
+    range_: float
+    power: int
+    move_distance_per_turn: int
+    cost: int
+    hp: int
+    ammo_type: Optional[str] = None
+    ammo_per_shot: int = 0
+
+    def summary(self) -> dict:
+        """プロンプトや結果出力に使う静的な属性を返す。"""
+        return {
+            "type": "weapon",
+            "range": self.range_,
+            "power": self.power,
+            "ammo_type": self.ammo_type,
+            "ammo_per_shot": self.ammo_per_shot,
+        }
+
+    def instantiate(self) -> "Weapon":
+        return Weapon.from_spec(self)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+@dataclass(frozen=True)
+class JammerSpec:
+    """
+    Jammerの種類ごとの静的な定義。同じ定義は1つのオブジェクトを全個体で共有する。
+
+    Attributes:
+        name (str): 装置の名称。
+        range_ (float): 最大妨害範囲（km単位）。
+        jam_turns (int): 妨害効果の持続ターン数。
+        move_distance_per_turn (int): 1ターンで何km輸送できるか
+        cost (int): 装置のコスト（破壊時の損害として加算）。100万円単位。
+        hp (int): 初期の耐久値。
+    """
+    name: str
+    range_: float
+    jam_turns: int
+    move_distance_per_turn: int
+    cost: int
+    hp: int
+
+    def summary(self) -> dict:
+        """プロンプトや結果出力に使う静的な属性を返す。"""
+        return {
+            "type": "jammer",
+            "range": self.range_,
+            "power": None,
+            "ammo_type": None,
+            "ammo_per_shot": None,
+        }
+
+    def instantiate(self) -> "Jammer":
+        return Jammer.from_spec(self)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+_SPEC_REGISTRY: dict = {}
+
+
+def intern_spec(spec: Union[WeaponSpec, JammerSpec]) -> Union[WeaponSpec, JammerSpec]:
+    """
+    同じ内容の定義がすでにあればそれを返し、なければ登録して返す。
+
+    Args:
+        spec (WeaponSpec or JammerSpec): 武器の定義。
+
+    Returns:
+        WeaponSpec or JammerSpec: 共有される定義オブジェクト。
+    """
+    return _SPEC_REGISTRY.setdefault(spec, spec)
+
+
+def _spec_attribute(attr):
+    return property(lambda self: getattr(self.spec, attr))
 
 
 # 武器クラス
 class Weapon:
+    """
+    攻撃可能な武器の1個体を表すクラス。静的な属性はspecから読み、個体ごとの状態だけを保持する。
+
+    Attributes:
+        spec (WeaponSpec): 武器の種類の定義。
+        hp (int): 耐久値。
+        destroyed (bool): 破壊されているかどうか。
+        jammed_until (int): 妨害が終了するターン数。
+    """
+    __slots__ = ("spec", "hp", "destroyed", "jammed_until")
+
+    name = _spec_attribute("name")
+    range_ = _spec_attribute("range_")
+    power = _spec_attribute("power")
+    move_distance_per_turn = _spec_attribute("move_distance_per_turn")
+    cost = _spec_attribute("cost")
+    ammo_type = _spec_attribute("ammo_type")
+    ammo_per_shot = _spec_attribute("ammo_per_shot")
+
     def __init__(self, name, range_, power, move_distance_per_turn, cost,
                  hp, ammo_type=None, ammo_per_shot=0):
         """
@@ -28,17 +166,30 @@ class Weapon:
             ammo_type (str or None): 必要な弾薬の種類。
             ammo_per_shot (int): 1発の発射に必要な弾薬数。
         """
-        self.name = name
-        self.range_ = range_
-        self.power = power
-        self.move_distance_per_turn = move_distance_per_turn
-        self.cost = cost
+        self.spec = intern_spec(WeaponSpec(name, range_, power, move_distance_per_turn, cost,
+                                           hp, ammo_type, ammo_per_shot))
         self.hp = hp
         self.destroyed = False
-        self.ammo_type = ammo_type
-        self.ammo_per_shot = ammo_per_shot
         self.jammed_until = 0
 
+    @classmethod
+    def from_spec(cls, spec: WeaponSpec) -> "Weapon":
+        """
+        定義から新品の個体を作成する。
+
+        Args:
+            spec (WeaponSpec): 武器の定義。
+
+        Returns:
+            Weapon: 作成された個体。
+        """
+        weapon = cls.__new__(cls)
+        weapon.spec = spec
+        weapon.hp = spec.hp
+        weapon.destroyed = False
+        weapon.jammed_until = 0
+        return weapon
+
     def is_jammed(self, current_turn):
         """
         Jammerによって妨害されているかどうかを判定する。
@@ -113,13 +264,15 @@ class Weapon:
 
 class ExpendableWeapon:
     """
-    消耗品型武器（弾薬）を定義するクラス。
+    消耗品型武器（弾薬）を定義するクラス。個体ごとの状態を持たないため、定義そのものとして共有される。
 
     Attributes:
         name (str): 弾薬の名称。
         cost_per_unit (float): 単位あたりのコスト。100万円単位。
         move_distance_per_turn (int): 1ターンで何km輸送できるか
     """
+    __slots__ = ("name", "cost_per_unit", "move_distance_per_turn")
+
     def __init__(self, name, cost_per_unit, move_distance_per_turn):
         self.name = name
         self.cost_per_unit = cost_per_unit
@@ -128,26 +281,43 @@ class ExpendableWeapon:
 
 class Jammer:
     """
-    複数の武器を一時的に無力化する電子妨害装置を表すクラス。
+    複数の武器を一時的に無力化する電子妨害装置を表すクラス。静的な属性はspecから読む。
 
     Attributes:
-        name (str): 装置の名称。
-        range_ (float): 最大妨害範囲（km単位）。
-        jam_turns (int): 妨害効果の持続ターン数。
-        move_distance_per_turn (int): 1ターンで何km輸送できるか
-        cost (int): 装置のコスト（破壊時の損害として加算）。100万円単位。
+        spec (JammerSpec): 装置の種類の定義。
         hp (int): 耐久値。ゼロ以下で破壊され使用不可になる。
         destroyed (bool): 装置が破壊されているかどうかのフラグ。
     """
+    __slots__ = ("spec", "hp", "destroyed")
+
+    name = _spec_attribute("name")
+    range_ = _spec_attribute("range_")
+    jam_turns = _spec_attribute("jam_turns")
+    move_distance_per_turn = _spec_attribute("move_distance_per_turn")
+    cost = _spec_attribute("cost")
+
     def __init__(self, name, range_, jam_turns, move_distance_per_turn, cost, hp):
-        self.name = name
-        self.range_ = range_
-        self.jam_turns = jam_turns
-        self.move_distance_per_turn = move_distance_per_turn
-        self.cost = cost
+        self.spec = intern_spec(JammerSpec(name, range_, jam_turns, move_distance_per_turn, cost, hp))
         self.hp = hp
         self.destroyed = False
 
+    @classmethod
+    def from_spec(cls, spec: JammerSpec) -> "Jammer":
+        """
+        定義から新品の個体を作成する。
+
+        Args:
+            spec (JammerSpec): 装置の定義。
+
+        Returns:
+            Jammer: 作成された個体。
+        """
+        jammer = cls.__new__(cls)
+        jammer.spec = spec
+        jammer.hp = spec.hp
+        jammer.destroyed = False
+        return jammer
+
     def can_jam(self, distance):
         """
         妨害が可能かどうかを判定する。
@@ -168,18 +338,21 @@ class Jammer:
             targets (list): jammed_until 属性を持つ武器のリスト。
             current_turn (int): 現在のターン数。
 
+        Returns:
+            int: 妨害した数。
+
         Note:
             - 同時妨害数は max_targets に制限される。
             - すでに破壊された場合は実行されない。
         """
         if self.destroyed:
-            return
+            return 0
         count = 0
         for target in targets:
             if hasattr(target, 'jammed_until'):
                 target.jammed_until = max(target.jammed_until, current_turn + self.jam_turns)
-                print(f"{target.name} jammed until turn {target.jammed_until}")
                 count += 1
+        return count
     
     def take_damage(self, damage):
         """
@@ -201,6 +374,625 @@ class Jammer:
         return 0, return_damage
 
 
+class WeaponColumn:
+    """
+    同一種類の武器をNumPy配列で列指向に保持するクラス。
+    静的な属性は共有のspecから読み、可変な状態（hp, destroyed, jammed_until）を配列で管理する。
+
+    Attributes:
+        spec (WeaponSpec or JammerSpec): 武器の種類の定義。
+        hp (np.ndarray): 各個体の耐久値。
+        destroyed (np.ndarray): 各個体が破壊されているかどうか。
+        jammed_until (np.ndarray): 各個体が妨害される終了ターン。
+    """
+    def __init__(self, spec: Union[WeaponSpec, JammerSpec], hp, destroyed=None, jammed_until=None):
+        self.spec = spec
+        self.hp = np.array(hp)
+        size = len(self.hp)
+        self.destroyed = np.zeros(size, dtype=bool) if destroyed is None else np.array(destroyed, dtype=bool)
+        self.jammed_until = np.zeros(size, dtype=np.int64) if jammed_until is None else np.array(jammed_until, dtype=np.int64)
+
+    @classmethod
+    def from_weapons(cls, weapons: list[Union[Weapon, Jammer]]) -> "WeaponColumn":
+        """
+        武器オブジェクトのリストから列を作成する。
+
+        Args:
+            weapons (list): 同一種類の武器のリスト（1つ以上）。
+
+        Returns:
+            WeaponColumn: 作成された列。
+        """
+        return cls(
+            spec=weapons[0].spec,
+            hp=[w.hp for w in weapons],
+            destroyed=[w.destroyed for w in weapons],
+            jammed_until=[getattr(w, "jammed_until", 0) for w in weapons],
+        )
+
+    @classmethod
+    def from_spec(cls, spec: Union[WeaponSpec, JammerSpec], count: int) -> "WeaponColumn":
+        """
+        定義から新品の個体count個の列を、武器オブジェクトを作らずに作成する。
+
+        Args:
+            spec (WeaponSpec or JammerSpec): 武器の定義。
+            count (int): 個体数。
+
+        Returns:
+            WeaponColumn: 作成された列。
+        """
+        return cls(spec, np.full(count, spec.hp))
+
+    @property
+    def name(self):
+        return self.spec.name
+
+    @property
+    def is_jammer(self):
+        return isinstance(self.spec, JammerSpec)
+
+    def __len__(self):
+        return len(self.hp)
+
+    def __getitem__(self, index):
+        """
+        指定位置の個体を武器オブジェクトとして取り出す（読み取り用のコピー）。
+
+        Args:
+            index (int): 個体の位置。
+
+        Returns:
+            Weapon or Jammer: その個体の状態を持つ武器オブジェクト。
+        """
+        weapon = self.spec.instantiate()
+        weapon.hp = self.hp[index].item()
+        weapon.destroyed = bool(self.destroyed[index])
+        if not self.is_jammer:
+            weapon.jammed_until = int(self.jammed_until[index])
+        return weapon
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def active_count(self) -> int:
+        return int(len(self) - np.count_nonzero(self.destroyed))
+
+    def destroyed_count(self) -> int:
+        return int(np.count_nonzero(self.destroyed))
+
+    def live_indices(self, count: int) -> np.ndarray:
+        """破壊されていない個体の位置を先頭からcount個返す。"""
+        return np.flatnonzero(~self.destroyed)[:max(count, 0)]
+
+    def fire(self, owner, count: int, distance: float, current_turn: int) -> int:
+        """
+        先頭からcount個の稼働中の個体で攻撃し、弾薬を消費して合計攻撃力を返す。
+
+        Args:
+            owner (Fortress or EnemyUnit): 弾薬を消費する保有者。
+            count (int): 使う個体の数。
+            distance (float): 攻撃対象までの距離（km）。
+            current_turn (int): 現在のターン数。
+
+        Returns:
+            int: 合計攻撃力。
+        """
+        weapon = self.spec
+        if distance > weapon.range_:
+            return 0
+        usable = self.live_indices(count)
+        ready = int(np.count_nonzero(self.jammed_until[usable] <= current_turn))
+        if weapon.ammo_per_shot > 0:
+            ready = min(ready, owner.ammo_stock.get(weapon.ammo_type, 0) // weapon.ammo_per_shot)
+        if ready <= 0:
+            return 0
+        owner.use_ammo(weapon.ammo_type, weapon.ammo_per_shot * ready)
+        return weapon.power * ready
+
+    def take_damage(self, damage) -> tuple[int, int]:
+        """
+        稼働中の個体に先頭から順にダメージを与え、余剰分を次の個体へ繰り越す。
+
+        Args:
+            damage (int): 与えるダメージの合計。
+
+        Returns:
+            tuple[int, int]: (破壊された数, 破壊によるコストの合計)
+        """
+        if damage <= 0:
+            return 0, 0
+        live = np.flatnonzero(~self.destroyed)
+        if not live.size:
+            return 0, 0
+        hp = self.hp[live]
+        absorbed_before = np.cumsum(hp) - hp
+        reached = absorbed_before < damage
+        self.hp[live] = hp - np.clip(damage - absorbed_before, 0, hp)
+        killed = live[reached & (self.hp[live] <= 0)]
+        self.destroyed[killed] = True
+        return int(killed.size), int(killed.size) * self.spec.cost
+
+    def jam(self, count: int, current_turn: int, jam_turns: int) -> int:
+        """
+        妨害されていない稼働中の個体を先頭からcount個妨害する。
+
+        Args:
+            count (int): 妨害する個体の数。
+            current_turn (int): 現在のターン数。
+            jam_turns (int): 妨害効果の持続ターン数。
+
+        Returns:
+            int: 妨害した個体の数。
+        """
+        targets = np.flatnonzero(~self.destroyed & (self.jammed_until <= current_turn))[:max(count, 0)]
+        self.jammed_until[targets] = np.maximum(self.jammed_until[targets], current_turn + jam_turns)
+        return int(targets.size)
+
+    def take(self, count: int) -> list[Union[Weapon, Jammer]]:
+        """
+        稼働中の個体を先頭からcount個取り出し、列から削除する。
+
+        Args:
+            count (int): 取り出す数。
+
+        Returns:
+            list: 取り出した武器オブジェクトのリスト。
+        """
+        indices = self.live_indices(count)
+        taken = [self[i] for i in indices]
+        keep = np.ones(len(self), dtype=bool)
+        keep[indices] = False
+        self.hp = self.hp[keep]
+        self.destroyed = self.destroyed[keep]
+        self.jammed_until = self.jammed_until[keep]
+        return taken
+
+    def copy(self) -> "WeaponColumn":
+        # np.array は配列を複製する
+        return WeaponColumn(self.spec, self.hp, self.destroyed, self.jammed_until)
+
+    def append(self, weapon: Union[Weapon, Jammer]):
+        """武器オブジェクトを列の末尾に追加する。"""
+        self.hp = np.append(self.hp, weapon.hp)
+        self.destroyed = np.append(self.destroyed, weapon.destroyed)
+        self.jammed_until = np.append(self.jammed_until, getattr(weapon, "jammed_until", 0))
+
+
+class WeaponStock(dict):
+    """
+    武器名から武器のタプルへの辞書として武器在庫を保持するクラス。
+    種類ごとの稼働数と全体の稼働数を、ダメージ・送付・受領のたびに更新し続ける。
+    辞書を書き換える操作（代入・削除・update・setdefault・pop・popitem・clear・|=）はすべて稼働数を更新する。
+    種類ごとの武器はタプルで持ち、在庫を通さずに並びを書き換えられないようにする。
+    fork で複製した在庫とは武器を共有し、ある種類を書き換えるときに初めてその種類だけを複製する（コピーオンライト）。
+
+    Attributes:
+        total_active (int): 破壊されていない武器の総数。
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__({name: self._freeze(ws) for name, ws in dict(*args, **kwargs).items()})
+        self._active = {name: self._count_active(ws) for name, ws in self.items()}
+        self.total_active = sum(self._active.values())
+        # 他の在庫と共有している種類の名前
+        self._shared = set()
+
+    @staticmethod
+    def _freeze(weapons):
+        return tuple(weapons)
+
+    @staticmethod
+    def _count_active(weapons) -> int:
+        return sum(1 for w in weapons if not w.destroyed)
+
+    def __setitem__(self, name, weapons):
+        weapons = self._freeze(weapons)
+        self._adjust(name, self._count_active(weapons) - self._active.get(name, 0))
+        self._shared.discard(name)
+        super().__setitem__(name, weapons)
+
+    def __delitem__(self, name):
+        super().__delitem__(name)
+        self.total_active -= self._active.pop(name, 0)
+        self._shared.discard(name)
+
+    def update(self, *args, **kwargs):
+        for name, weapons in dict(*args, **kwargs).items():
+            self[name] = weapons
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, name, default=()):
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def pop(self, name, *default):
+        if name not in self:
+            if default:
+                return default[0]
+            raise KeyError(name)
+        weapons = self[name]
+        del self[name]
+        return weapons
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        name = next(reversed(self))
+        return name, self.pop(name)
+
+    def clear(self):
+        super().clear()
+        self._active.clear()
+        self.total_active = 0
+        self._shared.clear()
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def _adjust(self, name, delta):
+        self._active[name] = self._active.get(name, 0) + delta
+        self.total_active += delta
+
+    def fork(self) -> "WeaponStock":
+        """
+        武器を複製せずに在庫を複製する。どちらの在庫も、共有している種類を書き換える前にその種類だけを複製する。
+
+        Returns:
+            WeaponStock: 同じ状態の在庫。
+        """
+        clone = self.__class__.__new__(self.__class__)
+        dict.update(clone, self)
+        clone._active = dict(self._active)
+        clone.total_active = self.total_active
+        clone._shared = set(self)
+        self._shared.update(self)
+        return clone
+
+    def _own(self, name):
+        """共有している種類を、この在庫専用の複製に置き換える。"""
+        if name in self._shared:
+            self._shared.discard(name)
+            dict.__setitem__(self, name, self._copy_weapons(dict.__getitem__(self, name)))
+
+    @staticmethod
+    def _copy_weapons(weapons):
+        return tuple(copy.copy(w) for w in weapons)
+
+    def active_count(self, name: Optional[str] = None) -> int:
+        """
+        破壊されていない武器の数を返す。
+
+        Args:
+            name (str or None): 武器名。Noneなら全種類の合計。
+
+        Returns:
+            int: 稼働数。
+        """
+        if name is None:
+            return self.total_active
+        return self._active.get(name, 0)
+
+    def destroyed_count(self, name: str) -> int:
+        return len(self.get(name, ())) - self.active_count(name)
+
+    def spec(self, name: str) -> Union[WeaponSpec, JammerSpec]:
+        return self[name][0].spec
+
+    def is_jammer(self, name: str) -> bool:
+        return isinstance(self.spec(name), JammerSpec)
+
+    def describe(self, name: str, distance: float) -> dict:
+        """
+        同一種類の武器の在庫状況をプロンプト用の辞書にまとめる。
+
+        Args:
+            name (str): 武器名。
+            distance (float): 相手までの距離（km）。
+
+        Returns:
+            dict: 在庫数、静的な属性、射程内かどうか。
+        """
+        spec = self.spec(name)
+        summary = spec.summary()
+        total = len(self[name])
+        active = self.active_count(name)
+        return {
+            "total": total,
+            "active": active,
+            "destroyed": total - active,
+            "type": summary["type"],
+            "range": summary["range"],
+            "power": summary["power"],
+            "hp": self._first_hp(name),
+            "ammo_type": summary["ammo_type"],
+            "ammo_per_shot": summary["ammo_per_shot"],
+            "in_range": active > 0 and distance <= spec.range_,
+        }
+
+    def _first_hp(self, name):
+        return self[name][0].hp
+
+    def fire(self, owner, name: str, count: int, distance: float, current_turn: int) -> int:
+        """
+        武器を先頭からcount個使って攻撃し、弾薬を消費して合計攻撃力を返す。
+
+        Args:
+            owner (Fortress or EnemyUnit): 弾薬を消費する保有者。
+            name (str): 使う武器の名前。
+            count (int): 使う武器の数。
+            distance (float): 攻撃対象までの距離（km）。
+            current_turn (int): 現在のターン数。
+
+        Returns:
+            int: 合計攻撃力。
+        """
+        total_power = 0
+        for weapon in [w for w in self.get(name, []) if not w.destroyed][:count]:
+            ammo_type = weapon.ammo_type
+            ammo_per_shot = weapon.ammo_per_shot
+            if owner.ammo_stock.get(ammo_type, 0) < ammo_per_shot:
+                continue
+            if weapon.can_attack(distance, current_turn):
+                owner.use_ammo(ammo_type, ammo_per_shot)
+                total_power += weapon.attack()
+        return total_power
+
+    def usable_jammers(self, name: str, count: int, distance: float) -> int:
+        """先頭からcount個の稼働中のJammerのうち、距離内で妨害できる数を返す。"""
+        return sum(1 for j in [j for j in self.get(name, []) if not j.destroyed][:count] if j.can_jam(distance))
+
+    def jam(self, name: str, count: int, current_turn: int, jam_turns: int) -> int:
+        """
+        妨害されていない稼働中の武器を先頭からcount個妨害する。
+
+        Args:
+            name (str): 妨害対象の武器の名前。
+            count (int): 妨害する数。
+            current_turn (int): 現在のターン数。
+            jam_turns (int): 妨害効果の持続ターン数。
+
+        Returns:
+            int: 妨害した数。
+        """
+        jammed = 0
+        self._own(name)
+        for weapon in self.get(name, []):
+            if jammed >= count:
+                break
+            if not hasattr(weapon, "jammed_until") or weapon.destroyed or weapon.is_jammed(current_turn):
+                continue
+            weapon.jammed_until = max(weapon.jammed_until, current_turn + jam_turns)
+            jammed += 1
+        return jammed
+
+    def take_damage(self, name: str, damage: int) -> tuple[int, int]:
+        """
+        nameの武器に先頭から順にダメージを与え、余剰分を次の武器へ繰り越す。
+
+        Args:
+            name (str): 標的とする武器の名前。
+            damage (int): 与えるダメージの合計。
+
+        Returns:
+            tuple[int, int]: (破壊された数, 破壊によるコストの合計)
+        """
+        destroyed = 0
+        total_cost = 0
+        if damage > 0:
+            self._own(name)
+        for weapon in self.get(name, []):
+            if damage <= 0:
+                break
+            if weapon.destroyed:
+                continue
+            cost, return_damage = weapon.take_damage(damage)
+            if weapon.destroyed:
+                destroyed += 1
+                total_cost += cost
+            damage = max(0, damage - return_damage)
+        self._adjust(name, -destroyed)
+        return destroyed, total_cost
+
+    def take(self, name: str, count: int) -> list[Union[Weapon, Jammer]]:
+        """
+        稼働中の武器を先頭からcount個取り出し、在庫から削除する。空になった種類はキーごと削除する。
+
+        Args:
+            name (str): 取り出す武器の名前。
+            count (int): 取り出す数。
+
+        Returns:
+            list: 取り出した武器オブジェクトのリスト。
+        """
+        if name not in self:
+            return []
+        self._own(name)
+        weapons = self[name]
+        taken = [w for w in weapons if not w.destroyed][:count]
+        taken_ids = {id(w) for w in taken}
+        remaining = tuple(w for w in weapons if id(w) not in taken_ids)
+        self._adjust(name, -len(taken))
+        if remaining:
+            super().__setitem__(name, remaining)
+        else:
+            del self[name]
+        return taken
+
+    def receive(self, weapon: Union[Weapon, Jammer]):
+        """武器を受け取り、該当する種類に追加する。"""
+        if weapon.name not in self:
+            self[weapon.name] = [weapon]
+            return
+        self._own(weapon.name)
+        super().__setitem__(weapon.name, self[weapon.name] + (weapon,))
+        if not weapon.destroyed:
+            self._adjust(weapon.name, 1)
+
+
+class ColumnarStock(WeaponStock):
+    """
+    武器名からWeaponColumnへの辞書として武器在庫を保持するクラス。
+    dict[str, list[Weapon]] の代わりにFortressやEnemyUnitのweapon_stockとして使える。
+    """
+    @classmethod
+    def from_weapon_stock(cls, weapon_stock: dict[str, list[Union[Weapon, Jammer]]]) -> "ColumnarStock":
+        """
+        dict[str, list[Weapon]] 形式の在庫から列指向の在庫を作成する。
+
+        Args:
+            weapon_stock (dict): 武器名から武器リストへの辞書。
+
+        Returns:
+            ColumnarStock: 列指向の在庫。
+        """
+        return cls({name: WeaponColumn.from_weapons(list(ws)) for name, ws in weapon_stock.items() if ws})
+
+    @classmethod
+    def from_layout(cls, weapons) -> "ColumnarStock":
+        """
+        (武器の定義, 個数) の並びから新品の在庫を作成する。個体ごとの武器オブジェクトは作らない。
+
+        Args:
+            weapons (iterable): (WeaponSpec または JammerSpec, 個数) のタプルの並び。
+
+        Returns:
+            ColumnarStock: 列指向の在庫。
+        """
+        return cls({spec.name: WeaponColumn.from_spec(spec, count) for spec, count in weapons if count})
+
+    @staticmethod
+    def _freeze(weapons):
+        return weapons
+
+    @staticmethod
+    def _count_active(weapons) -> int:
+        return weapons.active_count()
+
+    @staticmethod
+    def _copy_weapons(weapons):
+        return weapons.copy()
+
+    def spec(self, name: str) -> Union[WeaponSpec, JammerSpec]:
+        return self[name].spec
+
+    def _first_hp(self, name):
+        return self[name].hp[0].item()
+
+    def fire(self, owner, name: str, count: int, distance: float, current_turn: int) -> int:
+        if name not in self:
+            return 0
+        return self[name].fire(owner, count, distance, current_turn)
+
+    def usable_jammers(self, name: str, count: int, distance: float) -> int:
+        if name not in self or distance > self[name].spec.range_:
+            return 0
+        return len(self[name].live_indices(count))
+
+    def jam(self, name: str, count: int, current_turn: int, jam_turns: int) -> int:
+        if name not in self or self.is_jammer(name):
+            return 0
+        self._own(name)
+        return self[name].jam(count, current_turn, jam_turns)
+
+    def take_damage(self, name: str, damage: int) -> tuple[int, int]:
+        if name not in self:
+            return 0, 0
+        if damage > 0:
+            self._own(name)
+        destroyed, cost = self[name].take_damage(damage)
+        self._adjust(name, -destroyed)
+        return destroyed, cost
+
+    def take(self, name: str, count: int) -> list[Union[Weapon, Jammer]]:
+        if name not in self:
+            return []
+        self._own(name)
+        taken = self[name].take(count)
+        self._adjust(name, -len(taken))
+        if not len(self[name]):
+            del self[name]
+        return taken
+
+    def receive(self, weapon: Union[Weapon, Jammer]):
+        if weapon.name not in self:
+            self[weapon.name] = WeaponColumn.from_weapons([weapon])
+            return
+        self._own(weapon.name)
+        self[weapon.name].append(weapon)
+        if not weapon.destroyed:
+            self._adjust(weapon.name, 1)
+
+
+def as_weapon_stock(weapon_stock: dict) -> WeaponStock:
+    """dict[str, list[Weapon]] をWeaponStockに変換する。すでにWeaponStockならそのまま返す。"""
+    if isinstance(weapon_stock, WeaponStock):
+        return weapon_stock
+    return WeaponStock(weapon_stock)
+
+
+def resolve_attack_plan(attacker, defender, attack_plan: list[tuple[str, str, int]], distance: float,
+                        current_turn: int, can_fire: bool = True, notify=None) -> list[tuple[str, str, int]]:
+    """
+    攻撃計画を解決するダメージ処理エンジン。
+    標的の種類を名前で直接引き、同じ種類を狙う項目の攻撃力を1つの斉射にまとめて、
+    余剰ダメージの繰り越しを種類ごとに1回で適用する。
+    Jammerによる妨害は計画の順序どおりに扱い、妨害の前にそれまでの同じ標的への斉射を適用する。
+
+    Args:
+        attacker (Fortress or EnemyUnit): 攻撃する側。
+        defender (Fortress or EnemyUnit): 攻撃される側。
+        attack_plan (list): 攻撃計画（ターゲット, 自分が使う武器名, 数量）。
+        distance (float): 相手までの距離（km）。
+        current_turn (int): 現在のターン数。
+        can_fire (bool): Falseなら通常武器は発射しない（妨害のみ行う）。
+        notify (callable or None): Simulation.notify。妨害したときに on_jam イベントを送る。
+
+    Returns:
+        list[tuple[str, str, int]]: ("jam", 使ったJammerの名前, 0) または ("attack", 標的の名前, 破壊数) のリスト。
+    """
+    stock = attacker.weapon_stock
+    target_stock = defender.weapon_stock
+    events = []
+    volleys = {}
+
+    def apply_volley(target_name):
+        power, event_index = volleys.pop(target_name)
+        destroyed, cost = target_stock.take_damage(target_name, power)
+        defender.take_weapon_loss(cost)
+        events[event_index] = ("attack", target_name, destroyed)
+
+    for target_name, my_weapon_name, count in attack_plan:
+        if not stock.active_count(my_weapon_name):
+            continue
+
+        if stock.is_jammer(my_weapon_name):
+            if target_name in volleys:
+                apply_volley(target_name)
+            n_jammers = stock.usable_jammers(my_weapon_name, count, distance)
+            if n_jammers:
+                jam_turns = stock.spec(my_weapon_name).jam_turns
+                jammed = target_stock.jam(target_name, count * n_jammers, current_turn, jam_turns)
+                if jammed and notify is not None:
+                    notify("on_jam", attacker, defender, target_name, jammed, current_turn + jam_turns)
+            events.append(("jam", my_weapon_name, 0))
+        else:
+            power = stock.fire(attacker, my_weapon_name, count, distance, current_turn) if can_fire else 0
+            if target_name in volleys:
+                volleys[target_name] = (volleys[target_name][0] + power, volleys[target_name][1])
+            else:
+                volleys[target_name] = (power, len(events))
+                events.append(None)
+
+    for target_name in list(volleys):
+        apply_volley(target_name)
+    return events
+
+
 class Fortress:
     """
     防衛基地を表すクラス。人員、武器、弾薬の在庫と管理を行う。
@@ -219,10 +1011,11 @@ class Fortress:
         self.name = name
         self.latitude = latitude
         self.longitude = longitude
-        self.weapon_stock = weapon_stock
+        self.weapon_stock = as_weapon_stock(weapon_stock)
         self.ammo_stock = ammo_stock
         self.ammo_defs = ammo_defs
         self.current_cost = 0
+        self.geometry = None
 
     def distance_to(self, obj):
         """
@@ -234,6 +1027,8 @@ class Fortress:
         Returns:
             float: 距離（km）。
         """
+        if self.geometry is not None:
+            return self.geometry.distance(self, obj)
         return calc_distance(self.latitude, self.longitude, obj.latitude, obj.longitude)
     
     def take_weapon_loss(self, cost):
@@ -275,18 +1070,7 @@ class Fortress:
         Returns:
             list: 取り出した武器オブジェクトのリスト。
         """
-        if weapon_name not in self.weapon_stock:
-            return []
-
-        available = [w for w in self.weapon_stock[weapon_name] if not w.destroyed][:count]
-        for w in available:
-            self.weapon_stock[weapon_name].remove(w)
-
-        # もし在庫が空になったらキーごと削除しても良い（任意）
-        if not self.weapon_stock[weapon_name]:
-            del self.weapon_stock[weapon_name]
-
-        return available
+        return self.weapon_stock.take(weapon_name, count)
 
     def receive_weapon(self, weapon: Weapon):
         """
@@ -295,68 +1079,56 @@ class Fortress:
         Args:
             weapon (Weapon): 移送された武器。
         """
-        if weapon.name not in self.weapon_stock:
-            self.weapon_stock[weapon.name] = []
-        self.weapon_stock[weapon.name].append(weapon)
+        self.weapon_stock.receive(weapon)
         return f"{self.name} received weapon: {weapon.name}"
 
-    def defend(self, enemy_unit, attack_plan: list[tuple[str, str, int]], current_turn: int):
+    def send_ammo(self, ammo_type: str, amount: int) -> int:
+        """
+        指定された弾薬を送付用に取り出し、在庫から減らす。在庫が足りない場合はある分だけ取り出す。
+
+        Args:
+            ammo_type (str): 送る弾薬の種類。
+            amount (int): 数量。
+
+        Returns:
+            int: 取り出した数量。
+        """
+        taken = max(0, min(amount, self.ammo_stock.get(ammo_type, 0)))
+        if taken:
+            self.ammo_stock[ammo_type] -= taken
+        return taken
+
+    def receive_ammo(self, ammo_def: ExpendableWeapon, amount: int):
+        """
+        弾薬を受け取って在庫に追加する。
+
+        Args:
+            ammo_def (ExpendableWeapon): 弾薬の定義。
+            amount (int): 数量。
+        """
+        self.ammo_defs.setdefault(ammo_def.name, ammo_def)
+        self.ammo_stock[ammo_def.name] = self.ammo_stock.get(ammo_def.name, 0) + amount
+        return f"{self.name} received ammo: {ammo_def.name} x {amount}"
+
+    def defend(self, enemy_unit, attack_plan: list[tuple[str, str, int]], current_turn: int, notify=None):
         """
         敵に対する防衛行動を実施。
 
         Args:
             enemy_unit : 敵ユニット
             attack_plan (list): 攻撃計画（ターゲット, 武器名, その武器をいくつ分使うか）。
+            notify (callable or None): 妨害などのイベントを送る Simulation.notify。
         """
         result = ""
-        for target_name, my_weapon_name, count in attack_plan:
-            usable = [w for w in self.weapon_stock.get(my_weapon_name, []) if not w.destroyed][:count]
-            if not usable:
-                continue
-
-            total_power = 0
-
-            is_jammer = isinstance(usable[0], Jammer)
-
-            if is_jammer:
+        events = resolve_attack_plan(self, enemy_unit, attack_plan, self.distance_to(enemy_unit), current_turn,
+                                     can_fire=not enemy_unit.retreating, notify=notify)
+        for kind, name, destroyed in events:
+            if kind == "jam":
                 # Jammerによる妨害
-                dist = self.distance_to(enemy_unit)
-                for jammer in usable:
-                    if jammer.can_jam(dist):
-                        all_enemy_weapons = []
-                        remaining = count
-                        for ws in enemy_unit.weapon_stock.get(target_name, []):
-                            if not ws.is_jammed(current_turn) and not ws.destroyed:
-                                all_enemy_weapons.append(ws)
-                                remaining -= 1
-                                if remaining <= 0:
-                                    break
-                        jammer.jam(all_enemy_weapons, current_turn)
-                result += f"{self.name} jammed enemy weapons using {my_weapon_name}\n"
+                result += f"{self.name} jammed enemy weapons using {name}\n"
             else:
                 # 通常武器による攻撃
-                for weapon in usable:
-                    ammo_type = weapon.ammo_type
-                    ammo_per_shot = weapon.ammo_per_shot
-                    if self.ammo_stock.get(ammo_type, 0) < ammo_per_shot:
-                        continue
-                    if not enemy_unit.retreating and weapon.can_attack(self.distance_to(enemy_unit), current_turn):
-                        self.use_ammo(ammo_type, ammo_per_shot)
-                        power = weapon.attack()
-                        total_power += power
-
-                destroyed = 0
-                for weapons in enemy_unit.weapon_stock.values():
-                    for ew in weapons:
-                        if ew.name == target_name and not ew.destroyed:
-                            cost, return_damage = ew.take_damage(total_power)
-                            if ew.destroyed:
-                                destroyed += 1
-                                enemy_unit.take_weapon_loss(cost)
-                            total_power = max(0, total_power - return_damage)
-                            if total_power <= 0:
-                                break
-                result += f"{self.name} attacked {target_name}, destroyed {destroyed}\n"
+                result += f"{self.name} attacked {name}, destroyed {destroyed}\n"
         return result
 
 
@@ -384,13 +1156,14 @@ class EnemyUnit:
         self.target_base = target_base
         self.latitude = latitude
         self.longitude = longitude
-        self.weapon_stock = weapon_stock
+        self.weapon_stock = as_weapon_stock(weapon_stock)
         self.ammo_stock = ammo_stock
         self.ammo_defs = ammo_defs
         self.current_cost = 0
         self.speed = speed
         self.retreat_cost_threshold = retreat_cost_threshold
         self.retreating = False
+        self.geometry = None
 
     def move_toward_target(self):
         """拠点に向かって移動（1ターン分）。"""
@@ -399,6 +1172,8 @@ class EnemyUnit:
         latitude_before = self.latitude
         longitude_before = self.longitude
         self.latitude, self.longitude = move_towards_target(self.latitude, self.longitude, self.target_base.latitude, self.target_base.longitude, self.speed)
+        if self.geometry is not None and (self.latitude, self.longitude) != (latitude_before, longitude_before):
+            self.geometry.invalidate(self)
         return f"moved from {latitude_before},{longitude_before} to {self.latitude},{self.longitude}"
 
     def check_retreat(self):
@@ -417,6 +1192,8 @@ class EnemyUnit:
         Returns:
             float: 距離（km）。
         """
+        if self.geometry is not None:
+            return self.geometry.distance(self, obj)
         return calc_distance(self.latitude, self.longitude, obj.latitude, obj.longitude)
     
     def use_ammo(self, ammo_type: str, amount: int):
@@ -462,80 +1239,37 @@ class EnemyUnit:
 
         distance = self.distance_to(self.target_base)
 
-        for weapon_name, weapons in self.weapon_stock.items():
-            if not weapons or all(w.destroyed for w in weapons):
+        for weapon_name in self.weapon_stock:
+            if not self.weapon_stock.active_count(weapon_name):
                 continue  # 全滅または未装備
 
-            weapon = weapons[0]
-            if isinstance(weapon, Jammer):
-                # Jammer は範囲内に届けば "妨害可能" と判定
-                if weapon.can_jam(distance):
-                    return True
-            else:
-                if weapon.can_attack(distance, current_turn=current_turn):
-                    return True
+            # Jammer は範囲内に届けば "妨害可能"、Weapon は射程内なら攻撃可能と判定
+            if distance <= self.weapon_stock.spec(weapon_name).range_:
+                return True
 
         return False
     
-    def attack(self, attack_plan: list[tuple[str, str, int]], current_turn: int):
+    def attack(self, attack_plan: list[tuple[str, str, int]], current_turn: int, notify=None):
         """
         拠点に対して攻撃を行う。
 
         Args:
             attack_plan (list): 攻撃計画（ターゲットの武器, 自分が使う武器名, 数量）。
             current_turn: 現在何ターン目か
+            notify (callable or None): 妨害などのイベントを送る Simulation.notify。
         """
         if self.retreating:
-            print("retreating")
             return "retreating"
 
-        dist = calc_distance(self.latitude, self.longitude, self.target_base.latitude, self.target_base.longitude)
-
         result = ""
-        for target_name, my_weapon_name, count in attack_plan:
-            usable = [w for w in self.weapon_stock.get(my_weapon_name, []) if not w.destroyed][:count]
-            if not usable:
-                continue
-
-            is_jammer = isinstance(usable[0], Jammer)
-
-            if is_jammer:
-                for jammer in usable:
-                    if jammer.can_jam(dist):
-                        all_weapons = []
-                        remaining = count
-                        for ws in self.target_base.weapon_stock.get(target_name, []):
-                            if not ws.is_jammed(current_turn) and not ws.destroyed:
-                                all_weapons.append(ws)
-                                remaining -= 1
-                                if remaining <= 0:
-                                    break
-                        jammer.jam(all_weapons, current_turn)
-                result += f"{self.name} jammed {self.target_base.name} weapons using {my_weapon_name}\n"
+        events = resolve_attack_plan(self, self.target_base, attack_plan, self.distance_to(self.target_base), current_turn,
+                                     notify=notify)
+        for kind, name, destroyed in events:
+            if kind == "jam":
+                result += f"{self.name} jammed {self.target_base.name} weapons using {name}\n"
             else:
-                total_power = 0
                 # 通常武器による攻撃
-                for weapon in usable:
-                    ammo_type = weapon.ammo_type
-                    ammo_per_shot = weapon.ammo_per_shot
-                    if self.ammo_stock.get(ammo_type, 0) < ammo_per_shot:
-                        continue
-                    if weapon.can_attack(self.distance_to(self.target_base), current_turn):
-                        self.use_ammo(ammo_type, ammo_per_shot)
-                        power = weapon.attack()
-                        total_power += power
-                destroyed = 0
-                for fw_list in self.target_base.weapon_stock.values():
-                    for fw in fw_list:
-                        if fw.name == target_name and not fw.destroyed:
-                            cost, return_damage = fw.take_damage(total_power)
-                            if fw.destroyed:
-                                destroyed += 1
-                                self.target_base.take_weapon_loss(cost)
-                            total_power = max(0, total_power - return_damage)
-                            if total_power <= 0:
-                                break
-                result += f"{self.name} attacked {target_name} of {self.target_base.name}, destroyed {destroyed}\n"
+                result += f"{self.name} attacked {name} of {self.target_base.name}, destroyed {destroyed}\n"
         return result
 
 
@@ -549,19 +1283,49 @@ class History:
     action: Optional[str] = None
     plan: list = field(default_factory=list)
     result: Optional[str] = None
+    # ターン終了時の累積コスト（古いターンの要約に使う）
+    cost: Optional[int] = None
 
     def __str__(self):
         return f"[Turn {self.turn}] {self.name} | Action: {self.action} | Thought: {self.thought} | Plan: {self.plan} | Result: {self.result}"
 
 
+# 拠点間の輸送単位。1つのtransfer計画の項目が1つの輸送隊になる
+@dataclass
+class Convoy:
+    origin: Fortress
+    destination: Fortress
+    arrival_turn: int
+    weapons: list = field(default_factory=list)
+    ammo: dict = field(default_factory=dict)
+
+    def describe(self) -> str:
+        items = [f"{len(ws)} x {name}" for name, ws in self._weapons_by_name().items()]
+        items += [f"{amount} x {ammo_def.name}" for ammo_def, amount in self.ammo.values()]
+        return ", ".join(items)
+
+    def _weapons_by_name(self) -> dict:
+        by_name = {}
+        for weapon in self.weapons:
+            by_name.setdefault(weapon.name, []).append(weapon)
+        return by_name
+
+
 class EnemyCommander:
-    def __init__(self, my_unit: EnemyUnit, all_fortresses: list[Fortress], goal: str):
+    # プロンプトに入れる履歴の組み立て方。直近のターン以外は要約する
+    history_policy = HistoryPolicy()
+
+    def __init__(self, my_unit: EnemyUnit, all_fortresses: list[Fortress], goal: str,
+                 snapshot: Optional[TurnSnapshot] = None):
         self.unit = my_unit
         self.all_fortresses = all_fortresses
         self.goal = goal
+        # 同じターンの司令官で共有するJSON断片のキャッシュ。単独で使う場合は自分用に作る
+        self.snapshot = snapshot or TurnSnapshot()
 
     def decide_action(self, current_turn: int, history: list[History]):
         prompt = self.build_prompt(current_turn, history)
+        self.prompt_hash = prompt_hash(prompt)
         response = call_chatgpt(messages=[{"role": "user", "content": prompt}])
         result = ast.literal_eval(re.sub(r"^```json\s*|```$", "", response, flags=re.MULTILINE))
 
@@ -571,9 +1335,9 @@ class EnemyCommander:
         return thought, action, plan
 
     def build_prompt(self, current_turn: int, history: list[History]) -> str:
-        unit_info = self.serialize_unit(self.unit)
-        fortresses_info = [self.serialize_fortress(f) for f in self.all_fortresses]
-        history_str = "\n".join(str(h) for h in history)
+        unit_json = self.snapshot.unit_json(self.unit)
+        fortresses_json = self.snapshot.fortresses_json(self.all_fortresses, self.unit)
+        history_str = render_history(history, self.history_policy)
         return f"""
 あなたは敵ユニット「{self.unit.name}」の司令官です。あなたの目的は「{self.goal}」です。
 次の行動として "move_toward_target", "attack", "retreat" のいずれかを選び、必要であれば攻撃計画（ターゲット, 武器名, 数量のリスト）も返してください。
@@ -586,10 +1350,10 @@ attackの使う武器の数量の合計は5までにしてください
 また、jammerはattackで使用しないと効果を発揮しません。持っているだけではダメです。
 
 以下はあなたのユニットの情報です
-{json.dumps(unit_info, indent=2, ensure_ascii=False)}
+{unit_json}
 
 以下は相手の基地の情報です
-{json.dumps(fortresses_info, indent=2, ensure_ascii=False)}
+{fortresses_json}
 
 以下は過去の履歴です（参考）：
 {history_str}
@@ -602,75 +1366,23 @@ attackの使う武器の数量の合計は5までにしてください
 }}
 """
 
-    def serialize_unit(self, unit):
-        distance = unit.distance_to(unit.target_base)
-        return {
-            "name": unit.name,
-            "lat": unit.latitude,
-            "lon": unit.longitude,
-            "retreating": unit.retreating,
-            "current_cost": unit.current_cost,
-            "retreat_cost_threshold": unit.retreat_cost_threshold,
-            "target_base": unit.target_base.name,
-            "speed": unit.speed,
-            "weapons": {
-                name: {
-                    "total": len(ws),
-                    "active": len([w for w in ws if not w.destroyed]),
-                    "destroyed": len([w for w in ws if w.destroyed]),
-                    "type": "jammer" if isinstance(ws[0], Jammer) else "weapon",
-                    "range": ws[0].range_ if hasattr(ws[0], "range_") else None,
-                    "power": ws[0].power if hasattr(ws[0], "power") else None,
-                    "hp": ws[0].hp if hasattr(ws[0], "hp") else None,
-                    "ammo_type": getattr(ws[0], "ammo_type", None),
-                    "ammo_per_shot": getattr(ws[0], "ammo_per_shot", None),
-                    "in_range": (
-                        ws[0].can_jam(distance) if isinstance(ws[0], Jammer)
-                        else ws[0].can_attack(distance, current_turn=0)
-                    ) if ws else False,
-                }
-                for name, ws in unit.weapon_stock.items()
-            }
-        }
-
-    def serialize_fortress(self, fortress: Fortress):
-        distance = fortress.distance_to(self.unit)
-        return {
-            "name": fortress.name,
-            "lat": fortress.latitude,
-            "lon": fortress.longitude,
-            "current_cost": fortress.current_cost,
-            "weapons": {
-                name: {
-                    "total": len(ws),
-                    "active": len([w for w in ws if not w.destroyed]),
-                    "destroyed": len([w for w in ws if w.destroyed]),
-                    "type": "jammer" if isinstance(ws[0], Jammer) else "weapon",
-                    "range": ws[0].range_ if hasattr(ws[0], "range_") else None,
-                    "power": ws[0].power if hasattr(ws[0], "power") else None,
-                    "hp": ws[0].hp if hasattr(ws[0], "hp") else None,
-                    "ammo_type": getattr(ws[0], "ammo_type", None),
-                    "ammo_per_shot": getattr(ws[0], "ammo_per_shot", None),
-                    "in_range": (
-                        ws[0].can_jam(distance) if isinstance(ws[0], Jammer)
-                        else ws[0].can_attack(distance, current_turn=0)
-                    ) if ws else False,
-                }
-                for name, ws in fortress.weapon_stock.items()
-            },
-            "ammo_stock": fortress.ammo_stock,
-        }
-
 
 class FortressCommander:
-    def __init__(self, my_fortress, enemy_unit, all_fortresses, enemy_goal):
+    history_policy = HistoryPolicy()
+
+    def __init__(self, my_fortress, enemy_unit, all_fortresses, enemy_goal, enemy_units=None,
+                 snapshot: Optional[TurnSnapshot] = None):
         self.fortress = my_fortress
         self.all_fortresses = all_fortresses
         self.enemy_unit = enemy_unit
         self.enemy_goal = enemy_goal
+        self.snapshot = snapshot or TurnSnapshot()
+        # 複数ユニットのシミュレーションでは enemy_unit 以外のユニットもプロンプトに含める
+        self.other_enemy_units = [u for u in (enemy_units or []) if u is not enemy_unit]
 
     def decide_action(self, current_turn: int, history: list[str]):
         prompt = self.build_prompt(current_turn, history)
+        self.prompt_hash = prompt_hash(prompt)
         response = call_chatgpt(messages=[{"role": "user", "content": prompt}])
         result = ast.literal_eval(re.sub(r"^```json\s*|```$", "", response, flags=re.MULTILINE))
 
@@ -680,16 +1392,24 @@ class FortressCommander:
         return thought, action, plan
 
     def build_prompt(self, current_turn: int, history: list[History]) -> str:
-        fortress_info = self.serialize_fortress(self.fortress)
-        other_fortresses =  [self.serialize_fortress(f) for f in self.all_fortresses if f != self.fortress]
-        enemy_unit_info = self.serialize_unit(self.enemy_unit)
-        history_str = "\n".join(str(h) for h in history)
+        fortress_json = self.snapshot.fortress_json(self.fortress, self.enemy_unit)
+        other_fortresses_json = self.snapshot.fortresses_json(
+            [f for f in self.all_fortresses if f != self.fortress], self.enemy_unit)
+        enemy_unit_json = self.snapshot.unit_json(self.enemy_unit)
+        history_str = render_history(history, self.history_policy)
+        other_units_str = ""
+        if self.other_enemy_units:
+            other_units_str = f"""
+以下はその他の敵ユニットの情報です
+{self.snapshot.units_json(self.other_enemy_units)}
+敵ユニットが複数いるため、defendのplanのtupleには4番目の要素として標的とする敵ユニットのnameを加えることができます。省略した場合は射程内で最も近いユニットが標的になります。
+"""
         return f"""
 あなたは防衛拠点「{self.fortress.name}」の司令官です。敵国が{self.enemy_goal}という目的の元こちらに侵攻してきています。
 現在の状況から、以下の行動のいずれかを選んでください:
 - "defend": 敵への防衛攻撃（攻撃計画あり）を行う。この時のplanはlist[tuple[str, str, int]]であり、それぞれのtupleは(相手のenemyunitの標的とするWeaponもしくはJammerの名前, こちら側が使うWeaponもしくはJammerの名前, 使う武器の数量)で構成してください。
 defendの武器の数量の合計は5までにしてください
-- "transfer": 敵国が攻撃対象としている基地への武器送付を行う。この時のplanはlist[tuple[str, str, int]]であり、それぞれのtupleは（"武器の送付先のfortressのnameのstr", "送るweaponもしくはjammerのnameのstr", "数量のint") で構成してください。
+- "transfer": 敵国が攻撃対象としている基地への武器送付を行う。この時のplanはlist[tuple[str, str, int]]であり、それぞれのtupleは（"武器の送付先のfortressのnameのstr", "送るweaponもしくはjammerのnameのstr", "数量のint") で構成してください。ammo_stockにある弾薬の名前を指定すると弾薬を送ることもできます。
 - "idle": 行動しない
 なお、あなたは基本的には相手が攻撃するまでWeaponによる軍事行動は行いませんが、Jammerによる妨害行動や攻撃に備えたtransferは可能です。
 具体的には、過去の履歴の履歴の中にattackというactionがあればあなたはdefendを行うことが可能です。
@@ -700,13 +1420,13 @@ defendの武器の数量の合計は5までにしてください
 また、jammerはdefendで使用しないと効果を発揮しません。持っているだけではダメです。
 
 以下はあなたの基地の情報です
-{json.dumps(fortress_info, indent=2, ensure_ascii=False)}
+{fortress_json}
 
 以下は相手のユニットの情報です
-{json.dumps(enemy_unit_info, indent=2, ensure_ascii=False)}
-
+{enemy_unit_json}
+{other_units_str}
 以下はあなた以外の基地の情報です
-{json.dumps(other_fortresses, indent=2, ensure_ascii=False)}
+{other_fortresses_json}
 
 以下は過去の履歴です（参考）：
 {history_str}
@@ -719,141 +1439,177 @@ defendの武器の数量の合計は5までにしてください
 }}
 """
 
-    def serialize_unit(self, unit):
-        distance = unit.distance_to(unit.target_base)
-        return {
-            "name": unit.name,
-            "lat": unit.latitude,
-            "lon": unit.longitude,
-            "retreating": unit.retreating,
-            "current_cost": unit.current_cost,
-            "retreat_cost_threshold": unit.retreat_cost_threshold,
-            "target_base": unit.target_base.name,
-            "speed": unit.speed,
-            "weapons": {
-                name: {
-                    "total": len(ws),
-                    "active": len([w for w in ws if not w.destroyed]),
-                    "destroyed": len([w for w in ws if w.destroyed]),
-                    "type": "jammer" if isinstance(ws[0], Jammer) else "weapon",
-                    "range": ws[0].range_ if hasattr(ws[0], "range_") else None,
-                    "power": ws[0].power if hasattr(ws[0], "power") else None,
-                    "hp": ws[0].hp if hasattr(ws[0], "hp") else None,
-                    "ammo_type": getattr(ws[0], "ammo_type", None),
-                    "ammo_per_shot": getattr(ws[0], "ammo_per_shot", None),
-                    "in_range": (
-                        ws[0].can_jam(distance) if isinstance(ws[0], Jammer)
-                        else ws[0].can_attack(distance, current_turn=0)
-                    ) if ws else False,
-                }
-                for name, ws in unit.weapon_stock.items()
-            }
-        }
-
-    def serialize_fortress(self, fortress):
-        distance = fortress.distance_to(self.enemy_unit)
-        return {
-            "name": fortress.name,
-            "lat": fortress.latitude,
-            "lon": fortress.longitude,
-            "current_cost": fortress.current_cost,
-            "weapons": {
-                name: {
-                    "total": len(ws),
-                    "active": len([w for w in ws if not w.destroyed]),
-                    "destroyed": len([w for w in ws if w.destroyed]),
-                    "type": "jammer" if isinstance(ws[0], Jammer) else "weapon",
-                    "range": ws[0].range_ if hasattr(ws[0], "range_") else None,
-                    "power": ws[0].power if hasattr(ws[0], "power") else None,
-                    "hp": ws[0].hp if hasattr(ws[0], "hp") else None,
-                    "ammo_type": getattr(ws[0], "ammo_type", None),
-                    "ammo_per_shot": getattr(ws[0], "ammo_per_shot", None),
-                    "in_range": (
-                        ws[0].can_jam(distance) if isinstance(ws[0], Jammer)
-                        else ws[0].can_attack(distance, current_turn=0)
-                    ) if ws else False,
-                }
-                for name, ws in fortress.weapon_stock.items()
-            },
-            "ammo_stock": fortress.ammo_stock,
-        }
-
 
 class Simulation:
-    def __init__(self, fortresses: list[Fortress], enemy_unit: EnemyUnit, enemy_scenario: dict, max_turns: int = 10):
+    def __init__(self, fortresses: list[Fortress], enemy_unit: Optional[EnemyUnit] = None, enemy_scenario: dict = None,
+                 max_turns: int = 10, enemy_units: Optional[list[EnemyUnit]] = None,
+                 fortress_commander_cls=None, enemy_commander_cls=None,
+                 concurrent_decisions: bool = False, max_decision_workers: Optional[int] = None,
+                 observers: Optional[list] = None):
         """
         要塞 vs 敵ユニットのシミュレーションを管理するクラス。
+        enemy_unitsに複数の敵ユニットを渡すと、全拠点に対する複数ユニットの同時侵攻を扱う。
+        fortress_commander_cls / enemy_commander_cls に同じ引数（snapshot を含む）と decide_action を持つクラス
+        （例: src.simulations.policies のルールベース司令官）を渡すと、LLMの司令官の代わりに使う。
+        concurrent_decisions=True の場合、全拠点の司令官がターン開始時点の同じ履歴をもとにスレッドプールで同時に判断し、
+        その行動を拠点の並び順に適用する（同じターンの他拠点の行動は判断材料に入らない）。
 
         Attributes:
             turn (int): 現在のターン数
             fortresses (list): 要塞のリスト。
-            enemy: 敵ユニットのリスト。
-            weapon_transfer_queue (deque): 武器移送キュー。
+            enemy_units (list): 敵ユニットのリスト。
+            enemy_unit: 先頭の敵ユニット（単一ユニットのシミュレーション用）。
+            weapon_transfer_queue (list): 到着ターンをキーとする輸送隊（Convoy）のヒープ。
+            geometry (GeometryCache): 拠点・ユニット間の距離のメモ。
+            unit_index (SpatialIndex): 敵ユニットの空間索引。毎ターン作り直す。
+            fortress_commander_cls: 拠点の司令官のクラス。
+            enemy_commander_cls: 敵ユニットの司令官のクラス。
+            concurrent_decisions (bool): 拠点の司令官の判断を同時に行うかどうか。
+            max_decision_workers (int or None): 同時に判断するスレッド数の上限。Noneなら拠点数。
+            snapshot (TurnSnapshot): 今ターンの司令官で共有する拠点・ユニットのJSON断片。状態を変える行動のたびに該当部分を捨てる。
+            observers (list): 進行のフック（src.simulations.observers.SimulationObserver）。Noneなら経過を表示する ConsoleObserver のみ。
+            phase_ns (dict): 現在のターンのフェーズごとの所要時間（ナノ秒）。
+            decision_log (DecisionLog): 司令官の判断とプロンプトのハッシュの記録。export_results で保存され、再生に使える。
         """
         self.turn = 0
         self.max_turns = max_turns
         self.fortresses = fortresses
-        self.enemy_unit = enemy_unit
+        self.enemy_units = list(enemy_units) if enemy_units else [enemy_unit]
+        self.enemy_unit = self.enemy_units[0]
         self.enemy_scenario = enemy_scenario
-        self.weapon_transfer_queue = deque()
+        self.weapon_transfer_queue = []
+        self._transfer_seq = itertools.count()
         self.history = []
+        self.geometry = GeometryCache(fortresses)
+        for entity in [*fortresses, *self.enemy_units]:
+            entity.geometry = self.geometry
+        self.unit_index = SpatialIndex(self.enemy_units)
+        self.fortress_commander_cls = fortress_commander_cls or FortressCommander
+        self.enemy_commander_cls = enemy_commander_cls or EnemyCommander
+        self.concurrent_decisions = concurrent_decisions
+        self.max_decision_workers = max_decision_workers
+        self.decision_log = DecisionLog()
+        self.snapshot = TurnSnapshot()
+        self.observers = [ConsoleObserver()] if observers is None else list(observers)
+        self.phase_ns = defaultdict(int)
+        self._phase_child_ns = []
+
+    @property
+    def is_multi_unit(self) -> bool:
+        return len(self.enemy_units) > 1
+
+    def units_within(self, obj, radius_km: float) -> list[EnemyUnit]:
+        """
+        objから半径radius_km以内にいる敵ユニットを近い順に返す。
 
-    def enqueue_weapon_transfer(self, from_fortress, to_fortress, weapon: Union[Weapon, Jammer, ExpendableWeapon]):
+        Args:
+            obj: 中心となるFortressなど。
+            radius_km (float): 半径（km）。
+
+        Returns:
+            list[EnemyUnit]: 範囲内の敵ユニット。
+        """
+        return [unit for _, unit in self.unit_index.within(obj, radius_km)]
+
+    def nearest_enemy_unit(self, fortress: Fortress) -> EnemyUnit:
+        """撤退していない敵ユニットのうち、拠点に最も近いものを返す。"""
+        if not self.is_multi_unit:
+            return self.enemy_unit
+        active = [u for u in self.enemy_units if not u.retreating] or self.enemy_units
+        return min(active, key=fortress.distance_to)
+
+    def enqueue_convoy(self, from_fortress: Fortress, to_fortress: Fortress, weapons: list = (),
+                       ammo: Optional[dict[str, int]] = None) -> str:
         """
-        武器を移送キューに登録。
+        武器と弾薬をまとめた輸送隊を移送キューに登録。到着ターンは最も遅い積荷に合わせる。
 
         Args:
-            from_fortress (str): 出発地の名前
-            to_fortress (str): 到着地の名前
-            weapon (str): 対象武器の名前。
-            counte (int): 送る数
+            from_fortress (Fortress): 出発地
+            to_fortress (Fortress): 到着地
+            weapons (list): 送る武器オブジェクトのリスト。
+            ammo (dict): 弾薬の種類から数量への辞書。
+
+        Returns:
+            str: 登録結果。
         """
         distance = from_fortress.distance_to(to_fortress)
-        turns = weapon.get_transfer_time(distance)
-        arrival_turn = self.turn + turns
-        self.weapon_transfer_queue.append((arrival_turn, to_fortress, weapon))
-        return f"{weapon.name} enqueued to {to_fortress.name} (arrives in {turns} turns) \n"
+        cargo_ammo = {
+            ammo_type: (from_fortress.ammo_defs[ammo_type], amount)
+            for ammo_type, amount in (ammo or {}).items() if amount > 0
+        }
+        transfer_times = [w.get_transfer_time(distance) for w in weapons]
+        transfer_times += [math.ceil(distance / ammo_def.move_distance_per_turn) for ammo_def, _ in cargo_ammo.values()]
+        if not transfer_times:
+            return ""
+        turns = max(transfer_times)
+        convoy = Convoy(origin=from_fortress, destination=to_fortress, arrival_turn=self.turn + turns,
+                        weapons=list(weapons), ammo=cargo_ammo)
+        heapq.heappush(self.weapon_transfer_queue, (convoy.arrival_turn, next(self._transfer_seq), convoy))
+        return f"{convoy.describe()} enqueued to {to_fortress.name} (arrives in {turns} turns) \n"
+
+    def enqueue_weapon_transfer(self, from_fortress, to_fortress, weapon: Union[Weapon, Jammer]):
+        """
+        武器1つを移送キューに登録。
+
+        Args:
+            from_fortress (Fortress): 出発地
+            to_fortress (Fortress): 到着地
+            weapon (Weapon or Jammer): 対象武器。
+        """
+        return self.enqueue_convoy(from_fortress, to_fortress, weapons=[weapon])
+
+    def apply_transfer(self, fortress: Fortress, plan: list) -> str:
+        """
+        拠点の送付計画を実行する。各項目は武器名または弾薬名のどちらでもよく、項目ごとに1つの輸送隊になる。
+
+        Args:
+            fortress (Fortress): 送付元の拠点。
+            plan (list): 送付計画（送付先の拠点名, 武器名または弾薬名, 数量）。
+
+        Returns:
+            str: 実行結果。
+        """
+        result = ""
+        for to_name, item_name, count in plan:
+            to_fort = next((f for f in self.fortresses if f.name == to_name), None)
+            if not to_fort or to_fort is fortress:
+                continue
+            if item_name in fortress.weapon_stock:
+                weapons_to_send = fortress.send_weapons(item_name, count)
+                result += self.enqueue_convoy(fortress, to_fort, weapons=weapons_to_send)
+            elif item_name in fortress.ammo_stock:
+                amount = fortress.send_ammo(item_name, count)
+                result += self.enqueue_convoy(fortress, to_fort, ammo={item_name: amount})
+        return result
 
     def handle_weapon_arrivals(self):
-        """このターンに到着予定の武器を処理。"""
+        """このターンまでに到着予定の輸送隊を到着順に処理。"""
         result = ""
         while self.weapon_transfer_queue and self.weapon_transfer_queue[0][0] <= self.turn:
-            _, destination, weapon = self.weapon_transfer_queue.popleft()
-            destination.receive_weapon(weapon)
-            result += f"{destination.name} reveived {weapon.name}"
+            _, _, convoy = heapq.heappop(self.weapon_transfer_queue)
+            destination = convoy.destination
+            for weapon in convoy.weapons:
+                destination.receive_weapon(weapon)
+            for ammo_def, amount in convoy.ammo.values():
+                destination.receive_ammo(ammo_def, amount)
+            result += f"{destination.name} received {convoy.describe()}\n"
         return result
 
     def step(self):
         """1ターン分のシミュレーションを実行。"""
-        print(f"\n--- Turn {self.turn} ---")
-        self.handle_weapon_arrivals()
+        self.phase_ns = defaultdict(int)
+        self.notify("on_turn_start", self.turn)
+        with self.phase("arrivals"):
+            self.handle_weapon_arrivals()
+        self.snapshot = TurnSnapshot()
+        active_units = [u for u in self.enemy_units if not u.retreating] or self.enemy_units[:1]
+        self.unit_index.rebuild(self.enemy_units)
 
         # Fortress actions
-        for fortress in self.fortresses:
-            commander = FortressCommander(
-                my_fortress=fortress,
-                enemy_unit=self.enemy_unit,
-                all_fortresses=self.fortresses,
-                enemy_goal=self.enemy_scenario["目的"]
-            )
-            thought, action, plan = commander.decide_action(self.turn, self.history)
-            result = ""
-            if action == "defend":
-                result = fortress.defend(self.enemy_unit, plan, self.turn)
-            elif action == "transfer":
-                result = ""
-                for to_name, weapon_name, count in plan:
-                    to_fort = next((f for f in self.fortresses if f.name == to_name), None)
-                    if not to_fort:
-                        continue
-                    if fortress.name == to_fort:
-                        continue
-                    weapons_to_send = fortress.send_weapons(weapon_name, count)
-                    for w in weapons_to_send:
-                        result += self.enqueue_weapon_transfer(fortress, to_fort, w)
-            elif action == "idle":
-                result = f"{fortress.name} did nothing."
-            self.history.append(History(
+        for fortress, (thought, action, plan) in zip(self.fortresses, self.decide_fortress_actions()):
+            with self.phase("fortress_action"):
+                result = self.apply_fortress_action(fortress, action, plan)
+            self.add_history(History(
                 turn=self.turn,
                 name=fortress.name,
                 thought=thought,
@@ -861,27 +1617,189 @@ class Simulation:
                 plan=plan,
                 result=result
             ))
-            print(str(self.history[-1]))
 
         # Enemy action
-        self.enemy_unit.check_retreat()
-        if self.enemy_unit.retreating:
-            self.history.append(
+        for enemy_unit in active_units:
+            with self.phase("enemy_action"):
+                self.step_enemy_unit(enemy_unit)
+            self.snapshot.invalidate(enemy_unit, enemy_unit.target_base)
+        with self.phase("outcome"):
+            for enemy_unit in active_units:
+                self.check_unit_outcome(enemy_unit)
+            self.record_turn_costs()
+        self.notify("on_turn_end", self.turn, dict(self.phase_ns))
+        self.turn += 1
+
+    def notify(self, event: str, *args):
+        """登録された observer の event メソッドを呼ぶ。"""
+        for observer in self.observers:
+            getattr(observer, event)(self, *args)
+
+    def add_history(self, entry: History):
+        self.history.append(entry)
+        self.notify("on_action_applied", entry)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        ブロックの所要時間をフェーズ name の時間として phase_ns に加える。
+        入れ子になったフェーズの時間は外側のフェーズから除く。
+        """
+        start = time.perf_counter_ns()
+        self._phase_child_ns.append(0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self.phase_ns[name] += elapsed - self._phase_child_ns.pop()
+            if self._phase_child_ns:
+                self._phase_child_ns[-1] += elapsed
+
+    def record_turn_costs(self):
+        """このターンの履歴に、ターン終了時の各拠点・ユニットの累積コストを記録する。"""
+        costs = {entity.name: entity.current_cost for entity in [*self.fortresses, *self.enemy_units]}
+        for h in reversed(self.history):
+            if h.turn != self.turn:
+                break
+            h.cost = costs.get(h.name)
+
+    def make_fortress_commander(self, fortress: Fortress):
+        return self.fortress_commander_cls(
+            my_fortress=fortress,
+            enemy_unit=self.nearest_enemy_unit(fortress),
+            all_fortresses=self.fortresses,
+            enemy_goal=self.enemy_scenario["目的"],
+            enemy_units=self.enemy_units if self.is_multi_unit else None,
+            snapshot=self.snapshot,
+        )
+
+    def decide_fortress_actions(self):
+        """
+        全拠点の司令官の判断を拠点の並び順で返すジェネレータ。
+        逐次モードでは1拠点ずつ判断し、その行動が適用されてから次の拠点が判断する。
+        同時モードではターン開始時点の履歴のコピーを全司令官に渡し、スレッドプールでまとめて判断する。
+
+        Yields:
+            tuple: (thought, action, plan)
+        """
+        if not self.concurrent_decisions:
+            for fortress in self.fortresses:
+                with self.phase("fortress_decision"):
+                    commander = self.make_fortress_commander(fortress)
+                    decision = self.ask_commander(commander, "fortress", fortress.name, self.history)
+                self.record_decision(fortress.name, commander, decision)
+                yield decision
+            return
+
+        snapshot = list(self.history)
+        commanders = [self.make_fortress_commander(fortress) for fortress in self.fortresses]
+        workers = self.max_decision_workers or len(commanders)
+        with self.phase("fortress_decision"), ThreadPoolExecutor(max_workers=workers) as executor:
+            # 呼び出し元のcontextvars（LLMの実行ステージなど）を各スレッドに引き継ぐ
+            futures = [executor.submit(contextvars.copy_context().run, self.ask_commander,
+                                       commander, "fortress", fortress.name, snapshot)
+                       for fortress, commander in zip(self.fortresses, commanders)]
+            decisions = [future.result() for future in futures]
+        for fortress, commander, decision in zip(self.fortresses, commanders, decisions):
+            self.record_decision(fortress.name, commander, decision)
+        yield from decisions
+
+    def ask_commander(self, commander, kind: str, name: str, history: list[History]) -> tuple:
+        """司令官に判断させる。LLMの計測値に司令官の種類・名前・ターンのタグを付ける。"""
+        with llm_context(commander=kind, name=name, turn=self.turn):
+            return commander.decide_action(self.turn, history)
+
+    def record_decision(self, name: str, commander, decision: tuple):
+        """司令官の判断を、司令官が組み立てたプロンプトのハッシュ（あれば）とともに decision_log に記録する。"""
+        self.decision_log.record(self.turn, name, decision, getattr(commander, "prompt_hash", None))
+        self.notify("on_decision", name, decision)
+
+    def apply_fortress_action(self, fortress: Fortress, action: str, plan) -> str:
+        """
+        拠点の司令官が決めた行動を適用し、結果の文字列を返す。
+        """
+        if action == "defend":
+            self.snapshot.invalidate(fortress, *self.enemy_units)
+            return self.apply_defend(fortress, plan)
+        if action == "transfer":
+            self.snapshot.invalidate(fortress)
+            return self.apply_transfer(fortress, plan)
+        if action == "idle":
+            return f"{fortress.name} did nothing."
+        return ""
+
+    def apply_defend(self, fortress: Fortress, plan: list) -> str:
+        """
+        拠点の防衛計画を実行する。
+        複数ユニットの場合、planの各tupleの4番目の要素で標的ユニットを指定でき、
+        省略時は標的の武器を持つユニットのうち、使う武器の射程内で最も近いものを標的にする。
+
+        Args:
+            fortress (Fortress): 防衛する拠点。
+            plan (list): 防衛計画。
+
+        Returns:
+            str: 実行結果。
+        """
+        if not self.is_multi_unit:
+            return fortress.defend(self.enemy_unit, plan, self.turn, notify=self.notify)
+
+        plans_by_unit = {}
+        for entry in plan:
+            target_name, my_weapon_name, count = entry[:3]
+            unit = self.resolve_defend_target(fortress, target_name, my_weapon_name, entry[3] if len(entry) > 3 else None)
+            if unit is None:
+                continue
+            plans_by_unit.setdefault(id(unit), (unit, []))[1].append((target_name, my_weapon_name, count))
+        return "".join(fortress.defend(unit, unit_plan, self.turn, notify=self.notify) for unit, unit_plan in plans_by_unit.values())
+
+    def resolve_defend_target(self, fortress: Fortress, target_name: str, my_weapon_name: str,
+                              unit_name: Optional[str] = None) -> Optional[EnemyUnit]:
+        """
+        防衛計画の1項目が標的とする敵ユニットを決める。
+
+        Args:
+            fortress (Fortress): 防衛する拠点。
+            target_name (str): 標的とする武器の名前。
+            my_weapon_name (str): 使う武器の名前。
+            unit_name (str or None): 指定された敵ユニットの名前。
+
+        Returns:
+            EnemyUnit or None: 標的の敵ユニット。該当がなければNone。
+        """
+        if unit_name is not None:
+            return next((u for u in self.enemy_units if u.name == unit_name), None)
+        owners = [u for u in self.enemy_units if not u.retreating and u.weapon_stock.active_count(target_name)]
+        if not owners:
+            return None
+        if my_weapon_name in fortress.weapon_stock:
+            owner_ids = {id(u) for u in owners}
+            in_range = [u for u in self.units_within(fortress, fortress.weapon_stock.spec(my_weapon_name).range_)
+                        if id(u) in owner_ids]
+            if in_range:
+                return in_range[0]
+        return min(owners, key=fortress.distance_to)
+
+    def step_enemy_unit(self, enemy_unit: EnemyUnit):
+        """敵ユニット1つ分の行動を実行。"""
+        enemy_unit.check_retreat()
+        if enemy_unit.retreating:
+            self.add_history(
                 History(
                     turn=self.turn,
-                    name=self.enemy_unit.name,
+                    name=enemy_unit.name,
                     thought="あらかじめ設定した退却ラインを超えたので退却しなければなりません",
                     action="retreat",
                     plan=[],
                     result="退却"
                 )
             )
-        elif not self.enemy_unit.can_attack_target_base():
-            result = self.enemy_unit.move_toward_target()
-            self.history.append(
+        elif not enemy_unit.can_attack_target_base():
+            result = enemy_unit.move_toward_target()
+            self.add_history(
                 History(
                     turn=self.turn,
-                    name=self.enemy_unit.name,
+                    name=enemy_unit.name,
                     thought="攻撃不可能なため進軍する",
                     action="move_toward_target",
                     plan=[],
@@ -889,42 +1807,42 @@ class Simulation:
                 )
             )
         else:
-            enemy_commander = EnemyCommander(
-                my_unit=self.enemy_unit,
+            enemy_commander = self.enemy_commander_cls(
+                my_unit=enemy_unit,
                 all_fortresses=self.fortresses,
-                goal=self.enemy_scenario["目的"]
+                goal=self.enemy_scenario["目的"],
+                snapshot=self.snapshot,
             )
-            thought, action, plan = enemy_commander.decide_action(self.turn, self.history)
+            with self.phase("enemy_decision"):
+                thought, action, plan = self.ask_commander(enemy_commander, "enemy", enemy_unit.name, self.history)
+            self.record_decision(enemy_unit.name, enemy_commander, (thought, action, plan))
             result = ""
             if action == "move_toward_target":
-                result = self.enemy_unit.move_toward_target()
+                result = enemy_unit.move_toward_target()
             elif action == "attack":
-                print(plan)
-                result = self.enemy_unit.attack(plan, self.turn)
+                result = enemy_unit.attack(plan, self.turn, notify=self.notify)
             elif action == "retreat":
-                self.enemy_unit.retreating = True
-                result = f"{self.enemy_unit.name} is retreating."
+                enemy_unit.retreating = True
+                result = f"{enemy_unit.name} is retreating."
 
-
-            self.history.append(
+            self.add_history(
                 History(
                     turn=self.turn,
-                    name=self.enemy_unit.name,
+                    name=enemy_unit.name,
                     thought=thought,
                     action=action,
                     plan=plan,
                     result=result
                 )
             )
-        
 
-        
-        print(str(self.history[-1:]))
-        if self.is_all_target_base_weapon_destroyed():
-            self.history.append(
+    def check_unit_outcome(self, enemy_unit: EnemyUnit):
+        """敵ユニットの勝敗を判定し、決着した場合は履歴に記録する。"""
+        if self.is_all_target_base_weapon_destroyed(enemy_unit):
+            self.add_history(
                 History(
                     turn=self.turn,
-                    name=self.enemy_unit.name,
+                    name=enemy_unit.name,
                     thought="目標基地の武器をすべて破壊したため、作戦目的は達成された",
                     action="win",
                     plan=[],
@@ -932,13 +1850,12 @@ class Simulation:
                 )
             )
             # 念のため retreating フラグを立てる（シミュレーション上の終了処理の一貫性確保）
-            self.enemy_unit.retreating = True
-            print(str(self.history[-1:]))
-        if self.is_all_enemy_unit_weapon_destroyed():
-            self.history.append(
+            enemy_unit.retreating = True
+        if self.is_all_enemy_unit_weapon_destroyed(enemy_unit):
+            self.add_history(
                 History(
                     turn=self.turn,
-                    name=self.enemy_unit.name,
+                    name=enemy_unit.name,
                     thought="全ての武器が破壊されたため敗北",
                     action="lost",
                     plan=[],
@@ -946,27 +1863,15 @@ class Simulation:
                 )
             )
             # 念のため retreating フラグを立てる（シミュレーション上の終了処理の一貫性確保）
-            self.enemy_unit.retreating = True
-            print(str(self.history[-1:]))
-        self.turn += 1
-
-
+            enemy_unit.retreating = True
     
-    def is_all_target_base_weapon_destroyed(self):
-        all_weapons = [weapons for weapons in self.enemy_unit.target_base.weapon_stock.values()]
-        for weapons in all_weapons:
-            for weapon in weapons:
-                if not weapon.destroyed:
-                    return False
-        return True
+    def is_all_target_base_weapon_destroyed(self, enemy_unit: Optional[EnemyUnit] = None):
+        enemy_unit = enemy_unit or self.enemy_unit
+        return enemy_unit.target_base.weapon_stock.active_count() == 0
     
-    def is_all_enemy_unit_weapon_destroyed(self):
-        all_weapons = [weapons for weapons in self.enemy_unit.weapon_stock.values()]
-        for weapons in all_weapons:
-            for weapon in weapons:
-                if not weapon.destroyed:
-                    return False
-        return True
+    def is_all_enemy_unit_weapon_destroyed(self, enemy_unit: Optional[EnemyUnit] = None):
+        enemy_unit = enemy_unit or self.enemy_unit
+        return enemy_unit.weapon_stock.active_count() == 0
     
     def is_over(self):
         """
@@ -975,7 +1880,7 @@ class Simulation:
         Returns:
             bool: 終了条件を満たせばTrue。
         """
-        if self.enemy_unit.retreating:
+        if all(u.retreating for u in self.enemy_units):
             return True
 
         # ② 最大ターンを超えた
@@ -983,7 +1888,7 @@ class Simulation:
             return True
 
         # ③ target_base の武器すべてが破壊されたか
-        if self.is_all_target_base_weapon_destroyed():
+        if all(self.is_all_target_base_weapon_destroyed(u) for u in self.enemy_units):
             return True
 
         return False
@@ -1009,8 +1914,8 @@ class Simulation:
                 "weapon_stock": {
                     name: {
                         "total": len(ws),
-                        "destroyed": sum(1 for w in ws if w.destroyed),
-                        "active": sum(1 for w in ws if not w.destroyed),
+                        "destroyed": f.weapon_stock.destroyed_count(name),
+                        "active": f.weapon_stock.active_count(name),
                     }
                     for name, ws in f.weapon_stock.items()
                 },
@@ -1021,25 +1926,29 @@ class Simulation:
         with open(os.path.join(output_dir, f"{filename_prefix}_fortresses.json"), "w", encoding="utf-8") as f:
             json.dump(fortresses_data, f, indent=2, ensure_ascii=False)
 
-        # EnemyUnit状態の出力
-        eu = self.enemy_unit
-        enemy_data = {
-            "name": eu.name,
-            "location": {"lat": eu.latitude, "lon": eu.longitude},
-            "target_base": eu.target_base.name,
-            "retreating": eu.retreating,
-            "current_cost": eu.current_cost,
-            "retreat_cost_threshold": eu.retreat_cost_threshold,
-            "weapon_stock": {
-                name: {
-                    "total": len(ws),
-                    "destroyed": sum(1 for w in ws if w.destroyed),
-                    "active": sum(1 for w in ws if not w.destroyed),
-                }
-                for name, ws in eu.weapon_stock.items()
-            },
-            "ammo_stock": eu.ammo_stock,
-        }
+        # EnemyUnit状態の出力（複数ユニットの場合はリスト）
+        enemy_data = [
+            {
+                "name": eu.name,
+                "location": {"lat": eu.latitude, "lon": eu.longitude},
+                "target_base": eu.target_base.name,
+                "retreating": eu.retreating,
+                "current_cost": eu.current_cost,
+                "retreat_cost_threshold": eu.retreat_cost_threshold,
+                "weapon_stock": {
+                    name: {
+                        "total": len(ws),
+                        "destroyed": eu.weapon_stock.destroyed_count(name),
+                        "active": eu.weapon_stock.active_count(name),
+                    }
+                    for name, ws in eu.weapon_stock.items()
+                },
+                "ammo_stock": eu.ammo_stock,
+            }
+            for eu in self.enemy_units
+        ]
+        if not self.is_multi_unit:
+            enemy_data = enemy_data[0]
 
         with open(os.path.join(output_dir, f"{filename_prefix}_enemy_unit.json"), "w", encoding="utf-8") as f:
             json.dump(enemy_data, f, indent=2, ensure_ascii=False)
@@ -1059,8 +1968,12 @@ class Simulation:
         with open(os.path.join(output_dir, f"{filename_prefix}_history.json"), "w", encoding="utf-8") as f:
             json.dump(history_data, f, indent=2, ensure_ascii=False)
 
-        print(f"✅ Results exported to directory: {output_dir}")
+        # 司令官の判断の記録（src.simulations.replay で再生できる）
+        self.decision_log.save(os.path.join(output_dir, f"{filename_prefix}_decisions.jsonl"))
+
+        self.notify("on_export", output_dir)
     
+    @llm_context(stage="simulation")
     def run(self):
         """
         シミュレーションを実行。
@@ -1070,8 +1983,57 @@ class Simulation:
         """
         while not self.is_over():
             self.step()
-        print("\n=== Simulation Ended ===")
-        print(f"Enemy Unit: {self.enemy_unit.name} - Retreated: {self.enemy_unit.retreating}")
-        for f in self.fortresses:
-            print(f"{f.name} - Current Cost: {f.current_cost}")
-    
\ No newline at end of file
+        self.notify("on_sim_end")
+    
+    def fork(self, observers: Optional[list] = None) -> "Simulation":
+        """
+        現在の状態から分岐したシミュレーションを返す。ターンの合間（step の後）に呼ぶ。
+        拠点・敵ユニットの武器在庫はコピーオンライトで共有するので、分岐しても武器を全部は複製しない。
+        弾薬、位置、コスト、輸送中の輸送隊、履歴、司令官の判断の記録は分岐ごとに別々に持つ。
+
+        Args:
+            observers (list or None): 分岐したシミュレーションの observer。Noneなら ConsoleObserver のみ。
+
+        Returns:
+            Simulation: 分岐したシミュレーション。元のシミュレーションとは互いに影響しない。
+        """
+        forked = {}
+        for entity in [*self.fortresses, *self.enemy_units]:
+            clone = copy.copy(entity)
+            clone.weapon_stock = entity.weapon_stock.fork()
+            clone.ammo_stock = dict(entity.ammo_stock)
+            clone.ammo_defs = dict(entity.ammo_defs)
+            forked[id(entity)] = clone
+        for unit in self.enemy_units:
+            clone = forked[id(unit)]
+            clone.target_base = forked.get(id(unit.target_base), unit.target_base)
+
+        branch = Simulation(
+            fortresses=[forked[id(f)] for f in self.fortresses],
+            enemy_scenario=self.enemy_scenario,
+            max_turns=self.max_turns,
+            enemy_units=[forked[id(u)] for u in self.enemy_units],
+            fortress_commander_cls=self.fortress_commander_cls,
+            enemy_commander_cls=self.enemy_commander_cls,
+            concurrent_decisions=self.concurrent_decisions,
+            max_decision_workers=self.max_decision_workers,
+            observers=observers,
+        )
+        branch.turn = self.turn
+        # 輸送中の武器は到着後にどちらかの在庫で書き換えられるので個体ごとに複製する（ヒープの並びはそのまま）
+        branch.weapon_transfer_queue = [
+            (arrival_turn, seq, replace(
+                convoy,
+                origin=forked[id(convoy.origin)],
+                destination=forked[id(convoy.destination)],
+                weapons=[copy.copy(w) for w in convoy.weapons],
+                ammo=dict(convoy.ammo),
+            ))
+            for arrival_turn, seq, convoy in self.weapon_transfer_queue
+        ]
+        next_seq = next(self._transfer_seq)
+        self._transfer_seq = itertools.count(next_seq)
+        branch._transfer_seq = itertools.count(next_seq)
+        branch.history = [copy.copy(h) for h in self.history]
+        branch.decision_log = DecisionLog(list(self.decision_log.decisions.values()))
+        return branch
@@ -0,0 +1,217 @@
+import json
+import os
+from collections import defaultdict
+from dataclasses import asdict
+
+
+class SimulationObserver:
+    """
+    Simulation の進行を受け取るフックの基底クラス。必要なメソッドだけ上書きする。
+    Simulation(observers=[...]) に渡すと、各イベントで登録順に呼ばれる。
+    """
+    def on_turn_start(self, sim, turn: int):
+        pass
+
+    def on_decision(self, sim, name: str, decision: tuple):
+        """司令官が (thought, action, plan) を決めたとき（適用前）に呼ばれる。"""
+        pass
+
+    def on_action_applied(self, sim, entry):
+        """行動や勝敗の判定の結果が履歴（History）に追加されたときに呼ばれる。"""
+        pass
+
+    def on_turn_end(self, sim, turn: int, phase_ns: dict):
+        """ターンの終わりに、そのターンのフェーズごとの所要時間（ナノ秒）とともに呼ばれる。"""
+        pass
+
+    def on_jam(self, sim, attacker, defender, target_name: str, count: int, until_turn: int):
+        """attacker の Jammer が defender の target_name を count 個、until_turn まで妨害したときに呼ばれる。"""
+        pass
+
+    def on_sim_end(self, sim):
+        pass
+
+    def on_export(self, sim, output_dir: str):
+        """export_results で結果を output_dir に書き出したときに呼ばれる。"""
+        pass
+
+
+class ConsoleObserver(SimulationObserver):
+    """シミュレーションの経過を標準出力に表示する（既定の observer）。"""
+    def on_turn_start(self, sim, turn):
+        print(f"\n--- Turn {turn} ---")
+
+    def on_decision(self, sim, name, decision):
+        thought, action, plan = decision
+        if action == "attack":
+            print(plan)
+
+    def on_action_applied(self, sim, entry):
+        if any(entry.name == unit.name for unit in sim.enemy_units):
+            print(str([entry]))
+        else:
+            print(str(entry))
+
+    def on_jam(self, sim, attacker, defender, target_name, count, until_turn):
+        print(f"{target_name} x {count} jammed until turn {until_turn}")
+
+    def on_sim_end(self, sim):
+        print("\n=== Simulation Ended ===")
+        for eu in sim.enemy_units:
+            print(f"Enemy Unit: {eu.name} - Retreated: {eu.retreating}")
+        for f in sim.fortresses:
+            print(f"{f.name} - Current Cost: {f.current_cost}")
+
+    def on_export(self, sim, output_dir):
+        print(f"✅ Results exported to directory: {output_dir}")
+
+
+class PhaseProfiler(SimulationObserver):
+    """
+    ターンごとのフェーズの所要時間を集める。
+    フェーズは arrivals, fortress_decision, fortress_action, enemy_decision, enemy_action, outcome で、
+    入れ子になったフェーズの時間は外側から除いてある（例: enemy_action に enemy_decision は含まない）。
+
+    Attributes:
+        turns (list[dict]): ターンごとの {フェーズ名: ナノ秒}。
+    """
+    def __init__(self):
+        self.turns = []
+
+    def on_turn_end(self, sim, turn, phase_ns):
+        self.turns.append({"turn": turn, **phase_ns})
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: フェーズごとの合計（ミリ秒）と全体に占める割合。
+        """
+        totals = defaultdict(int)
+        for timings in self.turns:
+            for phase, ns in timings.items():
+                if phase != "turn":
+                    totals[phase] += ns
+        grand_total = sum(totals.values()) or 1
+        return {
+            phase: {"total_ms": round(ns / 1e6, 3), "share": round(ns / grand_total, 4)}
+            for phase, ns in totals.items()
+        }
+
+
+def entity_state(entity) -> dict:
+    """拠点・敵ユニットの状態のうち、ターンごとに変わりうるものを辞書にまとめる。"""
+    state = {
+        "lat": entity.latitude,
+        "lon": entity.longitude,
+        "current_cost": entity.current_cost,
+        "active": {name: entity.weapon_stock.active_count(name) for name in entity.weapon_stock},
+        "ammo_stock": dict(entity.ammo_stock),
+    }
+    if hasattr(entity, "retreating"):
+        state["retreating"] = entity.retreating
+    return state
+
+
+def simulation_state(sim) -> dict:
+    return {entity.name: entity_state(entity) for entity in [*sim.fortresses, *sim.enemy_units]}
+
+
+def state_delta(before: dict, after: dict) -> dict:
+    """
+    2つの simulation_state の差分。変わったエンティティの変わった項目だけを残す（active と ammo_stock は武器・弾薬ごと）。
+    """
+    delta = {}
+    for name, state in after.items():
+        previous = before.get(name, {})
+        changed = {}
+        for key, value in state.items():
+            old = previous.get(key)
+            if isinstance(value, dict):
+                sub = {k: v for k, v in value.items() if (old or {}).get(k) != v}
+                if sub:
+                    changed[key] = sub
+            elif old != value:
+                changed[key] = value
+        if changed:
+            delta[name] = changed
+    return delta
+
+
+class JsonlStreamWriter(SimulationObserver):
+    """
+    シミュレーションの経過をJSON Linesに逐次追記する observer。ターンの終わりごとに flush するので、
+    途中で例外が起きてもそれまでのターンは残り、実行中に tail で追うこともできる。
+
+    レコードの種類（"type"）:
+        start: 開始時の全エンティティの状態（state）
+        history: History 1件（行動が適用されるたび）
+        turn_end: そのターンの状態の差分（delta）とフェーズごとの所要時間（phase_ns）
+        sim_end: 終了時のターン数
+
+    Attributes:
+        path (str): 出力するファイルのパス。
+        append (bool): 既存のファイルに追記するかどうか（チェックポイントから再開する場合）。
+    """
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.append = append
+        self.file = None
+        self.state = None
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def on_turn_start(self, sim, turn):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.file = open(self.path, "a" if self.append else "w", encoding="utf-8")
+            self.state = simulation_state(sim)
+            self.write({"type": "start", "turn": turn, "state": self.state})
+            self.file.flush()
+
+    def on_action_applied(self, sim, entry):
+        self.write({"type": "history", **asdict(entry)})
+
+    def on_turn_end(self, sim, turn, phase_ns):
+        state = simulation_state(sim)
+        self.write({"type": "turn_end", "turn": turn, "delta": state_delta(self.state, state), "phase_ns": phase_ns})
+        self.state = state
+        self.file.flush()
+
+    def on_sim_end(self, sim):
+        if self.file is None:
+            return
+        self.write({"type": "sim_end", "turn": sim.turn})
+        self.file.close()
+        self.file = None
+
+
+def load_stream(path: str) -> tuple[list[dict], dict]:
+    """
+    JsonlStreamWriter の出力を読み、履歴と最後に記録されたターン終了時の状態を復元する。
+    書き込み途中の最後の行は無視する。再開して追記されたファイルでは、再開したターン以降の中断前の履歴を捨てる。
+
+    Returns:
+        tuple: (履歴のレコードのリスト, エンティティ名ごとの状態)
+    """
+    history, state = [], {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if record["type"] == "start":
+                state = record["state"]
+                history = [h for h in history if h["turn"] < record["turn"]]
+            elif record["type"] == "history":
+                history.append(record)
+            elif record["type"] == "turn_end":
+                for name, changed in record["delta"].items():
+                    entity = state.setdefault(name, {})
+                    for key, value in changed.items():
+                        if isinstance(value, dict):
+                            entity.setdefault(key, {}).update(value)
+                        else:
+                            entity[key] = value
+    return history, state
@@ -0,0 +1,185 @@
+import math
+
+from src.simulations.models import (EnemyUnit, Fortress, History,
+                                    JammerSpec, WeaponStock)
+
+# プロンプトで司令官に課している1ターンあたりの武器使用数の上限
+MAX_WEAPONS_PER_TURN = 5
+
+
+def rank_threats(weapon_stock: WeaponStock) -> list[str]:
+    """
+    相手の武器の種類を脅威度（攻撃力×稼働数、Jammerは妨害ターン数×稼働数）の高い順に並べる。
+
+    Args:
+        weapon_stock (WeaponStock): 相手の武器在庫。
+
+    Returns:
+        list[str]: 稼働中の武器の名前のリスト。
+    """
+    def threat(name):
+        spec = weapon_stock.spec(name)
+        strength = spec.jam_turns if isinstance(spec, JammerSpec) else spec.power
+        return strength * weapon_stock.active_count(name)
+
+    names = [name for name in weapon_stock if weapon_stock.active_count(name)]
+    return sorted(names, key=threat, reverse=True)
+
+
+def plan_strikes(owner, target_stock: WeaponStock, distance: float, budget: int) -> tuple[list[tuple[str, str, int]], int]:
+    """
+    射程内の武器を攻撃力の高い順に、脅威度の高い標的へ割り当てる。
+    標的の稼働中の耐久値を削り切れる分だけ割り当て、余った武器は次の標的へ回す。
+    攻撃力が0の武器（偵察機など）は割り当てない。
+
+    Args:
+        owner (Fortress or EnemyUnit): 攻撃する側。
+        target_stock (WeaponStock): 攻撃される側の武器在庫。
+        distance (float): 相手までの距離（km）。
+        budget (int): 使ってよい武器の数。
+
+    Returns:
+        tuple[list, int]: (攻撃計画, 使った武器の数)
+    """
+    stock = owner.weapon_stock
+    shooters = []
+    for name in stock:
+        spec = stock.spec(name)
+        if isinstance(spec, JammerSpec) or spec.power <= 0 or distance > spec.range_ or not stock.active_count(name):
+            continue
+        shots = stock.active_count(name)
+        if spec.ammo_per_shot > 0:
+            shots = min(shots, owner.ammo_stock.get(spec.ammo_type, 0) // spec.ammo_per_shot)
+        if shots > 0:
+            shooters.append([name, spec.power, shots])
+    shooters.sort(key=lambda shooter: shooter[1], reverse=True)
+
+    plan = []
+    used = 0
+    for target_name in rank_threats(target_stock):
+        remaining_hp = target_stock.spec(target_name).hp * target_stock.active_count(target_name)
+        for shooter in shooters:
+            if used >= budget or remaining_hp <= 0:
+                break
+            name, power, shots = shooter
+            count = min(shots, budget - used, -(-remaining_hp // power))
+            if count <= 0:
+                continue
+            plan.append((target_name, name, count))
+            shooter[2] -= count
+            used += count
+            remaining_hp -= power * count
+        if used >= budget:
+            break
+    return plan, used
+
+
+def plan_jamming(stock: WeaponStock, target_stock: WeaponStock, distance: float, budget: int) -> tuple[list[tuple[str, str, int]], int]:
+    """
+    射程内のJammerで、脅威度の最も高い相手の武器を妨害する。
+    使う数をnとするとn台がそれぞれn個ずつ妨害するため、標的の稼働数を覆える最小のnを使い、
+    攻撃に回す枠を残すため最大でも使用枠の半分までにする。
+
+    Args:
+        stock (WeaponStock): 自分の武器在庫。
+        target_stock (WeaponStock): 相手の武器在庫。
+        distance (float): 相手までの距離（km）。
+        budget (int): 使ってよいJammerの数。
+
+    Returns:
+        tuple[list, int]: (妨害計画, 使ったJammerの数)
+    """
+    targets = [name for name in rank_threats(target_stock) if not target_stock.is_jammer(name)]
+    if not targets or budget <= 0:
+        return [], 0
+    for name in stock:
+        spec = stock.spec(name)
+        if isinstance(spec, JammerSpec) and distance <= spec.range_ and stock.active_count(name):
+            needed = math.ceil(math.sqrt(target_stock.active_count(targets[0])))
+            count = min(stock.active_count(name), needed, max(1, budget // 2))
+            return [(targets[0], name, count)], count
+    return [], 0
+
+
+class RuleBasedFortressCommander:
+    """
+    LLMを使わずに拠点の行動を決める司令官。FortressCommanderと同じ引数・戻り値で使える。
+    敵の攻撃があった後は射程内の武器で脅威度の高い敵武器を狙い、Jammerは射程内ならいつでも使う。
+    攻撃対象でない拠点は、敵の射程外にいる間、目標拠点へ武器を送る。
+
+    Attributes:
+        transfer_batch (int): 1ターンに送る武器の最大数。
+        reserve_ratio (float): 送付時に手元に残す武器の割合。
+    """
+    def __init__(self, my_fortress: Fortress, enemy_unit: EnemyUnit, all_fortresses: list[Fortress], enemy_goal: str,
+                 enemy_units: list[EnemyUnit] = None, snapshot=None, transfer_batch: int = 3,
+                 reserve_ratio: float = 0.5):
+        self.fortress = my_fortress
+        self.all_fortresses = all_fortresses
+        self.enemy_unit = enemy_unit
+        self.enemy_goal = enemy_goal
+        self.enemy_units = enemy_units
+        self.transfer_batch = transfer_batch
+        self.reserve_ratio = reserve_ratio
+
+    def decide_action(self, current_turn: int, history: list[History]):
+        fortress = self.fortress
+        enemy = self.enemy_unit
+        distance = fortress.distance_to(enemy)
+        attacked = any(h.action == "attack" for h in history)
+
+        plan, used = ([], 0) if enemy.retreating else plan_jamming(
+            fortress.weapon_stock, enemy.weapon_stock, distance, MAX_WEAPONS_PER_TURN)
+        if attacked and not enemy.retreating:
+            strikes, _ = plan_strikes(fortress, enemy.weapon_stock, distance, MAX_WEAPONS_PER_TURN - used)
+            plan += strikes
+        if plan:
+            if self.enemy_units:
+                plan = [(*entry, enemy.name) for entry in plan]
+            return f"{fortress.name}の司令官として、射程内の脅威度の高い敵武器を優先して迎撃・妨害します。", "defend", plan
+
+        transfer = self.plan_transfer(distance)
+        if transfer:
+            return f"{fortress.name}の司令官として、攻撃目標の{enemy.target_base.name}へ戦力を送ります。", "transfer", transfer
+        return f"{fortress.name}の司令官として、現時点では行動の必要がないと判断しました。", "idle", []
+
+    def plan_transfer(self, distance: float) -> list[tuple[str, str, int]]:
+        """敵の射程外にいる攻撃対象外の拠点から、目標拠点へ攻撃力の高い武器を送る計画を立てる。"""
+        fortress = self.fortress
+        target_base = self.enemy_unit.target_base
+        if target_base is fortress or target_base not in self.all_fortresses:
+            return []
+        enemy_stock = self.enemy_unit.weapon_stock
+        enemy_reach = max((enemy_stock.spec(n).range_ for n in enemy_stock if enemy_stock.active_count(n)), default=0)
+        if distance <= enemy_reach:
+            return []
+        stock = fortress.weapon_stock
+        candidates = [n for n in stock if not stock.is_jammer(n) and stock.active_count(n)]
+        if not candidates:
+            return []
+        best = max(candidates, key=lambda n: stock.spec(n).power)
+        count = min(self.transfer_batch, int(stock.active_count(best) * (1 - self.reserve_ratio)))
+        return [(target_base.name, best, count)] if count > 0 else []
+
+
+class RuleBasedEnemyCommander:
+    """
+    LLMを使わずに敵ユニットの行動を決める司令官。EnemyCommanderと同じ引数・戻り値で使える。
+    射程内のJammerで目標拠点の最も脅威度の高い武器を妨害し、残りの枠で射程内の武器による攻撃を行う。
+    攻撃できる武器がなければ前進する。
+    """
+    def __init__(self, my_unit: EnemyUnit, all_fortresses: list[Fortress], goal: str, snapshot=None):
+        self.unit = my_unit
+        self.all_fortresses = all_fortresses
+        self.goal = goal
+
+    def decide_action(self, current_turn: int, history: list[History]):
+        unit = self.unit
+        target_stock = unit.target_base.weapon_stock
+        distance = unit.distance_to(unit.target_base)
+
+        plan, used = plan_jamming(unit.weapon_stock, target_stock, distance, MAX_WEAPONS_PER_TURN)
+        strikes, _ = plan_strikes(unit, target_stock, distance, MAX_WEAPONS_PER_TURN - used)
+        if strikes:
+            return f"{unit.name}の司令官として、{unit.target_base.name}の脅威度の高い武器を攻撃します。", "attack", plan + strikes
+        return f"{unit.name}の司令官として、攻撃可能な武器がないため前進します。", "move_toward_target", []
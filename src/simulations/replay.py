@@ -0,0 +1,195 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+FORTRESS_ACTIONS = ("defend", "transfer", "idle")
+ENEMY_ACTIONS = ("move_toward_target", "attack", "retreat")
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Decision:
+    turn: int
+    name: str
+    thought: str
+    action: str
+    plan: list
+    prompt_hash: Optional[str] = None
+
+
+class DecisionLog:
+    """
+    司令官の判断（thought, action, plan）とプロンプトのハッシュを (turn, name) ごとに記録・再生するクラス。
+    保存形式は1行1判断のJSON Lines。
+
+    Attributes:
+        decisions (dict): (turn, name) をキーとする Decision。
+        divergences (list): 再生時にプロンプトのハッシュが記録と一致しなかった (turn, name)。
+        misses (list): 再生時に記録が無かった (turn, name)。
+    """
+    def __init__(self, decisions: Optional[list[Decision]] = None):
+        self.decisions = {}
+        self.divergences = []
+        self.misses = []
+        for decision in decisions or []:
+            self.decisions.setdefault((decision.turn, decision.name), decision)
+
+    def __len__(self):
+        return len(self.decisions)
+
+    def record(self, turn: int, name: str, decision: tuple, prompt_hash: Optional[str] = None):
+        thought, action, plan = decision
+        self.decisions[(turn, name)] = Decision(turn, name, thought, action, plan, prompt_hash)
+
+    def get(self, turn: int, name: str) -> Optional[Decision]:
+        return self.decisions.get((turn, name))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for key in sorted(self.decisions):
+                f.write(json.dumps(asdict(self.decisions[key]), ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "DecisionLog":
+        with open(path, encoding="utf-8") as f:
+            return cls([Decision(**json.loads(line)) for line in f if line.strip()])
+
+    @classmethod
+    def from_history(cls, path: str) -> "DecisionLog":
+        """
+        既存の result_history.json から判断を読み込む。プロンプトのハッシュは記録されていないのでNoneになる。
+        同じターン・同じ名前の記録が複数ある場合（勝敗の判定など）は、司令官の行動である最初のものを使う。
+        """
+        with open(path, encoding="utf-8") as f:
+            history = json.load(f)
+        decisions = [
+            Decision(h["turn"], h["name"], h["thought"], h["action"], h["plan"])
+            for h in history
+            if h["action"] in FORTRESS_ACTIONS + ENEMY_ACTIONS
+        ]
+        return cls(decisions)
+
+    def replay(self, turn: int, name: str, prompt: Optional[str], fallback: tuple) -> tuple:
+        """
+        記録された判断を返す。記録が無ければ fallback を返し、misses に記録する。
+        """
+        decision = self.get(turn, name)
+        if decision is None:
+            self.misses.append((turn, name))
+            return fallback
+        if prompt is not None and decision.prompt_hash and decision.prompt_hash != prompt_hash(prompt):
+            self.divergences.append((turn, name))
+        # LLMの判断のplanはJSON由来のリストなので、そのまま返すと履歴の文字列（＝プロンプト）も記録時と一致する
+        return decision.thought, decision.action, decision.plan
+
+    def fortress_commander_cls(self):
+        """この記録を再生する拠点の司令官クラスを返す（Simulation の fortress_commander_cls に渡す）。"""
+        from src.simulations.models import FortressCommander
+        log = self
+
+        class ReplayFortressCommander(FortressCommander):
+            def decide_action(self, current_turn, history):
+                prompt = self.build_prompt(current_turn, history)
+                self.prompt_hash = prompt_hash(prompt)
+                return log.replay(current_turn, self.fortress.name, prompt, ("", "idle", []))
+
+        return ReplayFortressCommander
+
+    def enemy_commander_cls(self):
+        """この記録を再生する敵ユニットの司令官クラスを返す（Simulation の enemy_commander_cls に渡す）。"""
+        from src.simulations.models import EnemyCommander
+        log = self
+
+        class ReplayEnemyCommander(EnemyCommander):
+            def decide_action(self, current_turn, history):
+                prompt = self.build_prompt(current_turn, history)
+                self.prompt_hash = prompt_hash(prompt)
+                return log.replay(current_turn, self.unit.name, prompt, ("", "move_toward_target", []))
+
+        return ReplayEnemyCommander
+
+
+def load_decision_log(log_dir: str, filename_prefix: str = "result") -> DecisionLog:
+    """シミュレーションのログのディレクトリから判断の記録を読む。decisionsファイルが無ければ履歴から作る。"""
+    decisions_path = os.path.join(log_dir, f"{filename_prefix}_decisions.jsonl")
+    if os.path.exists(decisions_path):
+        return DecisionLog.load(decisions_path)
+    return DecisionLog.from_history(os.path.join(log_dir, f"{filename_prefix}_history.json"))
+
+
+def replay_simulation_logs(base_path: str = "results/simulation_logs", max_turns: int = 10) -> list[dict]:
+    """
+    base_path 以下の各作戦のログに記録された判断を、現在のエンジンで再生する。
+    LLMは呼ばないので、models.py の戦闘・妨害・輸送の規則を変えたときに記録済みのシナリオで結果を比べられる。
+
+    Returns:
+        list[dict]: 作戦ごとの再生結果（勝者とコスト、記録時の勝者とコスト、記録が無かった判断数、状態がずれた判断数）。
+    """
+    from src.definitions.predefined_japanese_defenses import make_fortresses
+    from src.simulations.batch import trial_outcome
+    from src.simulations.models import Simulation
+    from src.simulations.templates import load_unit_template
+    from src.utils.scenario_store import get_store
+
+    rows = []
+    for code_name in sorted(os.listdir(base_path)):
+        log_dir = os.path.join(base_path, code_name)
+        if not os.path.isdir(log_dir):
+            continue
+        log = load_decision_log(log_dir)
+        # 記録時（run_scenario）と同じ拠点・ユニット・シナリオを作る。シナリオの「目的」はプロンプトに入るので、
+        # ストアの実物を使わないと記録済みの prompt_hash と一致しない
+        fortresses = make_fortresses()
+        enemy_unit = load_unit_template(code_name).instantiate(fortresses)
+        enemy_scenario = get_store().get(code_name) or {"作戦名": code_name, "目的": ""}
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim = Simulation(
+                fortresses=fortresses,
+                enemy_unit=enemy_unit,
+                enemy_scenario=enemy_scenario,
+                max_turns=max_turns,
+                fortress_commander_cls=log.fortress_commander_cls(),
+                enemy_commander_cls=log.enemy_commander_cls(),
+            )
+            sim.run()
+        with open(os.path.join(log_dir, "result_fortresses.json"), encoding="utf-8") as f:
+            recorded_fortress_cost = sum(fortress["current_cost"] for fortress in json.load(f))
+        with open(os.path.join(log_dir, "result_enemy_unit.json"), encoding="utf-8") as f:
+            recorded_units = json.load(f)
+        if isinstance(recorded_units, dict):
+            recorded_units = [recorded_units]
+        with open(os.path.join(log_dir, "result_history.json"), encoding="utf-8") as f:
+            recorded_outcomes = {h["action"] for h in json.load(f)}
+        recorded_winner = "enemy" if "win" in recorded_outcomes else (
+            "defender" if recorded_outcomes & {"lost", "retreat"} else "draw")
+        outcome = trial_outcome(sim)
+        rows.append({
+            "code_name": code_name,
+            "winner": outcome["winner"],
+            "recorded_winner": recorded_winner,
+            "turns": outcome["turns"],
+            "enemy_cost": outcome["enemy_cost"],
+            "fortress_cost": outcome["fortress_cost"],
+            "recorded_enemy_cost": sum(unit["current_cost"] for unit in recorded_units),
+            "recorded_fortress_cost": recorded_fortress_cost,
+            "misses": len(log.misses),
+            "divergences": len(log.divergences),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="記録済みの司令官の判断を現在のエンジンで再生する")
+    parser.add_argument("base_path", nargs="?", default="results/simulation_logs")
+    parser.add_argument("--max-turns", type=int, default=10)
+    args = parser.parse_args()
+    for row in replay_simulation_logs(args.base_path, max_turns=args.max_turns):
+        print(json.dumps(row, ensure_ascii=False))
@@ -0,0 +1,87 @@
+import json
+
+
+def serialize_unit(unit) -> dict:
+    """敵ユニットの状態をプロンプト用の辞書にまとめる。射程内かどうかは目標基地までの距離で判定する。"""
+    distance = unit.distance_to(unit.target_base)
+    return {
+        "name": unit.name,
+        "lat": unit.latitude,
+        "lon": unit.longitude,
+        "retreating": unit.retreating,
+        "current_cost": unit.current_cost,
+        "retreat_cost_threshold": unit.retreat_cost_threshold,
+        "target_base": unit.target_base.name,
+        "speed": unit.speed,
+        "weapons": {
+            name: unit.weapon_stock.describe(name, distance)
+            for name in unit.weapon_stock
+        }
+    }
+
+
+def serialize_fortress(fortress, observer) -> dict:
+    """拠点の状態をプロンプト用の辞書にまとめる。射程内かどうかは observer（敵ユニット）までの距離で判定する。"""
+    distance = fortress.distance_to(observer)
+    return {
+        "name": fortress.name,
+        "lat": fortress.latitude,
+        "lon": fortress.longitude,
+        "current_cost": fortress.current_cost,
+        "weapons": {
+            name: fortress.weapon_stock.describe(name, distance)
+            for name in fortress.weapon_stock
+        },
+        "ammo_stock": fortress.ammo_stock,
+    }
+
+
+def dumps(obj) -> str:
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def join_json_list(fragments: list[str]) -> str:
+    """
+    json.dumps(..., indent=2) 済みの要素を、リスト全体を json.dumps(..., indent=2) したのと同じ文字列に組み立てる。
+    """
+    if not fragments:
+        return "[]"
+    items = ["\n".join("  " + line for line in fragment.split("\n")) for fragment in fragments]
+    return "[\n" + ",\n".join(items) + "\n]"
+
+
+class TurnSnapshot:
+    """
+    1ターン分の拠点・敵ユニットのJSON断片のキャッシュ。全司令官で共有し、各エンティティを状態が変わるまで1回だけシリアライズする。
+    拠点の断片は射程判定に使う敵ユニットごとに持つ。状態を変えたら invalidate で該当する断片を捨てる。
+    """
+    def __init__(self):
+        self._units = {}
+        self._fortresses = {}
+
+    def unit_json(self, unit) -> str:
+        key = id(unit)
+        if key not in self._units:
+            self._units[key] = (unit, dumps(serialize_unit(unit)))
+        return self._units[key][1]
+
+    def fortress_json(self, fortress, observer) -> str:
+        key = (id(fortress), id(observer))
+        if key not in self._fortresses:
+            self._fortresses[key] = (fortress, observer, dumps(serialize_fortress(fortress, observer)))
+        return self._fortresses[key][2]
+
+    def units_json(self, units) -> str:
+        return join_json_list([self.unit_json(unit) for unit in units])
+
+    def fortresses_json(self, fortresses, observer) -> str:
+        return join_json_list([self.fortress_json(fortress, observer) for fortress in fortresses])
+
+    def invalidate(self, *entities):
+        """entitiesのいずれかを含む断片を捨てる。"""
+        stale = {id(entity) for entity in entities}
+        self._units = {key: value for key, value in self._units.items() if key not in stale}
+        self._fortresses = {
+            key: value for key, value in self._fortresses.items()
+            if key[0] not in stale and key[1] not in stale
+        }
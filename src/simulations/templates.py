@@ -0,0 +1,164 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib import import_module
+from typing import Union
+
+from src.simulations.models import (ColumnarStock, EnemyUnit, ExpendableWeapon,
+                                    Fortress, JammerSpec, WeaponSpec,
+                                    WeaponStock)
+
+UNIT_DIR = "results/enemy_units"
+
+
+def stock_layout(weapon_stock: WeaponStock) -> tuple:
+    """武器在庫を (定義, 個数) のタプルにまとめる。個体ごとの状態（損傷など）は含めない。"""
+    return tuple((weapon_stock.spec(name), len(ws)) for name, ws in weapon_stock.items() if len(ws))
+
+
+def build_stock(weapons: tuple, columnar: bool = False) -> WeaponStock:
+    """(定義, 個数) のタプルから新品の武器在庫を作る。columnar なら個体ごとの武器オブジェクトを作らずに列を作る。"""
+    if columnar:
+        return ColumnarStock.from_layout(weapons)
+    return WeaponStock({spec.name: [spec.instantiate() for _ in range(count)] for spec, count in weapons})
+
+
+@dataclass(frozen=True)
+class FortressTemplate:
+    """
+    防衛拠点の初期状態の定義。変更できないので、同じプロセスの複数のシミュレーションで共有してよい。
+    instantiate で、状態を書き換えてよい新しい Fortress を作る。
+
+    Attributes:
+        name (str): 要塞名。
+        latitude (float): 緯度。
+        longitude (float): 経度。
+        weapons (tuple): (武器の定義, 個数) のタプル。
+        ammo_stock (tuple): (弾薬名, 数量) のタプル。
+        ammo_defs (tuple): 弾薬の定義（ExpendableWeapon）のタプル。
+    """
+    name: str
+    latitude: float
+    longitude: float
+    weapons: tuple[tuple[Union[WeaponSpec, JammerSpec], int], ...]
+    ammo_stock: tuple[tuple[str, int], ...]
+    ammo_defs: tuple[ExpendableWeapon, ...]
+
+    @classmethod
+    def from_fortress(cls, fortress: Fortress) -> "FortressTemplate":
+        """既存の Fortress の種類ごとの武器数・弾薬から定義を作る（損傷などの状態は引き継がない）。"""
+        return cls(
+            name=fortress.name,
+            latitude=fortress.latitude,
+            longitude=fortress.longitude,
+            weapons=stock_layout(fortress.weapon_stock),
+            ammo_stock=tuple(fortress.ammo_stock.items()),
+            ammo_defs=tuple(fortress.ammo_defs.values()),
+        )
+
+    def instantiate(self, columnar: bool = False) -> Fortress:
+        """
+        Args:
+            columnar (bool): 武器在庫を ColumnarStock にするかどうか。
+
+        Returns:
+            Fortress: 新品の武器・弾薬を持つ拠点。
+        """
+        return Fortress(
+            name=self.name,
+            latitude=self.latitude,
+            longitude=self.longitude,
+            weapon_stock=build_stock(self.weapons, columnar),
+            ammo_stock=dict(self.ammo_stock),
+            ammo_defs={ammo_def.name: ammo_def for ammo_def in self.ammo_defs},
+        )
+
+
+@dataclass(frozen=True)
+class EnemyUnitTemplate:
+    """
+    敵ユニットの初期状態の定義。攻撃対象の拠点は名前で持ち、instantiate で渡された拠点に結び付ける。
+
+    Attributes:
+        name (str): 敵ユニット名。
+        target_base (str): 攻撃対象の拠点名。
+        latitude (float): 初期位置の緯度。
+        longitude (float): 初期位置の経度。
+        speed (int): 移動速度
+        weapons (tuple): (武器の定義, 個数) のタプル。
+        ammo_stock (tuple): (弾薬名, 数量) のタプル。
+        ammo_defs (tuple): 弾薬の定義（ExpendableWeapon）のタプル。
+        retreat_cost_threshold (int): 撤退を判断するコスト閾値。
+    """
+    name: str
+    target_base: str
+    latitude: float
+    longitude: float
+    speed: int
+    weapons: tuple[tuple[Union[WeaponSpec, JammerSpec], int], ...]
+    ammo_stock: tuple[tuple[str, int], ...]
+    ammo_defs: tuple[ExpendableWeapon, ...]
+    retreat_cost_threshold: int
+
+    @classmethod
+    def from_unit(cls, unit: EnemyUnit) -> "EnemyUnitTemplate":
+        """既存の EnemyUnit から定義を作る（損傷などの状態は引き継がない）。"""
+        return cls(
+            name=unit.name,
+            target_base=unit.target_base.name,
+            latitude=unit.latitude,
+            longitude=unit.longitude,
+            speed=unit.speed,
+            weapons=stock_layout(unit.weapon_stock),
+            ammo_stock=tuple(unit.ammo_stock.items()),
+            ammo_defs=tuple(unit.ammo_defs.values()),
+            retreat_cost_threshold=unit.retreat_cost_threshold,
+        )
+
+    def instantiate(self, fortresses: list[Fortress], columnar: bool = False) -> EnemyUnit:
+        """
+        Args:
+            fortresses (list): 攻撃対象を名前で探す拠点のリスト（同じシミュレーションで使うもの）。
+            columnar (bool): 武器在庫を ColumnarStock にするかどうか。
+
+        Returns:
+            EnemyUnit: 新品の武器・弾薬を持つ敵ユニット。
+
+        Raises:
+            ValueError: 攻撃対象の拠点が fortresses に無い場合。
+        """
+        target_base = next((f for f in fortresses if f.name == self.target_base), None)
+        if target_base is None:
+            raise ValueError(f"Unknown target base: {self.target_base}")
+        return EnemyUnit(
+            name=self.name,
+            target_base=target_base,
+            latitude=self.latitude,
+            longitude=self.longitude,
+            speed=self.speed,
+            weapon_stock=build_stock(self.weapons, columnar),
+            ammo_stock=dict(self.ammo_stock),
+            ammo_defs={ammo_def.name: ammo_def for ammo_def in self.ammo_defs},
+            retreat_cost_threshold=self.retreat_cost_threshold,
+        )
+
+
+def load_unit_template(code_name: str) -> EnemyUnitTemplate:
+    """
+    作戦名の敵ユニットの定義を返す。results/enemy_units/<作戦名>.json（ユニット定義）があればそれを読み、
+    無ければ従来の <作戦名>.py を読む。ユニット定義はファイルが変わらない限り検査・変換をやり直さない。
+    """
+    from src.simulations.unit_spec import load_spec
+
+    path = os.path.join(UNIT_DIR, f"{code_name}.json")
+    if os.path.exists(path):
+        return load_spec(path).enemy_unit
+    return load_module_template(code_name)
+
+
+@lru_cache(maxsize=None)
+def load_module_template(code_name: str) -> EnemyUnitTemplate:
+    """
+    results/enemy_units/<作戦名>.py の敵ユニットを定義に変換する。モジュールの読み込みと変換はプロセスで1回だけ行う。
+    """
+    return EnemyUnitTemplate.from_unit(import_module(f"results.enemy_units.{code_name}").enemy_unit)
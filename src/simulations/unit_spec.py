@@ -0,0 +1,322 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+from src.simulations.models import ExpendableWeapon, JammerSpec, WeaponSpec, intern_spec
+from src.simulations.templates import EnemyUnitTemplate, FortressTemplate
+
+SPEC_VERSION = 1
+
+# 武器の種類ごとの必須の数値項目（count は別に検査する）
+WEAPON_FIELDS = {
+    "weapon": ("range_", "power", "move_distance_per_turn", "cost", "hp"),
+    "jammer": ("range_", "jam_turns", "move_distance_per_turn", "cost", "hp"),
+}
+INTEGER_FIELDS = {"power", "move_distance_per_turn", "cost", "hp", "jam_turns", "ammo_per_shot", "count", "stock", "speed"}
+
+
+class UnitSpecError(ValueError):
+    """
+    ユニット定義が形式に合わない場合の例外。
+
+    Attributes:
+        errors (list[str]): 「場所: 内容」の形の誤りの一覧。
+    """
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__("ユニット定義の誤り:\n" + "\n".join(f"- {e}" for e in errors))
+
+
+@dataclass(frozen=True)
+class UnitSpec:
+    """
+    検証・変換済みのユニット定義。
+
+    Attributes:
+        fortresses (tuple): 拠点の定義（FortressTemplate）。
+        enemy_units (tuple): 敵ユニットの定義（EnemyUnitTemplate）。
+    """
+    fortresses: tuple[FortressTemplate, ...] = ()
+    enemy_units: tuple[EnemyUnitTemplate, ...] = ()
+
+    @property
+    def enemy_unit(self) -> EnemyUnitTemplate:
+        """敵ユニットが1つだけの定義（作戦ごとのファイル）のユニット。"""
+        if len(self.enemy_units) != 1:
+            raise UnitSpecError([f"enemy_units: 1つだけ必要です（{len(self.enemy_units)}個）"])
+        return self.enemy_units[0]
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_number(errors: list, where: str, entity: dict, key: str, minimum: float = 0,
+                  maximum: Optional[float] = None, optional: bool = False):
+    if key not in entity:
+        if not optional:
+            errors.append(f"{where}.{key}: 必須です")
+        return
+    value = entity[key]
+    if key in INTEGER_FIELDS and not (isinstance(value, int) and not isinstance(value, bool)):
+        errors.append(f"{where}.{key}: 整数が必要です（{value!r}）")
+    elif not _is_number(value):
+        errors.append(f"{where}.{key}: 数値が必要です（{value!r}）")
+    elif value < minimum:
+        errors.append(f"{where}.{key}: {minimum}以上が必要です（{value!r}）")
+    elif maximum is not None and value > maximum:
+        errors.append(f"{where}.{key}: {maximum}以下が必要です（{value!r}）")
+
+
+def _check_string(errors: list, where: str, entity: dict, key: str):
+    if not isinstance(entity.get(key), str) or not entity[key]:
+        errors.append(f"{where}.{key}: 文字列が必要です")
+
+
+def _validate_entity(errors: list, where: str, entity, kind: str, fortress_names: Optional[set]):
+    if not isinstance(entity, dict):
+        errors.append(f"{where}: オブジェクトが必要です")
+        return
+    _check_string(errors, where, entity, "name")
+    _check_number(errors, where, entity, "latitude", minimum=-90, maximum=90)
+    _check_number(errors, where, entity, "longitude", minimum=-180, maximum=180)
+    if kind == "enemy_unit":
+        _check_string(errors, where, entity, "target_base")
+        if fortress_names is not None and entity.get("target_base") not in fortress_names:
+            errors.append(f"{where}.target_base: 既知の拠点名ではありません（{entity.get('target_base')!r}）")
+        _check_number(errors, where, entity, "speed")
+        _check_number(errors, where, entity, "retreat_cost_threshold")
+
+    ammo = entity.get("ammo", {})
+    if not isinstance(ammo, dict):
+        errors.append(f"{where}.ammo: オブジェクトが必要です")
+        ammo = {}
+    for name, props in ammo.items():
+        at = f"{where}.ammo[{name!r}]"
+        if not isinstance(props, dict):
+            errors.append(f"{at}: オブジェクトが必要です")
+            continue
+        _check_number(errors, at, props, "cost_per_unit")
+        _check_number(errors, at, props, "move_distance_per_turn", minimum=1)
+        _check_number(errors, at, props, "stock", optional=True)
+
+    weapons = entity.get("weapons")
+    if not isinstance(weapons, list):
+        errors.append(f"{where}.weapons: リストが必要です")
+        return
+    seen = set()
+    for i, weapon in enumerate(weapons):
+        at = f"{where}.weapons[{i}]"
+        if not isinstance(weapon, dict):
+            errors.append(f"{at}: オブジェクトが必要です")
+            continue
+        weapon_type = weapon.get("type", "weapon")
+        if weapon_type not in WEAPON_FIELDS:
+            errors.append(f"{at}.type: weapon か jammer が必要です（{weapon_type!r}）")
+            continue
+        _check_string(errors, at, weapon, "name")
+        if weapon.get("name") in seen:
+            errors.append(f"{at}.name: 武器名が重複しています（{weapon['name']!r}）")
+        seen.add(weapon.get("name"))
+        _check_number(errors, at, weapon, "count", minimum=1)
+        for key in WEAPON_FIELDS[weapon_type]:
+            _check_number(errors, at, weapon, key, minimum=1 if key in ("move_distance_per_turn", "hp") else 0)
+        if weapon_type == "weapon":
+            ammo_type = weapon.get("ammo_type")
+            if ammo_type is not None and ammo_type not in ammo:
+                errors.append(f"{at}.ammo_type: ammo に定義されていない弾薬です（{ammo_type!r}）")
+            _check_number(errors, at, weapon, "ammo_per_shot", optional=True)
+
+
+def validate_spec(data, fortress_names: Optional[Iterable[str]] = None) -> list[str]:
+    """
+    ユニット定義（JSONを読み込んだ辞書）を検査し、誤りの一覧を返す。誤りが無ければ空のリスト。
+
+    Args:
+        data (dict): ユニット定義。
+        fortress_names (iterable or None): 敵ユニットの target_base に使える拠点名。Noneなら検査しない。
+    """
+    if not isinstance(data, dict):
+        return ["ルート: オブジェクトが必要です"]
+    errors = []
+    if data.get("version") != SPEC_VERSION:
+        errors.append(f"version: {SPEC_VERSION} が必要です（{data.get('version')!r}）")
+    names = None if fortress_names is None else set(fortress_names)
+    for key, kind in (("fortresses", "fortress"), ("enemy_units", "enemy_unit")):
+        entities = data.get(key, [])
+        if not isinstance(entities, list):
+            errors.append(f"{key}: リストが必要です")
+            continue
+        for i, entity in enumerate(entities):
+            _validate_entity(errors, f"{key}[{i}]", entity, kind, names)
+    return errors
+
+
+def _weapon_spec(weapon: dict) -> Union[WeaponSpec, JammerSpec]:
+    if weapon.get("type", "weapon") == "jammer":
+        return intern_spec(JammerSpec(weapon["name"], weapon["range_"], weapon["jam_turns"],
+                                      weapon["move_distance_per_turn"], weapon["cost"], weapon["hp"]))
+    return intern_spec(WeaponSpec(weapon["name"], weapon["range_"], weapon["power"], weapon["move_distance_per_turn"],
+                                  weapon["cost"], weapon["hp"], weapon.get("ammo_type"), weapon.get("ammo_per_shot", 0)))
+
+
+def _entity_fields(entity: dict) -> dict:
+    ammo = entity.get("ammo", {})
+    return {
+        "name": entity["name"],
+        "latitude": entity["latitude"],
+        "longitude": entity["longitude"],
+        "weapons": tuple((_weapon_spec(w), w["count"]) for w in entity["weapons"]),
+        "ammo_stock": tuple((name, props["stock"]) for name, props in ammo.items() if "stock" in props),
+        "ammo_defs": tuple(ExpendableWeapon(name, props["cost_per_unit"], props["move_distance_per_turn"])
+                           for name, props in ammo.items()),
+    }
+
+
+def compile_spec(data: dict, fortress_names: Optional[Iterable[str]] = None) -> UnitSpec:
+    """
+    ユニット定義を検査し、拠点・敵ユニットの定義（テンプレート）に変換する。
+
+    Raises:
+        UnitSpecError: 定義に誤りがある場合。
+    """
+    errors = validate_spec(data, fortress_names)
+    if errors:
+        raise UnitSpecError(errors)
+    return UnitSpec(
+        fortresses=tuple(FortressTemplate(**_entity_fields(f)) for f in data.get("fortresses", [])),
+        enemy_units=tuple(
+            EnemyUnitTemplate(**_entity_fields(u), target_base=u["target_base"], speed=u["speed"],
+                              retreat_cost_threshold=u["retreat_cost_threshold"])
+            for u in data.get("enemy_units", [])
+        ),
+    )
+
+
+# 内容のハッシュから変換済みの定義へのキャッシュ。同じ内容なら検査・変換をやり直さない
+_compiled: dict[str, UnitSpec] = {}
+# ファイルのパスから (更新時刻, サイズ, 内容のハッシュ) へのキャッシュ。変わっていなければファイルも読まない
+_files: dict[str, tuple] = {}
+_cache_lock = threading.Lock()
+
+
+def parse_spec(text: Union[str, bytes], fortress_names: Optional[Iterable[str]] = None) -> UnitSpec:
+    """
+    JSON文字列のユニット定義を検査・変換する。同じ内容は1回だけ検査する（fortress_names を渡した場合は毎回検査する）。
+
+    Raises:
+        UnitSpecError: JSONとして読めない、または定義に誤りがある場合。
+    """
+    raw = text.encode("utf-8") if isinstance(text, str) else text
+    digest = hashlib.sha256(raw).hexdigest()
+    if fortress_names is None:
+        with _cache_lock:
+            if digest in _compiled:
+                return _compiled[digest]
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise UnitSpecError([f"JSONとして読めません: {e}"]) from e
+    spec = compile_spec(data, fortress_names)
+    with _cache_lock:
+        _compiled[digest] = spec
+    return spec
+
+
+def load_spec(path: str) -> UnitSpec:
+    """ユニット定義のファイルを読む。ファイルが変わっていなければ前回の変換結果を返す。"""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    with _cache_lock:
+        cached = _files.get(key)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return _compiled[cached[2]]
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        spec = parse_spec(raw)
+    except UnitSpecError as e:
+        raise UnitSpecError([f"{path}: {error}" for error in e.errors]) from None
+    with _cache_lock:
+        _files[key] = (stat.st_mtime_ns, stat.st_size, hashlib.sha256(raw).hexdigest())
+    return spec
+
+
+def _dump_entity(template: Union[FortressTemplate, EnemyUnitTemplate]) -> dict:
+    entity = {"name": template.name, "latitude": template.latitude, "longitude": template.longitude}
+    if isinstance(template, EnemyUnitTemplate):
+        entity.update(target_base=template.target_base, speed=template.speed,
+                      retreat_cost_threshold=template.retreat_cost_threshold)
+    stock = dict(template.ammo_stock)
+    ammo_defs = {ammo_def.name: ammo_def for ammo_def in template.ammo_defs}
+    # 弾薬は在庫の順に並べる（プロンプトに出る ammo_stock の順序を保つ）
+    entity["ammo"] = {}
+    for name in [*stock, *(name for name in ammo_defs if name not in stock)]:
+        ammo_def = ammo_defs[name]
+        props = {"cost_per_unit": ammo_def.cost_per_unit, "move_distance_per_turn": ammo_def.move_distance_per_turn}
+        if name in stock:
+            props["stock"] = stock[name]
+        entity["ammo"][name] = props
+    entity["weapons"] = []
+    for spec, count in template.weapons:
+        if isinstance(spec, JammerSpec):
+            weapon = {"type": "jammer", "name": spec.name, "count": count, "range_": spec.range_,
+                      "jam_turns": spec.jam_turns}
+        else:
+            weapon = {"type": "weapon", "name": spec.name, "count": count, "range_": spec.range_,
+                      "power": spec.power, "ammo_type": spec.ammo_type, "ammo_per_shot": spec.ammo_per_shot}
+        weapon.update(move_distance_per_turn=spec.move_distance_per_turn, cost=spec.cost, hp=spec.hp)
+        entity["weapons"].append(weapon)
+    return entity
+
+
+def dump_spec(fortresses: Iterable[FortressTemplate] = (), enemy_units: Iterable[EnemyUnitTemplate] = ()) -> dict:
+    """拠点・敵ユニットの定義をユニット定義の辞書にする（compile_spec の逆）。"""
+    data = {"version": SPEC_VERSION}
+    fortresses, enemy_units = list(fortresses), list(enemy_units)
+    if fortresses:
+        data["fortresses"] = [_dump_entity(f) for f in fortresses]
+    if enemy_units:
+        data["enemy_units"] = [_dump_entity(u) for u in enemy_units]
+    return data
+
+
+def write_spec(data: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ユニット定義（JSON）の検査と、従来の敵ユニットの .py からの変換")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    validate_parser = subparsers.add_parser("validate", help="ユニット定義のファイルを検査する")
+    validate_parser.add_argument("paths", nargs="+")
+    convert_parser = subparsers.add_parser("convert", help="results/enemy_units/<作戦名>.py を <作戦名>.json に変換する")
+    convert_parser.add_argument("code_names", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "validate":
+        from src.definitions.predefined_japanese_defenses import FORTRESS_TEMPLATES
+
+        failed = False
+        for path in args.paths:
+            with open(path, encoding="utf-8") as f:
+                errors = validate_spec(json.load(f), [t.name for t in FORTRESS_TEMPLATES])
+            print(f"{'❌' if errors else '✅'} {path}")
+            for error in errors:
+                print(f"  - {error}")
+            failed = failed or bool(errors)
+        sys.exit(1 if failed else 0)
+    else:
+        from src.simulations.templates import UNIT_DIR, load_module_template
+
+        for code_name in args.code_names:
+            path = os.path.join(UNIT_DIR, f"{code_name}.json")
+            write_spec(dump_spec(enemy_units=[load_module_template(code_name)]), path)
+            print(f"✅ {path}")
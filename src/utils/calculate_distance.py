@@ -1,16 +1,31 @@
 import math
 
+import numpy as np
 
-def calc_distance(lat1,lon1,lat2,lon2):
-    R = 6371
-    distance = R * math.acos(
+R = 6371  # 地球の半径 (km)
+
+
+def calc_distance(lat1,lon1,lat2,lon2, method="acos"):
+    if method == "haversine":
+        return haversine_distance(lat1, lon1, lat2, lon2)
+    # 丸め誤差で acos の定義域 [-1, 1] を超えないようにクリップする
+    cos_angle = (
         math.sin(math.radians(lat1))*
         math.sin(math.radians(lat2))+
         math.cos(math.radians(lat1))*
         math.cos(math.radians(lat2))*
         math.cos(math.radians(lon1)-math.radians(lon2)))
+    distance = R * math.acos(min(1.0, max(-1.0, cos_angle)))
     return distance
 
+def haversine_distance(lat1, lon1, lat2, lon2):
+    # 近距離でも桁落ちしにくいハバーサイン公式
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    a = (math.sin((lat2_rad - lat1_rad) / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * R * math.asin(math.sqrt(min(1.0, a)))
+
 def calculate_bearing(lat1, lon1, lat2, lon2):
     # ラジアンに変換
     lat1_rad = math.radians(lat1)
@@ -26,7 +41,6 @@ def calculate_bearing(lat1, lon1, lat2, lon2):
     return bearing_deg
 
 def move_point(lat, lon, distance_km, bearing_deg):
-    R = 6371  # 地球の半径 (km)
     lat1 = math.radians(lat)
     lon1 = math.radians(lon)
     bearing = math.radians(bearing_deg)
@@ -48,3 +62,42 @@ def move_towards_target(lat1, lon1, lat2, lon2, distance_km):
     new_lat, new_lon = move_point(lat1, lon1, distance_km, bearing)
     return new_lat, new_lon
 
+
+# 以下は配列をまとめて処理するバッチ版。引数はNumPyのブロードキャスト規則に従う
+# （例: 出発地の配列 (N,) と目標地の配列 (M, 1) を渡すと (M, N) の結果になる）。
+# NumPyの三角関数は math と最下位ビットで異なることがあるため、エンジンは履歴やプロンプトに出る距離・位置には
+# スカラー版を使い、バッチ版は半径内の絞り込み（SpatialIndex.within）にだけ使う。ほかは分析用の任意の補助関数。
+
+def calc_distance_batch(lat1, lon1, lat2, lon2, method="acos"):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    if method == "haversine":
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    cos_angle = np.sin(lat1) * np.sin(lat2) + np.cos(lat1) * np.cos(lat2) * np.cos(lon1 - lon2)
+    return R * np.arccos(np.clip(cos_angle, -1.0, 1.0))
+
+def calculate_bearing_batch(lat1, lon1, lat2, lon2):
+    lat1_rad = np.radians(np.asarray(lat1, dtype=float))
+    lat2_rad = np.radians(np.asarray(lat2, dtype=float))
+    delta_lon = np.radians(np.asarray(lon2, dtype=float) - np.asarray(lon1, dtype=float))
+
+    x = np.sin(delta_lon) * np.cos(lat2_rad)
+    y = np.cos(lat1_rad) * np.sin(lat2_rad) - np.sin(lat1_rad) * np.cos(lat2_rad) * np.cos(delta_lon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+def move_point_batch(lat, lon, distance_km, bearing_deg):
+    lat1 = np.radians(np.asarray(lat, dtype=float))
+    lon1 = np.radians(np.asarray(lon, dtype=float))
+    bearing = np.radians(np.asarray(bearing_deg, dtype=float))
+    angle = np.asarray(distance_km, dtype=float) / R
+
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(angle) + np.cos(lat1) * np.sin(angle) * np.cos(bearing))
+    lon2 = lon1 + np.arctan2(
+        np.sin(bearing) * np.sin(angle) * np.cos(lat1),
+        np.cos(angle) - np.sin(lat1) * np.sin(lat2)
+    )
+    return np.degrees(lat2), np.degrees(lon2)
+
+def move_towards_target_batch(lat1, lon1, lat2, lon2, distance_km):
+    bearing = calculate_bearing_batch(lat1, lon1, lat2, lon2)
+    return move_point_batch(lat1, lon1, distance_km, bearing)
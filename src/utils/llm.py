@@ -1,13 +1,256 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
 import os
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Optional
 
-from openai import OpenAI
+from openai import APIConnectionError, AsyncOpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from src.utils import llm_cache, llm_telemetry
 
-def call_chatgpt(messages: list[dict]) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=messages,
-        temperature=0.7
-    )
-    return response.choices[0].message.content.strip()
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+TEMPERATURE = 0.7
+MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+RETRYABLE_STATUS = {408, 409, 429}
+
+# 実行中のパイプラインのステージ（scenario, enemy_unit, simulation, analysis, meta_review など）
+current_stage = contextvars.ContextVar("llm_stage", default=None)
+# 計測値に付ける呼び出し元のタグ（commander, name, turn など）
+current_tags = contextvars.ContextVar("llm_tags", default={})
+
+
+@contextlib.contextmanager
+def llm_context(stage: Optional[str] = None, **tags):
+    """
+    このブロック（デコレータとして使えば関数）の中のLLM呼び出しのステージとタグを設定する。
+    ステージごとに応答キャッシュのモードが決まり（src.utils.llm_cache.stage_mode）、
+    ステージとタグは計測値（src.utils.llm_telemetry）に記録される。外側のブロックのタグは引き継ぐ。
+    """
+    stage_token = current_stage.set(stage or current_stage.get())
+    tags_token = current_tags.set({**current_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        current_tags.reset(tags_token)
+        current_stage.reset(stage_token)
+
+
+@dataclass
+class Completion:
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: int = 0
+
+
+class TokenBucket:
+    """
+    非同期のトークンバケット。1リクエストごとに1トークンを消費し、足りなければ補充されるまで待つ。
+
+    Attributes:
+        rate (float): 1秒あたりの補充トークン数。
+        capacity (float): バケットの容量（連続で送れるリクエスト数）。
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def is_retryable(error: Exception) -> bool:
+    """429・5xx・接続エラー・タイムアウトなら再試行する。"""
+    if isinstance(error, APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def retry_delay(error: Exception, attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    再試行までの待ち時間。Retry-Afterヘッダがあればそれに従い、なければジッター付きの指数バックオフ。
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AsyncLLMClient:
+    """
+    接続プール付きの非同期LLMクライアント。
+    同時実行数をセマフォで、送信レートをトークンバケットで制限し、429/5xxはジッター付き指数バックオフで再試行する。
+    asyncioの同期プリミティブと接続プールは1つのイベントループに結び付くため、ループごとに1つ作る。
+
+    Attributes:
+        max_in_flight (int): 同時に送るリクエストの上限。
+        requests_per_minute (float): 1分あたりのリクエスト数の上限。
+        max_retries (int): 再試行の最大回数。
+        timeout (float): 1リクエストのタイムアウト（秒）。
+    """
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 max_retries: int = MAX_RETRIES, timeout: float = TIMEOUT, client=None):
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.bucket = TokenBucket(requests_per_minute / 60, capacity=max_in_flight)
+        self._client = client
+
+    @property
+    def client(self):
+        # APIキーが無い環境でもimportできるよう、最初のリクエストまでクライアントを作らない。
+        # 同じクライアント（とその接続プール）をこのループの全リクエストで使い回す。
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=self.timeout, max_retries=0)
+        return self._client
+
+    async def chat(self, messages: list[dict], model: Optional[str] = None, temperature: Optional[float] = None) -> str:
+        """
+        チャット補完を1回実行し、応答のテキストを返す。
+
+        Args:
+            messages (list[dict]): 送信するメッセージ。
+            model (str or None): モデル名。Noneなら MODEL。
+            temperature (float or None): 温度。Noneなら TEMPERATURE。
+
+        Returns:
+            str: 応答のテキスト。
+        """
+        return (await self.complete(messages, model=model, temperature=temperature)).text
+
+    async def complete(self, messages: list[dict], model: Optional[str] = None,
+                       temperature: Optional[float] = None) -> Completion:
+        """chat と同じだが、トークン数と再試行の回数も返す。"""
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                await self.bucket.acquire()
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=model or MODEL,
+                        messages=messages,
+                        temperature=TEMPERATURE if temperature is None else temperature,
+                    )
+                    usage = getattr(response, "usage", None)
+                    return Completion(
+                        text=response.choices[0].message.content.strip(),
+                        prompt_tokens=getattr(usage, "prompt_tokens", None),
+                        completion_tokens=getattr(usage, "completion_tokens", None),
+                        retries=attempt,
+                    )
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        e.llm_retries = attempt
+                        raise
+                    delay = retry_delay(e, attempt)
+            # 待機中はセマフォを手放し、他のリクエストを先に通す
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+_clients = weakref.WeakKeyDictionary()
+_background_loop = None
+_background_lock = threading.Lock()
+
+
+def get_async_client() -> AsyncLLMClient:
+    """実行中のイベントループに対応するクライアントを返す。"""
+    loop = asyncio.get_running_loop()
+    if loop not in _clients:
+        _clients[loop] = AsyncLLMClient()
+    return _clients[loop]
+
+
+async def acall_chatgpt(messages: list[dict], model: Optional[str] = None, temperature: Optional[float] = None) -> str:
+    model = model or MODEL
+    temperature = TEMPERATURE if temperature is None else temperature
+    stage = current_stage.get()
+    tags = {"stage": stage, **current_tags.get()}
+    mode = llm_cache.stage_mode(stage)
+    cache = key = None
+    start = time.perf_counter()
+    if mode != llm_cache.OFF:
+        cache = llm_cache.get_cache()
+        key = llm_cache.cache_key(model, messages, temperature)
+        cached = cache.get(key)
+        if cached is not None:
+            llm_telemetry.record_call(model, tags, time.perf_counter() - start, cache_hit=True)
+            return cached
+
+    try:
+        completion = await get_async_client().complete(messages, model=model, temperature=temperature)
+    except Exception as e:
+        llm_telemetry.record_call(model, tags, time.perf_counter() - start,
+                                  retries=getattr(e, "llm_retries", 0), error=type(e).__name__)
+        raise
+    llm_telemetry.record_call(model, tags, time.perf_counter() - start, prompt_tokens=completion.prompt_tokens,
+                              completion_tokens=completion.completion_tokens, retries=completion.retries)
+    if mode == llm_cache.READ_THROUGH:
+        cache.put(key, completion.text)
+    return completion.text
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """同期APIから使う、デーモンスレッドで動くイベントループを返す。"""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+            _background_loop = loop
+    return _background_loop
+
+
+def run_coroutine(coro):
+    """
+    コルーチンを共有のイベントループで実行し、結果を待つ。
+    呼び出し元のcontextvarsを引き継ぐので、どのスレッドから呼んでも同じ同時実行数・レート制限を共有する。
+    """
+    loop = get_background_loop()
+    context = contextvars.copy_context()
+    future = concurrent.futures.Future()
+
+    def start():
+        task = loop.create_task(coro)
+
+        def done(task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        task.add_done_callback(done)
+
+    loop.call_soon_threadsafe(start, context=context)
+    return future.result()
+
+
+def call_chatgpt(messages: list[dict], model: Optional[str] = None, temperature: Optional[float] = None) -> str:
+    return run_coroutine(acall_chatgpt(messages, model=model, temperature=temperature))
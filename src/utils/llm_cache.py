@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+OFF = "off"
+READ_THROUGH = "read-through"
+READ_ONLY = "read-only"
+MODES = (OFF, READ_THROUGH, READ_ONLY)
+
+# ステージごとの既定のモード。入力が変わらない限り同じ出力で困らない後段の分析だけ既定でキャッシュする
+DEFAULT_STAGE_MODES = {
+    "analysis": READ_THROUGH,
+    "meta_review": READ_THROUGH,
+}
+
+
+def cache_key(model: str, messages: list[dict], temperature: float) -> str:
+    """(model, messages, temperature) のSHA-256をキャッシュのキーにする。"""
+    payload = json.dumps({"model": model, "messages": messages, "temperature": temperature},
+                         ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def stage_mode(stage: Optional[str]) -> str:
+    """
+    ステージのキャッシュモードを返す。
+    LLM_CACHE_MODE_<STAGE>、LLM_CACHE_MODE、DEFAULT_STAGE_MODES の順に参照し、どれも無ければ off。
+    """
+    mode = None
+    if stage:
+        mode = os.getenv(f"LLM_CACHE_MODE_{stage.upper()}")
+    mode = mode or os.getenv("LLM_CACHE_MODE") or DEFAULT_STAGE_MODES.get(stage, OFF)
+    if mode not in MODES:
+        raise ValueError(f"不明なキャッシュモードです: {mode}（{', '.join(MODES)} のいずれか）")
+    return mode
+
+
+class ResponseCache:
+    """
+    SQLiteに保存するLLM応答のキャッシュ。合計サイズが max_bytes を超えたら、最後に使われたのが古いものから消す。
+
+    Attributes:
+        path (str): SQLiteファイルのパス。
+        max_bytes (int): 保存する応答の合計サイズの上限（バイト）。
+    """
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        # 合計サイズは開いたときに1回だけ集計し、以降は追加・削除のたびに差分で更新する
+        self._total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, response: str):
+        size = len(response.encode("utf-8"))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _evict(self):
+        excess = self._total_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        stale = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self._total_bytes -= freed
+
+    def close(self):
+        self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """プロセスで共有するキャッシュを返す。最初に使うときにファイルを開く。"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+METRICS_PATH = os.getenv("LLM_METRICS_PATH", ".cache/llm_metrics.jsonl")
+
+# 100万トークンあたりの料金（USD）: (入力, 出力)
+PRICES_PER_MILLION = {
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+_write_lock = threading.Lock()
+
+
+def estimate_cost(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> Optional[float]:
+    """料金表にあるモデルなら、トークン数から料金（USD）を概算する。"""
+    prices = PRICES_PER_MILLION.get(model)
+    if prices is None or prompt_tokens is None or completion_tokens is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def record_call(model: str, tags: dict, latency_s: float, prompt_tokens: Optional[int] = None,
+                completion_tokens: Optional[int] = None, retries: int = 0, cache_hit: bool = False,
+                error: Optional[str] = None, path: Optional[str] = None):
+    """
+    LLM呼び出し1回分の計測値をJSONLの1行として追記する。path（既定は LLM_METRICS_PATH）が空なら何もしない。
+
+    Args:
+        model (str): モデル名。
+        tags (dict): 呼び出し元のタグ（stage, commander, name, turn など）。
+        latency_s (float): 再試行・待機を含む所要時間（秒）。
+        prompt_tokens (int or None): 入力トークン数。
+        completion_tokens (int or None): 出力トークン数。
+        retries (int): 再試行の回数。
+        cache_hit (bool): 応答キャッシュから返したかどうか。
+        error (str or None): 失敗した場合の例外の名前。
+    """
+    path = METRICS_PATH if path is None else path
+    if not path:
+        return
+    record = {
+        "ts": time.time(),
+        "model": model,
+        **tags,
+        "latency_s": round(latency_s, 4),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "retries": retries,
+        "cache_hit": cache_hit,
+        "cost_usd": None if cache_hit else estimate_cost(model, prompt_tokens, completion_tokens),
+        "error": error,
+    }
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _write_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def load_records(path: str = METRICS_PATH) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records: list[dict], keys: list[str]) -> list[dict]:
+    """
+    計測値を keys の組み合わせごとに集計する。
+
+    Returns:
+        list[dict]: 呼び出し数、キャッシュヒット数、エラー数、トークン数、所要時間、再試行数、料金の合計と平均。
+    """
+    groups = defaultdict(list)
+    for record in records:
+        groups[tuple(record.get(key) for key in keys)].append(record)
+
+    rows = []
+    for group_key, group in groups.items():
+        calls = len(group)
+        prompt_tokens = sum(r["prompt_tokens"] or 0 for r in group)
+        latency = sum(r["latency_s"] for r in group)
+        rows.append({
+            **dict(zip(keys, group_key)),
+            "calls": calls,
+            "cache_hits": sum(bool(r["cache_hit"]) for r in group),
+            "errors": sum(bool(r["error"]) for r in group),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(r["completion_tokens"] or 0 for r in group),
+            "mean_prompt_tokens": round(prompt_tokens / calls, 1),
+            "latency_s": round(latency, 3),
+            "mean_latency_s": round(latency / calls, 3),
+            "retries": sum(r["retries"] for r in group),
+            "cost_usd": round(sum(r["cost_usd"] or 0 for r in group), 4),
+        })
+    return sorted(rows, key=lambda row: tuple(_sort_key(row[k]) for k in keys))
+
+
+def _sort_key(value):
+    # ターン番号は数値順、名前は文字列順、タグの無いものは最後に並べる
+    if value is None:
+        return (2, "")
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM呼び出しの計測値を集計する")
+    parser.add_argument("path", nargs="?", default=METRICS_PATH)
+    parser.add_argument("--by", default="stage", help="集計のキー（カンマ区切り。例: stage,commander,turn）")
+    args = parser.parse_args()
+
+    keys = [key.strip() for key in args.by.split(",") if key.strip()]
+    rows = summarize(load_records(args.path), keys)
+    columns = list(rows[0]) if rows else keys
+    print("\t".join(columns))
+    for row in rows:
+        print("\t".join("-" if row[c] is None else str(row[c]) for c in columns))
@@ -0,0 +1,208 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from typing import Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間のロックをしない
+    fcntl = None
+
+SCENARIOS_PATH = os.getenv("SCENARIOS_PATH", "results/scenarios.jsonl")
+
+INDEX_KEYS = ("作戦名", "シナリオID")
+
+
+def _line_hash(line: bytes) -> str:
+    return hashlib.sha1(line).hexdigest()
+
+
+class ScenarioStore:
+    """
+    scenarios.jsonl（1行1シナリオ）を、作戦名・シナリオIDからその行のバイト位置への索引付きで読み書きするクラス。
+    索引は <path>.idx に保存し、次に開いたときは索引した後に追記された行だけを読む。
+    ファイルが書き換えられていた（索引した最後の行が変わっていた）場合は索引を作り直す。
+    追記はファイルロック（flock）をかけて1行ずつ書くので、複数のプロセスから同時に追記してよい。
+
+    同じ作戦名のシナリオが複数ある場合、get は最初のものを返す。
+
+    Attributes:
+        path (str): JSON Linesのパス。
+        index_path (str): 索引のパス。
+    """
+    def __init__(self, path: str = SCENARIOS_PATH):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.lock = threading.Lock()
+        self._offsets = {key: {} for key in INDEX_KEYS}
+        self._size = 0
+        self._last = None
+        self._stat = None
+        with self.lock:
+            self._load_index()
+            self._refresh()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        self._offsets = {key: index["offsets"].get(key, {}) for key in INDEX_KEYS}
+        self._size = index["size"]
+        self._last = index["last"]
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"size": self._size, "last": self._last, "offsets": self._offsets}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _reset(self):
+        self._offsets = {key: {} for key in INDEX_KEYS}
+        self._size = 0
+        self._last = None
+        self._stat = None
+
+    def _is_prefix_unchanged(self, f) -> bool:
+        """索引した最後の行が今も同じ位置に同じ内容であるかどうか。"""
+        if self._last is None:
+            return self._size == 0
+        offset, digest = self._last
+        f.seek(offset)
+        return _line_hash(f.readline()) == digest
+
+    def _refresh(self):
+        """索引の後に追記された行を索引に加える。ファイルが書き換えられていれば最初から索引し直す。"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._size:
+                self._reset()
+            return
+        if (stat.st_size, stat.st_mtime_ns) == self._stat:
+            return
+        size = stat.st_size
+        with open(self.path, "rb") as f:
+            if size < self._size or not self._is_prefix_unchanged(f):
+                self._reset()
+            f.seek(self._size)
+            offset = self._size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 書き込み途中の行は次回に回す
+                    break
+                if line.strip():
+                    self._add(offset, json.loads(line), line)
+                offset += len(line)
+        self._stat = (stat.st_size, stat.st_mtime_ns) if offset == size else None
+        if offset != self._size:
+            self._size = offset
+            with contextlib.suppress(OSError):
+                self._save_index()
+
+    def _add(self, offset: int, record: dict, line: bytes):
+        for key in INDEX_KEYS:
+            value = record.get(key)
+            if value is not None:
+                self._offsets[key].setdefault(str(value), []).append(offset)
+        self._last = [offset, _line_hash(line)]
+
+    def _read_at(self, offset: int) -> dict:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def _find(self, key: str, value: str) -> Optional[dict]:
+        with self.lock:
+            self._refresh()
+            offsets = self._offsets[key].get(value)
+        return self._read_at(offsets[0]) if offsets else None
+
+    def get(self, code_name: str) -> Optional[dict]:
+        """作戦名のシナリオを返す。無ければNone。"""
+        return self._find("作戦名", code_name)
+
+    def get_by_id(self, scenario_id: str) -> Optional[dict]:
+        """シナリオIDのシナリオを返す。無ければNone。"""
+        return self._find("シナリオID", scenario_id)
+
+    def names(self) -> list[str]:
+        """作戦名をファイルの順に返す。"""
+        with self.lock:
+            self._refresh()
+            return sorted(self._offsets["作戦名"], key=lambda name: self._offsets["作戦名"][name][0])
+
+    def __contains__(self, code_name: str) -> bool:
+        with self.lock:
+            self._refresh()
+            return code_name in self._offsets["作戦名"]
+
+    def __iter__(self) -> Iterator[dict]:
+        """全シナリオをファイルの順に返す。"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def by_name(self) -> dict[str, dict]:
+        """作戦名ごとのシナリオ（同じ作戦名が複数あれば最初のもの）。"""
+        scenarios = {}
+        for scenario in self:
+            if scenario.get("作戦名") is not None:
+                scenarios.setdefault(scenario["作戦名"], scenario)
+        return scenarios
+
+    @contextlib.contextmanager
+    def _locked_file(self, mode: str):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self.lock, open(self.path, mode) as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, scenario: dict):
+        """シナリオを1件追記する。"""
+        self.extend([scenario])
+
+    def extend(self, scenarios: Iterable[dict]):
+        """シナリオをまとめて追記する。他のプロセスの追記と行が混ざらないよう、ロックをかけて書く。"""
+        lines = [(json.dumps(s, ensure_ascii=False) + "\n").encode("utf-8") for s in scenarios]
+        with self._locked_file("ab") as f:
+            f.seek(0, os.SEEK_END)
+            f.write(b"".join(lines))
+            f.flush()
+        with self.lock:
+            self._refresh()
+
+    def rewrite(self, scenarios: Iterable[dict]):
+        """ファイルの中身をscenariosで置き換える。"""
+        lines = [(json.dumps(s, ensure_ascii=False) + "\n").encode("utf-8") for s in scenarios]
+        with self._locked_file("r+b" if os.path.exists(self.path) else "wb") as f:
+            f.seek(0)
+            f.truncate()
+            f.write(b"".join(lines))
+            f.flush()
+        with self.lock:
+            self._reset()
+            self._refresh()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = SCENARIOS_PATH) -> ScenarioStore:
+    """プロセスで共有するパスごとのストアを返す。最初に使うときに索引を読む。"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = ScenarioStore(path)
+        return _stores[path]
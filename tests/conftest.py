@@ -0,0 +1,49 @@
+import pytest
+
+from src.definitions import predefined_japanese_defenses as defenses
+from src.simulations.models import (ColumnarStock, EnemyUnit, ExpendableWeapon,
+                                    Fortress, Jammer, Simulation, Weapon)
+from src.simulations.policies import (RuleBasedEnemyCommander,
+                                      RuleBasedFortressCommander)
+from src.simulations.templates import load_unit_template
+
+missile = ExpendableWeapon("Missile", cost_per_unit=1, move_distance_per_turn=100)
+
+
+def make_weapon(name, power=60, move_distance_per_turn=100):
+    return Weapon(name, range_=300, power=power, move_distance_per_turn=move_distance_per_turn,
+                  cost=100, hp=100, ammo_type="Missile", ammo_per_shot=1)
+
+
+@pytest.fixture
+def make_simulation():
+    """拠点2つ（後方の拠点は移送が遅い）と Jammer を持つ敵ユニット1つの、ルールベースで進むシミュレーションを作る関数。"""
+    def make(columnar=False, observers=(), fortress_commander_cls=RuleBasedFortressCommander):
+        stock = ColumnarStock.from_weapon_stock if columnar else dict
+        target = Fortress("Target", 28.3589, 129.4953, stock({"SAM": [make_weapon("SAM") for _ in range(12)]}),
+                          ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile})
+        rear = Fortress("Rear", 26.1958, 127.6458, stock({"Slow": [make_weapon("Slow", move_distance_per_turn=80)
+                                                                    for _ in range(6)]}),
+                        ammo_stock={"Missile": 80}, ammo_defs={"Missile": missile})
+        unit = EnemyUnit("Enemy", target, 30.0, 130.5, speed=60,
+                         weapon_stock=stock({
+                             "Jet": [make_weapon("Jet", power=40) for _ in range(16)],
+                             "ECM": [Jammer("ECM", range_=300, jam_turns=2, move_distance_per_turn=100, cost=50, hp=50)],
+                         }),
+                         ammo_stock={"Missile": 60}, ammo_defs={"Missile": missile}, retreat_cost_threshold=10 ** 6)
+        return Simulation([target, rear], unit, {"目的": "test"}, max_turns=8, observers=list(observers),
+                          fortress_commander_cls=fortress_commander_cls,
+                          enemy_commander_cls=RuleBasedEnemyCommander)
+    return make
+
+
+@pytest.fixture
+def make_unit_simulation():
+    """定義済みの拠点と results/enemy_units の作戦の敵ユニットで、ルールベースで進むシミュレーションを作る関数。"""
+    def make(code_name, columnar=False):
+        fortresses = defenses.make_fortresses(columnar)
+        unit = load_unit_template(code_name).instantiate(fortresses, columnar)
+        return Simulation(fortresses, unit, {"目的": "test"}, max_turns=6, observers=[],
+                          fortress_commander_cls=RuleBasedFortressCommander,
+                          enemy_commander_cls=RuleBasedEnemyCommander)
+    return make
@@ -0,0 +1,140 @@
+import pytest
+
+from src.simulations.models import (ColumnarStock, EnemyUnit, ExpendableWeapon,
+                                    Fortress, Jammer, Weapon,
+                                    resolve_attack_plan)
+
+TURN = 3
+
+
+def gun():
+    return Weapon("Gun", range_=100, power=50, move_distance_per_turn=100, cost=10, hp=100,
+                  ammo_type="Shell", ammo_per_shot=1)
+
+
+def jammer():
+    return Jammer("Jammer", range_=100, jam_turns=2, move_distance_per_turn=100, cost=30, hp=50)
+
+
+def jet():
+    return Weapon("Jet", range_=100, power=40, move_distance_per_turn=100, cost=10, hp=80,
+                  ammo_type="Missile", ammo_per_shot=1)
+
+
+def ship():
+    return Weapon("Ship", range_=100, power=40, move_distance_per_turn=100, cost=500, hp=100,
+                  ammo_type="Missile", ammo_per_shot=1)
+
+
+def make_sides(columnar=False, shells=100):
+    def stock(weapons):
+        return ColumnarStock.from_weapon_stock(weapons) if columnar else weapons
+
+    base = Fortress("Base", 26.0, 127.0, stock({"Gun": [gun() for _ in range(3)], "Jammer": [jammer()]}),
+                    ammo_stock={"Shell": shells}, ammo_defs={"Shell": ExpendableWeapon("Shell", 1, 100)})
+    unit = EnemyUnit("Enemy", base, 26.5, 127.0, speed=10,
+                     weapon_stock=stock({"Jet": [jet() for _ in range(4)], "Ship": [ship()]}),
+                     ammo_stock={"Missile": 10}, ammo_defs={"Missile": ExpendableWeapon("Missile", 1, 100)},
+                     retreat_cost_threshold=10 ** 6)
+    return base, unit
+
+
+def hp(stock, name):
+    return [w.hp for w in stock[name]]
+
+
+def jammed_until(stock, name):
+    return [w.jammed_until for w in stock[name]]
+
+
+@pytest.fixture(params=[False, True], ids=["list", "columnar"])
+def columnar(request):
+    return request.param
+
+
+def test_entries_for_the_same_target_merge_into_one_volley(columnar):
+    base, unit = make_sides(columnar)
+    events = resolve_attack_plan(base, unit, [("Jet", "Gun", 1), ("Ship", "Gun", 1), ("Jet", "Gun", 1)],
+                                 distance=50, current_turn=TURN)
+    assert events == [("attack", "Jet", 1), ("attack", "Ship", 0)]
+    # 2回の50ダメージを1回の100ダメージとして先頭から繰り越す
+    assert hp(unit.weapon_stock, "Jet") == [0, 60, 80, 80]
+    assert hp(unit.weapon_stock, "Ship") == [50]
+    assert unit.current_cost == 10
+    assert base.ammo_stock["Shell"] == 97
+
+
+def test_matches_hand_computed_per_entry_resolution(columnar):
+    # 以前の項目ごとのループでの結果（手計算）:
+    #   Gun x2 -> Jet に100: Jet[0] 破壊、Jet[1] 80->60       「destroyed 1」
+    #   Jammer x1 -> 稼働中で未妨害の先頭 Jet[1] を TURN+2 まで妨害 「jammed」
+    #   Gun x1 -> Jet に50: Jet[1] 60->10                    「destroyed 0」
+    #   Gun x1 -> Ship に50: Ship 100->50                    「destroyed 0」
+    base, unit = make_sides(columnar)
+    plan = [("Jet", "Gun", 2), ("Jet", "Jammer", 1), ("Jet", "Gun", 1), ("Ship", "Gun", 1)]
+    events = resolve_attack_plan(base, unit, plan, distance=50, current_turn=TURN)
+    assert events == [("attack", "Jet", 1), ("jam", "Jammer", 0), ("attack", "Jet", 0), ("attack", "Ship", 0)]
+    assert hp(unit.weapon_stock, "Jet") == [0, 10, 80, 80]
+    assert jammed_until(unit.weapon_stock, "Jet") == [0, TURN + 2, 0, 0]
+    assert hp(unit.weapon_stock, "Ship") == [50]
+    assert unit.weapon_stock.active_count() == 4
+    assert unit.current_cost == 10
+    assert base.ammo_stock["Shell"] == 96
+
+
+def test_jam_is_applied_in_plan_order_relative_to_volleys(columnar):
+    # 妨害が先: 先頭の Jet[0] が妨害された後、斉射で破壊される
+    base, unit = make_sides(columnar)
+    resolve_attack_plan(base, unit, [("Jet", "Jammer", 1), ("Jet", "Gun", 2)], distance=50, current_turn=TURN)
+    assert jammed_until(unit.weapon_stock, "Jet") == [TURN + 2, 0, 0, 0]
+    assert hp(unit.weapon_stock, "Jet") == [0, 60, 80, 80]
+
+    # 斉射が先: 妨害は破壊されずに残った先頭の Jet[1] にかかる
+    base, unit = make_sides(columnar)
+    resolve_attack_plan(base, unit, [("Jet", "Gun", 2), ("Jet", "Jammer", 1)], distance=50, current_turn=TURN)
+    assert jammed_until(unit.weapon_stock, "Jet") == [0, TURN + 2, 0, 0]
+    assert hp(unit.weapon_stock, "Jet") == [0, 60, 80, 80]
+
+
+def test_jammed_weapons_do_not_fire_until_the_jam_expires(columnar):
+    base, unit = make_sides(columnar)
+    base.weapon_stock.jam("Gun", 3, current_turn=TURN, jam_turns=2)
+    assert resolve_attack_plan(base, unit, [("Jet", "Gun", 3)], 50, current_turn=TURN + 1) == [("attack", "Jet", 0)]
+    assert base.ammo_stock["Shell"] == 100
+    assert resolve_attack_plan(base, unit, [("Jet", "Gun", 3)], 50, current_turn=TURN + 2) == [("attack", "Jet", 1)]
+    assert base.ammo_stock["Shell"] == 97
+
+
+def test_distance_ammo_and_can_fire_gate_firing(columnar):
+    base, unit = make_sides(columnar)
+    plan = [("Jet", "Gun", 3), ("Jet", "Jammer", 1)]
+    # 射程外: 通常武器も Jammer も効果なし（結果の行は残る）
+    assert resolve_attack_plan(base, unit, plan, distance=150, current_turn=TURN) == \
+           [("attack", "Jet", 0), ("jam", "Jammer", 0)]
+    assert hp(unit.weapon_stock, "Jet") == [80, 80, 80, 80]
+    assert jammed_until(unit.weapon_stock, "Jet") == [0, 0, 0, 0]
+
+    # can_fire=False（撤退中の相手）: 通常武器は撃たないが妨害はする
+    resolve_attack_plan(base, unit, plan, distance=50, current_turn=TURN, can_fire=False)
+    assert hp(unit.weapon_stock, "Jet") == [80, 80, 80, 80]
+    assert jammed_until(unit.weapon_stock, "Jet") == [TURN + 2, 0, 0, 0]
+    assert base.ammo_stock["Shell"] == 100
+
+    # 弾薬が2発分しかなければ2門だけ撃つ
+    base, unit = make_sides(columnar, shells=2)
+    assert resolve_attack_plan(base, unit, [("Jet", "Gun", 3)], 50, TURN) == [("attack", "Jet", 1)]
+    assert hp(unit.weapon_stock, "Jet") == [0, 60, 80, 80]
+    assert base.ammo_stock["Shell"] == 0
+
+
+def test_overflow_carries_within_a_type_but_not_across_types(columnar):
+    base, unit = make_sides(columnar)
+    events = resolve_attack_plan(base, unit, [("Ship", "Gun", 3), ("Jet", "Gun", 1), ("Missing", "Gun", 1)],
+                                 distance=50, current_turn=TURN)
+    assert events == [("attack", "Ship", 1), ("attack", "Jet", 0), ("attack", "Missing", 0)]
+    # Ship への150のうち余った50は Jet に繰り越さない
+    assert hp(unit.weapon_stock, "Ship") == [0]
+    assert hp(unit.weapon_stock, "Jet") == [30, 80, 80, 80]
+    assert unit.current_cost == 500
+    # 存在しない標的への射撃でも弾薬は消費する（以前のループと同じ）
+    assert base.ammo_stock["Shell"] == 95
@@ -0,0 +1,27 @@
+import csv
+import random
+
+from src.simulations.batch import (UnitScenarioBuilder, simulate_many,
+                                   summarize_trials)
+
+
+def test_builder_returns_fresh_state_per_trial():
+    builder = UnitScenarioBuilder("天空の盾")
+    first = builder(random.Random(0))
+    second = builder(random.Random(0))
+    unit = first["enemy_units"][0]
+    assert unit.target_base in first["fortresses"]
+    assert first["fortresses"][0] is not second["fortresses"][0]
+    assert (unit.latitude, unit.longitude) == (second["enemy_units"][0].latitude, second["enemy_units"][0].longitude)
+
+
+def test_simulate_many_streams_rows_to_csv(tmp_path):
+    output_path = tmp_path / "trials.csv"
+    rows = simulate_many(UnitScenarioBuilder("天空の盾"), 4, processes=2, max_turns=3, output_path=str(output_path))
+    assert [row["trial"] for row in rows] == [0, 1, 2, 3]
+    assert all(row["winner"] in ("enemy", "defender", "draw") for row in rows)
+    with open(output_path, encoding="utf-8") as f:
+        assert len(list(csv.DictReader(f))) == 4
+    summary = summarize_trials(rows)
+    assert summary["trials"] == 4
+    assert summary["enemy_rate"] + summary["defender_rate"] + summary["draw_rate"] == 1
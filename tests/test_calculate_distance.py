@@ -0,0 +1,35 @@
+import math
+
+import numpy as np
+
+from src.utils.calculate_distance import (calc_distance, calc_distance_batch,
+                                          haversine_distance,
+                                          move_towards_target,
+                                          move_towards_target_batch)
+
+ORIGINS = np.array([[27.5, 129.0], [26.1958, 127.6458], [33.1575, 129.7225]])
+TARGETS = np.array([[28.3589, 129.4953], [26.3589, 127.7681], [31.3667, 130.85]])
+
+
+def test_batch_distance_matches_scalar():
+    batch = calc_distance_batch(ORIGINS[:, 0], ORIGINS[:, 1], TARGETS[:, 0], TARGETS[:, 1])
+    scalar = [calc_distance(*o, *t) for o, t in zip(ORIGINS, TARGETS)]
+    assert np.allclose(batch, scalar)
+
+
+def test_batch_distance_broadcasts_to_matrix():
+    matrix = calc_distance_batch(ORIGINS[:, 0], ORIGINS[:, 1], TARGETS[:, 0, None], TARGETS[:, 1, None], method="haversine")
+    assert matrix.shape == (3, 3)
+    assert math.isclose(matrix[1, 0], haversine_distance(*ORIGINS[0], *TARGETS[1]))
+
+
+def test_haversine_is_stable_at_short_range():
+    assert calc_distance(26.0, 127.0, 26.0, 127.0) == 0.0
+    assert calc_distance_batch(26.1958, 127.6458, [26.1958], [127.6458]).tolist() == [0.0]
+    assert math.isclose(haversine_distance(26.0, 127.0, 26.0, 127.00001), 0.000999, rel_tol=1e-2)
+
+
+def test_batch_move_matches_scalar():
+    lats, lons = move_towards_target_batch(ORIGINS[:, 0], ORIGINS[:, 1], TARGETS[:, 0], TARGETS[:, 1], 30)
+    for lat, lon, o, t in zip(lats, lons, ORIGINS, TARGETS):
+        assert np.allclose((lat, lon), move_towards_target(*o, *t, 30))
@@ -0,0 +1,42 @@
+import pytest
+
+from src.simulations.checkpoint import (Checkpointer, capture_state,
+                                        load_checkpoint, restore_state)
+from src.simulations.policies import RuleBasedFortressCommander
+
+
+class CrashingFortressCommander(RuleBasedFortressCommander):
+    def decide_action(self, current_turn, history):
+        if current_turn == 2:
+            raise RuntimeError("LLM failed")
+        return super().decide_action(current_turn, history)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_resumed_run_matches_uninterrupted_run(make_simulation, tmp_path, columnar):
+    expected = make_simulation(columnar=columnar)
+    expected.run()
+
+    path = str(tmp_path / "checkpoint.json")
+    crashed = make_simulation(columnar, [Checkpointer(path)], CrashingFortressCommander)
+    with pytest.raises(RuntimeError):
+        crashed.run()
+    checkpoint = load_checkpoint(path)
+    assert checkpoint["turn"] == 2
+    assert checkpoint["transfer_queue"]
+
+    resumed = make_simulation(columnar=columnar)
+    restore_state(resumed, checkpoint)
+    resumed.run()
+    assert capture_state(resumed) == capture_state(expected)
+    assert [str(h) for h in resumed.history] == [str(h) for h in expected.history]
+
+
+def test_restore_rejects_a_different_scenario(make_simulation):
+    sim = make_simulation()
+    sim.step()
+    state = capture_state(sim)
+    other = make_simulation()
+    other.fortresses[1].name = "Elsewhere"
+    with pytest.raises(ValueError):
+        restore_state(other, state)
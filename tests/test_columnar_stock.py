@@ -0,0 +1,56 @@
+from src.simulations.models import ColumnarStock, Fortress, Weapon, WeaponStock
+
+
+def make_weapon():
+    return Weapon("Drone", range_=100, power=50, move_distance_per_turn=100,
+                  cost=10, hp=80, ammo_type="Missile", ammo_per_shot=1)
+
+
+def make_fortress(weapon_stock):
+    return Fortress(name="Test Base", latitude=26.0, longitude=127.0, weapon_stock=weapon_stock,
+                    ammo_stock={"Missile": 100}, ammo_defs={})
+
+
+def test_take_damage_cascades_overflow():
+    stock = ColumnarStock.from_weapon_stock({"Drone": [make_weapon() for _ in range(5)]})
+    destroyed, cost = stock.take_damage("Drone", 200)
+    assert (destroyed, cost) == (2, 20)
+    assert stock["Drone"].hp.tolist() == [0, 0, 40, 80, 80]
+    assert stock.active_count("Drone") == 3
+
+
+def test_columnar_matches_list_stock():
+    list_stock = WeaponStock({"Drone": [make_weapon() for _ in range(6)]})
+    columnar_stock = ColumnarStock.from_weapon_stock({"Drone": [make_weapon() for _ in range(6)]})
+    for stock in (list_stock, columnar_stock):
+        assert stock.jam("Drone", 2, current_turn=1, jam_turns=2) == 2
+        assert stock.take_damage("Drone", 250) == (3, 30)
+        assert stock.active_count() == 3
+    assert [w.jammed_until for w in list_stock["Drone"]] == columnar_stock["Drone"].jammed_until.tolist()
+    assert [w.hp for w in list_stock["Drone"]] == columnar_stock["Drone"].hp.tolist()
+
+
+def test_send_and_receive_keep_counts():
+    for weapon_stock in ({"Drone": [make_weapon() for _ in range(3)]},
+                         ColumnarStock.from_weapon_stock({"Drone": [make_weapon() for _ in range(3)]})):
+        base = make_fortress(weapon_stock)
+        sent = base.send_weapons("Drone", 2)
+        assert len(sent) == 2 and base.weapon_stock.active_count("Drone") == 1
+        for weapon in sent:
+            base.receive_weapon(weapon)
+        assert len(base.weapon_stock["Drone"]) == 3 and base.weapon_stock.active_count() == 3
+
+
+def test_from_layout_builds_columns_without_weapon_objects(monkeypatch):
+    spec = make_weapon().spec
+    expected = ColumnarStock.from_weapon_stock({"Drone": [make_weapon() for _ in range(4)]})
+
+    def instantiate(self):
+        raise AssertionError("from_layout must not create weapon objects")
+
+    monkeypatch.setattr(type(spec), "instantiate", instantiate)
+    stock = ColumnarStock.from_layout([(spec, 4)])
+    assert stock["Drone"].spec is spec
+    assert stock["Drone"].hp.tolist() == expected["Drone"].hp.tolist()
+    assert stock["Drone"].jammed_until.tolist() == [0, 0, 0, 0]
+    assert stock.active_count() == 4
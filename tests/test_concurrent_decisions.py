@@ -0,0 +1,39 @@
+import threading
+
+from src.simulations.models import EnemyUnit, Fortress, Simulation, Weapon
+from src.simulations.policies import RuleBasedEnemyCommander
+
+
+class BarrierCommander:
+    """全拠点がそろうまで判断を終えない司令官。逐次実行だとデッドロックするので同時実行の確認になる。"""
+    barrier = None
+    seen = {}
+
+    def __init__(self, my_fortress, enemy_unit, all_fortresses, enemy_goal, enemy_units=None, snapshot=None):
+        self.fortress = my_fortress
+
+    def decide_action(self, current_turn, history):
+        self.seen[(current_turn, self.fortress.name)] = len(history)
+        self.barrier.wait(timeout=5)
+        return f"{self.fortress.name} waits", "idle", []
+
+
+def make_weapon(name):
+    return Weapon(name, range_=10, power=1, move_distance_per_turn=10, cost=1, hp=1)
+
+
+def test_concurrent_decisions_share_snapshot_and_apply_in_order():
+    fortresses = [Fortress(f"F{i}", 30 + i, 130, {"SAM": [make_weapon("SAM")]}, {}, {}) for i in range(3)]
+    unit = EnemyUnit("Enemy", fortresses[0], 20, 120, speed=1, weapon_stock={"Jet": [make_weapon("Jet")]},
+                     ammo_stock={}, ammo_defs={},
+                     retreat_cost_threshold=10 ** 6)
+    BarrierCommander.barrier = threading.Barrier(3)
+    BarrierCommander.seen = {}
+    sim = Simulation(fortresses, unit, {"目的": "test"}, max_turns=2, fortress_commander_cls=BarrierCommander,
+                     enemy_commander_cls=RuleBasedEnemyCommander, concurrent_decisions=True)
+    sim.step()
+    sim.step()
+
+    assert [h.name for h in sim.history[:3]] == ["F0", "F1", "F2"]
+    assert {BarrierCommander.seen[(0, f.name)] for f in fortresses} == {0}
+    assert len({BarrierCommander.seen[(1, f.name)] for f in fortresses}) == 1
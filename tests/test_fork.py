@@ -0,0 +1,43 @@
+import pytest
+
+from src.simulations.checkpoint import capture_state
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_fork_and_original_continue_independently(make_simulation, columnar):
+    expected = make_simulation(columnar)
+    expected.run()
+
+    sim = make_simulation(columnar)
+    for _ in range(2):
+        sim.step()
+    branch = sim.fork(observers=[])
+    assert sim.weapon_transfer_queue and branch.weapon_transfer_queue
+    branch.run()
+    sim.run()
+    assert capture_state(sim) == capture_state(expected)
+    assert capture_state(branch) == capture_state(expected)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_fork_shares_weapons_until_written(make_simulation, columnar):
+    sim = make_simulation(columnar)
+    sim.step()
+    branch = sim.fork(observers=[])
+    target, branch_target = sim.fortresses[0], branch.fortresses[0]
+    assert branch.enemy_unit.target_base is branch_target
+    assert branch_target.weapon_stock["SAM"] is target.weapon_stock["SAM"]
+
+    hp_before = [w.hp for w in target.weapon_stock["SAM"]]
+    active_before = target.weapon_stock.active_count("SAM")
+    destroyed, _ = branch_target.weapon_stock.take_damage("SAM", 250)
+    assert destroyed >= 2
+    assert branch_target.weapon_stock.active_count("SAM") == active_before - destroyed
+    assert target.weapon_stock.active_count("SAM") == active_before
+    assert [w.hp for w in target.weapon_stock["SAM"]] == hp_before
+    assert branch.enemy_unit.weapon_stock["Jet"] is sim.enemy_unit.weapon_stock["Jet"]
+
+    # 分岐先での別の行動（拠点間の送付）は元のシミュレーションに影響しない
+    before = capture_state(sim)
+    branch.apply_transfer(branch.fortresses[1], [("Target", "Slow", 2), ("Target", "Missile", 10)])
+    assert capture_state(sim) == before
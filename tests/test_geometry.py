@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from src.simulations.geometry import GeometryCache, SpatialIndex
+from src.utils.calculate_distance import calc_distance
+
+
+def point(lat, lon):
+    return SimpleNamespace(latitude=lat, longitude=lon)
+
+
+def test_spatial_index_matches_brute_force():
+    points = [point(24 + i * 0.37 % 9, 123 + i * 0.53 % 9) for i in range(200)]
+    center = point(28.0, 128.0)
+    hits = [p for _, p in SpatialIndex(points, cell_deg=0.5).within(center, 150)]
+    expected = [p for p in points if calc_distance(28.0, 128.0, p.latitude, p.longitude) <= 150]
+    assert sorted(map(id, hits)) == sorted(map(id, expected))
+
+
+def test_geometry_cache_invalidates_moved_object():
+    base, unit = point(26.0, 127.0), point(27.0, 128.0)
+    geometry = GeometryCache([base])
+    before = geometry.distance(base, unit)
+    unit.latitude = 26.5
+    assert geometry.distance(base, unit) == before
+    geometry.invalidate(unit)
+    assert geometry.distance(base, unit) < before
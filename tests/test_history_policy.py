@@ -0,0 +1,36 @@
+from src.simulations.history import HistoryPolicy, estimate_tokens, render_history
+from src.simulations.models import History
+
+
+def make_history(turns, thought="考え" * 20):
+    history = []
+    for turn in range(turns):
+        history.append(History(turn, "Naha", thought, "defend", [("Jet", "SAM", 1)],
+                                "Naha attacked Jet, destroyed 1\n", cost=100 * turn))
+        history.append(History(turn, "Enemy", thought, "attack", [("SAM", "Jet", 2)],
+                               "Enemy attacked SAM of Naha, destroyed 2\n", cost=50 * turn))
+    return history
+
+
+def test_keeps_recent_turns_verbatim_and_summarizes_older():
+    history = make_history(6)
+    text = HistoryPolicy(recent_turns=2, max_tokens=10 ** 6).render(history)
+    lines = text.split("\n")
+    assert lines[0] == "[Turn 0 要約] 行動: defend×1, attack×1 | 撃破: Naha 1, Enemy 2 | 累積コスト: Naha 0, Enemy 0"
+    assert sum(line.startswith("[Turn") and "要約" in line for line in lines) == 4
+    assert text.endswith(render_history(history[-4:]))
+
+
+def test_short_history_is_unchanged():
+    history = make_history(2)
+    assert HistoryPolicy(recent_turns=3).render(history) == render_history(history)
+
+
+def test_token_budget_shrinks_verbatim_turns_then_drops_old_summaries():
+    history = make_history(30, thought="考え" * 200)
+    policy = HistoryPolicy(recent_turns=5, max_tokens=1500)
+    text = policy.render(history)
+    assert estimate_tokens(text) <= 1500 + estimate_tokens("（古い30ターン分の履歴は省略）")
+    assert str(history[-1]) in text
+    assert "[Turn 29] Enemy" in text and "[Turn 27] Enemy" not in text
+    assert text.startswith("（古い")
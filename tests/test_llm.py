@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+import src.utils.llm as llm
+from src.utils.llm import AsyncLLMClient, TokenBucket, is_retryable
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeCompletions:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def create(self, model, messages, temperature):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if self.failures:
+            raise StatusError(self.failures.pop(0))
+        message = SimpleNamespace(content=f" {messages[0]['content']} ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_client(failures=(), **kwargs):
+    completions = FakeCompletions(failures)
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return AsyncLLMClient(client=fake, **kwargs), completions
+
+
+def test_retries_rate_limit_and_server_errors(monkeypatch):
+    monkeypatch.setattr(llm, "retry_delay", lambda error, attempt: 0)
+    client, completions = make_client([429, 503])
+    assert asyncio.run(client.chat([{"role": "user", "content": "hi"}])) == "hi"
+    assert completions.calls == 3
+
+
+def test_does_not_retry_client_errors():
+    client, completions = make_client([400])
+    try:
+        asyncio.run(client.chat([{"role": "user", "content": "hi"}]))
+    except StatusError as e:
+        assert e.status_code == 400
+    assert completions.calls == 1
+    assert is_retryable(StatusError(500)) and not is_retryable(StatusError(404))
+
+
+def test_semaphore_limits_requests_in_flight():
+    async def run():
+        client, completions = make_client(max_in_flight=2, requests_per_minute=60000)
+        results = await asyncio.gather(*(client.chat([{"role": "user", "content": str(i)}]) for i in range(6)))
+        return results, completions
+
+    results, completions = asyncio.run(run())
+    assert results == [str(i) for i in range(6)]
+    assert completions.max_in_flight == 2
+
+
+def test_token_bucket_waits_for_refill():
+    async def run():
+        bucket = TokenBucket(rate=100, capacity=1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await bucket.acquire()
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.015
+
+
+def test_sync_wrapper_runs_on_background_loop(monkeypatch):
+    client, _ = make_client()
+
+    async def fake_call(messages, model=None, temperature=None):
+        return await client.chat(messages)
+    monkeypatch.setattr(llm, "acall_chatgpt", fake_call)
+    assert llm.call_chatgpt([{"role": "user", "content": "sync"}]) == "sync"
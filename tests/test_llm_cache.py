@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import src.utils.llm as llm
+import src.utils.llm_cache as llm_cache
+import src.utils.llm_telemetry as llm_telemetry
+from src.utils.llm import Completion
+from src.utils.llm_cache import ResponseCache, cache_key, stage_mode
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, messages, model=None, temperature=None):
+        self.calls += 1
+        return Completion(f"answer {self.calls}", prompt_tokens=10, completion_tokens=2)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.delenv("LLM_CACHE_MODE", raising=False)
+    monkeypatch.setattr(llm_telemetry, "METRICS_PATH", str(tmp_path / "metrics.jsonl"))
+    monkeypatch.setattr(llm_cache, "_cache", ResponseCache(str(tmp_path / "cache.sqlite3")))
+    fake = CountingClient()
+    monkeypatch.setattr(llm, "get_async_client", lambda: fake)
+    return fake
+
+
+def ask(stage, content="q"):
+    async def run():
+        with llm.llm_context(stage=stage):
+            return await llm.acall_chatgpt([{"role": "user", "content": content}])
+    return asyncio.run(run())
+
+
+def test_read_through_reuses_identical_prompts(client):
+    assert ask("analysis") == "answer 1"
+    assert ask("analysis") == "answer 1"
+    assert ask("analysis", "other") == "answer 2"
+    assert client.calls == 2
+
+
+def test_off_and_read_only_modes(client, monkeypatch):
+    assert ask("simulation") == "answer 1"
+    assert ask("simulation") == "answer 2"
+    monkeypatch.setenv("LLM_CACHE_MODE_SIMULATION", "read-only")
+    assert ask("simulation") == "answer 3"
+    assert ask("simulation") == "answer 4"
+    ask("analysis", "shared")
+    assert ask("simulation", "shared") == "answer 5"
+
+
+def test_key_depends_on_model_messages_and_temperature():
+    messages = [{"role": "user", "content": "q"}]
+    assert cache_key("gpt-4o", messages, 0.7) == cache_key("gpt-4o", [dict(messages[0])], 0.7)
+    assert cache_key("gpt-4o", messages, 0.7) != cache_key("gpt-4o", messages, 0.0)
+    assert cache_key("gpt-4o", messages, 0.7) != cache_key("gpt-4o-mini", messages, 0.7)
+
+
+def test_evicts_least_recently_used_over_size_limit(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.get("a")
+    cache.put("c", "12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345" and cache.get("c") == "12345"
+    assert cache.total_bytes() <= 10
+
+
+def test_running_total_tracks_replacements_and_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path, max_bytes=100)
+    cache.put("a", "12345")
+    cache.put("b", "123")
+    cache.put("a", "1")
+    assert cache.total_bytes() == 4
+    cache.close()
+    reopened = ResponseCache(path, max_bytes=100)
+    assert reopened.total_bytes() == 4
+    reopened.max_bytes = 3
+    reopened.put("c", "12")
+    assert reopened.get("b") is None
+    sizes = reopened.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    assert reopened.total_bytes() == sizes == 3
+
+
+def test_unknown_mode_is_rejected(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "sometimes")
+    with pytest.raises(ValueError):
+        stage_mode("analysis")
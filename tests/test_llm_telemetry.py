@@ -0,0 +1,49 @@
+import pytest
+
+import src.utils.llm as llm
+import src.utils.llm_telemetry as llm_telemetry
+from src.utils.llm import Completion, llm_context
+from src.utils.llm_telemetry import load_records, summarize
+
+
+class FakeClient:
+    async def complete(self, messages, model=None, temperature=None):
+        if messages[0]["content"] == "fail":
+            error = RuntimeError("boom")
+            error.llm_retries = 2
+            raise error
+        return Completion("ok", prompt_tokens=1000, completion_tokens=100, retries=1)
+
+
+@pytest.fixture
+def metrics_path(tmp_path, monkeypatch):
+    path = tmp_path / "metrics.jsonl"
+    monkeypatch.setattr(llm_telemetry, "METRICS_PATH", str(path))
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    monkeypatch.setattr(llm, "get_async_client", lambda: FakeClient())
+    return str(path)
+
+
+def test_records_tags_tokens_and_errors_through_sync_wrapper(metrics_path):
+    with llm_context(stage="simulation"):
+        with llm_context(commander="fortress", name="Naha", turn=3):
+            assert llm.call_chatgpt([{"role": "user", "content": "hi"}]) == "ok"
+        with pytest.raises(RuntimeError):
+            llm.call_chatgpt([{"role": "user", "content": "fail"}])
+
+    ok, failed = load_records(metrics_path)
+    assert (ok["stage"], ok["commander"], ok["name"], ok["turn"]) == ("simulation", "fortress", "Naha", 3)
+    assert (ok["prompt_tokens"], ok["completion_tokens"], ok["retries"]) == (1000, 100, 1)
+    assert ok["cost_usd"] == pytest.approx((1000 * 2.5 + 100 * 10.0) / 1_000_000)
+    assert failed["stage"] == "simulation" and "commander" not in failed
+    assert (failed["error"], failed["retries"]) == ("RuntimeError", 2)
+
+
+def test_summarize_groups_by_keys():
+    records = [
+        {"stage": "simulation", "turn": t, "latency_s": 1.0, "prompt_tokens": 100 * (t + 1), "completion_tokens": 10,
+         "retries": 0, "cache_hit": False, "cost_usd": 0.001, "error": None}
+        for t in (10, 2, 2)
+    ]
+    rows = summarize(records, ["stage", "turn"])
+    assert [(row["turn"], row["calls"], row["prompt_tokens"]) for row in rows] == [(2, 2, 600), (10, 1, 1100)]
@@ -0,0 +1,38 @@
+from src.simulations.models import (EnemyUnit, ExpendableWeapon, Fortress,
+                                    Simulation, Weapon)
+
+missile = ExpendableWeapon("Missile", cost_per_unit=1, move_distance_per_turn=400)
+
+
+def make_weapon(name, move_distance_per_turn):
+    return Weapon(name, range_=100, power=50, move_distance_per_turn=move_distance_per_turn,
+                  cost=10, hp=80, ammo_type="Missile", ammo_per_shot=1)
+
+
+def make_simulation():
+    naha = Fortress("Naha", 26.1958, 127.6458,
+                    {"Slow": [make_weapon("Slow", 50) for _ in range(3)],
+                     "Fast": [make_weapon("Fast", 500) for _ in range(3)]},
+                    ammo_stock={"Missile": 100}, ammo_defs={"Missile": missile})
+    amami = Fortress("Amami", 28.3589, 129.4953, {}, ammo_stock={}, ammo_defs={})
+    unit = EnemyUnit("Enemy", amami, 29.0, 130.0, speed=10, weapon_stock={}, ammo_stock={},
+                     ammo_defs={}, retreat_cost_threshold=100)
+    return Simulation([naha, amami], unit, {"目的": "test"}), naha, amami
+
+
+def test_convoys_arrive_by_turn_not_enqueue_order():
+    sim, naha, amami = make_simulation()
+    sim.apply_transfer(naha, [("Amami", "Slow", 2), ("Amami", "Fast", 3), ("Amami", "Missile", 40)])
+    assert len(sim.weapon_transfer_queue) == 3
+    assert naha.ammo_stock["Missile"] == 60
+
+    sim.turn = 1
+    sim.handle_weapon_arrivals()
+    assert amami.weapon_stock.active_count("Fast") == 3
+    assert amami.ammo_stock["Missile"] == 40
+    assert "Slow" not in amami.weapon_stock
+
+    sim.turn = 7
+    sim.handle_weapon_arrivals()
+    assert amami.weapon_stock.active_count("Slow") == 2
+    assert not sim.weapon_transfer_queue
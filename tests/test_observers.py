@@ -0,0 +1,89 @@
+from src.simulations.models import (EnemyUnit, ExpendableWeapon, Fortress,
+                                    Jammer, Simulation, Weapon)
+from src.simulations.observers import PhaseProfiler, SimulationObserver
+from src.simulations.policies import (RuleBasedEnemyCommander,
+                                      RuleBasedFortressCommander)
+
+missile = ExpendableWeapon("Missile", cost_per_unit=1, move_distance_per_turn=200)
+
+
+def make_weapon(name):
+    return Weapon(name, range_=300, power=100, move_distance_per_turn=100,
+                  cost=100, hp=100, ammo_type="Missile", ammo_per_shot=1)
+
+
+def make_simulation(observers):
+    target = Fortress("Target", 28.3589, 129.4953, {"SAM": [make_weapon("SAM") for _ in range(4)]},
+                      ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile})
+    unit = EnemyUnit("Enemy", target, 28.8, 129.9, speed=30, weapon_stock={"Jet": [make_weapon("Jet") for _ in range(8)]},
+                     ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile}, retreat_cost_threshold=10 ** 6)
+    return Simulation([target], unit, {"目的": "test"}, max_turns=3, observers=observers,
+                      fortress_commander_cls=RuleBasedFortressCommander,
+                      enemy_commander_cls=RuleBasedEnemyCommander)
+
+
+class EventRecorder(SimulationObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_turn_start(self, sim, turn):
+        self.events.append(("turn_start", turn))
+
+    def on_decision(self, sim, name, decision):
+        self.events.append(("decision", name, decision[1]))
+
+    def on_action_applied(self, sim, entry):
+        self.events.append(("applied", entry.name, entry.action))
+
+    def on_turn_end(self, sim, turn, phase_ns):
+        self.events.append(("turn_end", turn))
+
+    def on_jam(self, sim, attacker, defender, target_name, count, until_turn):
+        self.events.append(("jam", attacker.name, defender.name, target_name, count, until_turn))
+
+    def on_sim_end(self, sim):
+        self.events.append(("sim_end",))
+
+    def on_export(self, sim, output_dir):
+        self.events.append(("export", output_dir))
+
+
+def test_observers_receive_events_in_order_without_console_output(capsys):
+    recorder = EventRecorder()
+    sim = make_simulation([recorder])
+    sim.run()
+    assert recorder.events[:5] == [
+        ("turn_start", 0),
+        ("decision", "Target", "idle"),
+        ("applied", "Target", "idle"),
+        ("decision", "Enemy", "attack"),
+        ("applied", "Enemy", "attack"),
+    ]
+    assert recorder.events[-1] == ("sim_end",)
+    assert sum(event[0] == "applied" for event in recorder.events) == len(sim.history)
+    assert "--- Turn" not in capsys.readouterr().out
+
+
+def test_engine_messages_go_through_observers(tmp_path, capsys):
+    recorder = EventRecorder()
+    sim = make_simulation([recorder])
+    target = sim.fortresses[0]
+    target.receive_weapon(Jammer("Jammer", range_=300, jam_turns=2, move_distance_per_turn=100, cost=50, hp=50))
+    sim.apply_defend(target, [("Jet", "Jammer", 1)])
+    sim.enemy_unit.retreating = True
+    assert sim.enemy_unit.attack([("SAM", "Jet", 1)], sim.turn, notify=sim.notify) == "retreating"
+    sim.export_results(output_dir=str(tmp_path))
+    assert recorder.events == [("jam", "Target", "Enemy", "Jet", 1, 2), ("export", str(tmp_path))]
+    assert capsys.readouterr().out == ""
+
+
+def test_phase_profiler_reports_exclusive_phase_times():
+    profiler = PhaseProfiler()
+    sim = make_simulation([profiler])
+    sim.run()
+    assert [timings["turn"] for timings in profiler.turns] == list(range(sim.turn))
+    phases = set(profiler.turns[0]) - {"turn"}
+    assert {"arrivals", "fortress_decision", "fortress_action", "enemy_decision", "enemy_action", "outcome"} <= phases
+    assert all(ns >= 0 for timings in profiler.turns for ns in timings.values())
+    summary = profiler.summary()
+    assert abs(sum(phase["share"] for phase in summary.values()) - 1) < 1e-3
@@ -0,0 +1,60 @@
+import src.simulations.models as models
+from src.simulations.models import (EnemyUnit, ExpendableWeapon, Fortress,
+                                    Jammer, Simulation, Weapon)
+from src.simulations.policies import (RuleBasedEnemyCommander,
+                                      RuleBasedFortressCommander, plan_strikes)
+
+missile = ExpendableWeapon("Missile", cost_per_unit=1, move_distance_per_turn=200)
+
+
+def make_weapon(name, power=100, range_=300):
+    return Weapon(name, range_=range_, power=power, move_distance_per_turn=100,
+                  cost=100, hp=100, ammo_type="Missile", ammo_per_shot=1)
+
+
+def make_simulation():
+    target = Fortress("Target", 28.3589, 129.4953, {"SAM": [make_weapon("SAM") for _ in range(4)]},
+                      ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile})
+    rear = Fortress("Rear", 33.1575, 129.7225, {"Destroyer": [make_weapon("Destroyer", power=200) for _ in range(6)]},
+                    ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile})
+    unit = EnemyUnit("Enemy", target, 28.8, 129.9, speed=30,
+                     weapon_stock={"Jet": [make_weapon("Jet") for _ in range(8)],
+                                   "Drone": [Jammer("Drone", range_=300, jam_turns=2, move_distance_per_turn=100,
+                                                    cost=10, hp=50) for _ in range(2)]},
+                     ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile}, retreat_cost_threshold=10 ** 6)
+    return Simulation([target, rear], unit, {"目的": "test"}, max_turns=10,
+                      fortress_commander_cls=RuleBasedFortressCommander,
+                      enemy_commander_cls=RuleBasedEnemyCommander)
+
+
+def test_rule_based_simulation_runs_without_llm(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM must not be called")
+    monkeypatch.setattr(models, "call_chatgpt", fail)
+
+    sim = make_simulation()
+    sim.run()
+    actions = {(h.name, h.action) for h in sim.history}
+    assert ("Enemy", "attack") in actions
+    assert ("Rear", "transfer") in actions
+    assert ("Target", "defend") in actions
+    assert sim.is_over()
+
+
+def test_rule_based_enemy_jams_before_striking():
+    sim = make_simulation()
+    thought, action, plan = RuleBasedEnemyCommander(sim.enemy_unit, sim.fortresses, "test").decide_action(0, [])
+    assert action == "attack"
+    assert plan[0] == ("SAM", "Drone", 2)
+    assert sum(count for _, _, count in plan) <= 5
+
+
+def test_zero_power_weapons_are_not_assigned():
+    sim = make_simulation()
+    for _ in range(3):
+        sim.enemy_unit.weapon_stock.receive(make_weapon("Recon", power=0))
+        sim.fortresses[0].weapon_stock.receive(make_weapon("Recon", power=0))
+    plan, used = plan_strikes(sim.enemy_unit, sim.fortresses[0].weapon_stock, distance=50, budget=5)
+    assert plan and all(name != "Recon" for _, name, _ in plan)
+    sim.run()
+    assert sim.is_over()
@@ -0,0 +1,90 @@
+import json
+
+import src.simulations.models as models
+from src.simulations.models import (EnemyUnit, ExpendableWeapon, Fortress,
+                                    Simulation, Weapon)
+from src.run_simulation_template import run_scenario
+from src.simulations.replay import (DecisionLog, load_decision_log,
+                                    replay_simulation_logs)
+from src.utils.scenario_store import get_store
+
+missile = ExpendableWeapon("Missile", cost_per_unit=1, move_distance_per_turn=200)
+
+
+def make_weapon(name, power=100, range_=300):
+    return Weapon(name, range_=range_, power=power, move_distance_per_turn=100,
+                  cost=100, hp=100, ammo_type="Missile", ammo_per_shot=1)
+
+
+def make_state():
+    target = Fortress("Target", 28.3589, 129.4953, {"SAM": [make_weapon("SAM") for _ in range(4)]},
+                      ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile})
+    rear = Fortress("Rear", 33.1575, 129.7225, {"Destroyer": [make_weapon("Destroyer") for _ in range(3)]},
+                    ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile})
+    unit = EnemyUnit("Enemy", target, 28.8, 129.9, speed=30, weapon_stock={"Jet": [make_weapon("Jet") for _ in range(8)]},
+                     ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile}, retreat_cost_threshold=10 ** 6)
+    return [target, rear], unit
+
+
+def scripted_llm(messages):
+    prompt = messages[0]["content"]
+    if "敵ユニット「Enemy」" in prompt:
+        return json.dumps({"thought": "攻撃", "action": "attack", "plan": [["SAM", "Jet", 2]]})
+    if "防衛拠点「Rear」" in prompt:
+        return json.dumps({"thought": "輸送", "action": "transfer", "plan": [["Target", "Destroyer", 1]]})
+    return json.dumps({"thought": "防衛", "action": "defend", "plan": [["Jet", "SAM", 1]]})
+
+
+def test_recorded_decisions_replay_without_llm(tmp_path, monkeypatch):
+    monkeypatch.setattr(models, "call_chatgpt", scripted_llm)
+    fortresses, unit = make_state()
+    recorded = Simulation(fortresses, unit, {"目的": "test"}, max_turns=4)
+    recorded.run()
+    recorded.export_results(output_dir=str(tmp_path))
+    assert all(d.prompt_hash for d in recorded.decision_log.decisions.values())
+
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM must not be called")
+    monkeypatch.setattr(models, "call_chatgpt", fail)
+    log = load_decision_log(str(tmp_path))
+    fortresses, unit = make_state()
+    replayed = Simulation(fortresses, unit, {"目的": "test"}, max_turns=4,
+                          fortress_commander_cls=log.fortress_commander_cls(),
+                          enemy_commander_cls=log.enemy_commander_cls())
+    replayed.run()
+
+    def outline(sim):
+        return [(h.turn, h.name, h.action, h.result) for h in sim.history]
+    assert outline(replayed) == outline(recorded)
+    assert log.misses == [] and log.divergences == []
+
+
+def test_recorded_scenario_replays_without_divergence(tmp_path, monkeypatch):
+    def scripted(messages):
+        if "敵ユニット「" in messages[0]["content"]:
+            return json.dumps({"thought": "前進", "action": "move_toward_target", "plan": []})
+        return json.dumps({"thought": "待機", "action": "idle", "plan": []})
+    monkeypatch.setattr(models, "call_chatgpt", scripted)
+    code_name = "天空の盾"
+    recorded = run_scenario(code_name, get_store().get(code_name), console=False, output_base=str(tmp_path))
+    assert recorded.decision_log.decisions
+
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM must not be called")
+    monkeypatch.setattr(models, "call_chatgpt", fail)
+    [row] = replay_simulation_logs(str(tmp_path))
+    assert (row["code_name"], row["misses"], row["divergences"]) == (code_name, 0, 0)
+    assert row["turns"] == recorded.turn
+
+
+def test_from_history_skips_outcome_entries(tmp_path):
+    path = tmp_path / "result_history.json"
+    path.write_text(json.dumps([
+        {"turn": 0, "name": "Enemy", "thought": "", "action": "attack", "plan": [["SAM", "Jet", 1]], "result": ""},
+        {"turn": 0, "name": "Enemy", "thought": "", "action": "win", "plan": [], "result": ""},
+    ]), encoding="utf-8")
+    log = DecisionLog.from_history(str(path))
+    assert len(log) == 1
+    assert log.replay(0, "Enemy", None, ("", "idle", [])) == ("", "attack", [["SAM", "Jet", 1]])
+    assert log.replay(1, "Enemy", None, ("", "idle", [])) == ("", "idle", [])
+    assert log.misses == [(1, "Enemy")]
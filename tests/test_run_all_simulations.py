@@ -0,0 +1,37 @@
+from src.run_all_simulations import discover_units, print_report, run_all
+from src.run_simulation_template import run_scenario
+from src.simulations.batch import trial_outcome
+from src.simulations.policies import (RuleBasedEnemyCommander,
+                                      RuleBasedFortressCommander)
+
+COMMANDERS = {"fortress_commander_cls": RuleBasedFortressCommander, "enemy_commander_cls": RuleBasedEnemyCommander}
+
+
+def scenario(code_name):
+    return {"作戦名": code_name, "目的": "test"}
+
+
+def test_discover_units_lists_generated_modules():
+    names = discover_units()
+    assert "天空の盾" in names
+    assert names == sorted(names)
+
+
+def test_run_all_matches_sequential_runs_and_reports_failures(tmp_path, capsys):
+    code_names = ["天空の盾", "風の刃", "龍の爪", "存在しない作戦", "シナリオなし"]
+    scenarios = {name: scenario(name) for name in code_names if name != "シナリオなし"}
+    rows, failures = run_all(code_names, scenarios, workers=3, output_base=str(tmp_path / "parallel"), **COMMANDERS)
+
+    assert [row["code_name"] for row in rows] == ["天空の盾", "風の刃", "龍の爪"]
+    assert set(failures) == {"存在しない作戦", "シナリオなし"}
+    for row in rows:
+        sim = run_scenario(row["code_name"], scenarios[row["code_name"]], console=False,
+                           output_base=str(tmp_path / "sequential"), **COMMANDERS)
+        expected = trial_outcome(sim)
+        assert {key: row[key] for key in expected} == expected
+        assert (tmp_path / "parallel" / row["code_name"] / "result_history.json").exists()
+
+    print_report(rows, failures)
+    out = capsys.readouterr().out
+    assert "=== 失敗 (2) ===" in out
+    assert "存在しない作戦\tModuleNotFoundError" in out
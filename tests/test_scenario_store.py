@@ -0,0 +1,63 @@
+import json
+import multiprocessing
+
+from src.utils.scenario_store import ScenarioStore
+
+
+def scenario(i, name=None):
+    return {"シナリオID": f"【軍事シナリオ{i}】", "作戦名": name or f"作戦{i}", "目的": f"目的{i}"}
+
+
+def test_lookup_by_name_and_id(tmp_path):
+    store = ScenarioStore(str(tmp_path / "scenarios.jsonl"))
+    store.extend([scenario(1), scenario(2), scenario(3, name="作戦1")])
+    assert store.get("作戦2")["目的"] == "目的2"
+    assert store.get("作戦1")["目的"] == "目的1"
+    assert store.get_by_id("【軍事シナリオ3】")["作戦名"] == "作戦1"
+    assert store.get("無い作戦") is None
+    assert store.names() == ["作戦1", "作戦2"]
+    assert [s["目的"] for s in store.by_name().values()] == ["目的1", "目的2"]
+
+
+def test_index_is_reused_and_catches_up_with_other_writers(tmp_path):
+    path = str(tmp_path / "scenarios.jsonl")
+    ScenarioStore(path).extend([scenario(1), scenario(2)])
+    reader = ScenarioStore(path)
+    assert json.load(open(f"{path}.idx", encoding="utf-8"))["offsets"]["作戦名"].keys() == {"作戦1", "作戦2"}
+
+    ScenarioStore(path).append(scenario(3))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"作戦名": "書きかけ')
+    assert reader.get("作戦3")["目的"] == "目的3"
+    assert "書きかけ" not in reader.names()
+
+
+def test_rewritten_file_is_reindexed(tmp_path):
+    path = tmp_path / "scenarios.jsonl"
+    store = ScenarioStore(str(path))
+    store.extend([scenario(1), scenario(2)])
+    path.write_text(json.dumps(scenario(9), ensure_ascii=False) + "\n", encoding="utf-8")
+    assert ScenarioStore(str(path)).names() == ["作戦9"]
+    store.rewrite([scenario(5)])
+    assert store.names() == ["作戦5"]
+
+
+def append_many(path, worker):
+    store = ScenarioStore(path)
+    for i in range(50):
+        store.append(scenario(worker * 100 + i))
+
+
+def test_concurrent_appends_do_not_interleave(tmp_path):
+    path = str(tmp_path / "scenarios.jsonl")
+    processes = [multiprocessing.Process(target=append_many, args=(path, worker)) for worker in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 200
+    store = ScenarioStore(path)
+    assert len(store.names()) == 200
+    assert store.get("作戦349")["目的"] == "目的349"
@@ -1,13 +1,14 @@
 import json
 
-from results.enemy_units.天空の盾 import enemy_unit
 from src.definitions.predefined_japanese_defenses import (fortress_amami,
                                                           fortress_kadena,
                                                           fortress_kanoya,
                                                           fortress_naha,
                                                           fortress_sasebo)
 from src.simulations.models import Simulation
+from src.simulations.templates import load_unit_template
 
+enemy_unit = load_unit_template("天空の盾").instantiate([fortress_naha, fortress_amami, fortress_sasebo, fortress_kadena, fortress_kanoya])
 datal = [json.loads(line) for line in open("results/scenarios.jsonl")]
 enemy_scenario = [data for data in datal if data["作戦名"] == "天空の盾"]
 simulator = Simulation(fortresses=[fortress_naha, fortress_amami, fortress_sasebo, fortress_kadena, fortress_kanoya], enemy_unit=enemy_unit, enemy_scenario=enemy_scenario, max_turns=3)
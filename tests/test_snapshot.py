@@ -0,0 +1,44 @@
+import json
+
+from src.simulations.models import EnemyUnit, Fortress, Weapon
+from src.simulations.snapshot import (TurnSnapshot, join_json_list,
+                                      serialize_fortress, serialize_unit)
+
+
+def make_weapon(name):
+    return Weapon(name, range_=300, power=100, move_distance_per_turn=100, cost=100, hp=100)
+
+
+def make_state():
+    naha = Fortress("那覇", 26.2, 127.7, {"SAM": [make_weapon("SAM") for _ in range(2)]}, {}, {})
+    amami = Fortress("Amami", 28.4, 129.5, {"Destroyer": [make_weapon("Destroyer")]}, {}, {})
+    unit = EnemyUnit("Enemy", naha, 27.0, 128.0, speed=30, weapon_stock={"Jet": [make_weapon("Jet")]},
+                     ammo_stock={}, ammo_defs={}, retreat_cost_threshold=1000)
+    return naha, amami, unit
+
+
+def test_joined_fragments_match_dumping_the_whole_list():
+    naha, amami, unit = make_state()
+    items = [serialize_fortress(naha, unit), serialize_fortress(amami, unit)]
+    fragments = [json.dumps(item, indent=2, ensure_ascii=False) for item in items]
+    assert join_json_list(fragments) == json.dumps(items, indent=2, ensure_ascii=False)
+    assert join_json_list([]) == json.dumps([], indent=2)
+
+
+def test_fragments_are_cached_until_invalidated():
+    naha, amami, unit = make_state()
+    snapshot = TurnSnapshot()
+    before = snapshot.fortresses_json([naha, amami], unit)
+    unit_before = snapshot.unit_json(unit)
+    naha.current_cost = 500
+    assert snapshot.fortresses_json([naha, amami], unit) == before
+
+    snapshot.invalidate(naha)
+    after = snapshot.fortresses_json([naha, amami], unit)
+    assert '"current_cost": 500' in after
+    assert snapshot.unit_json(unit) == unit_before
+
+    unit.latitude = 26.3
+    snapshot.invalidate(unit)
+    assert snapshot.unit_json(unit) == json.dumps(serialize_unit(unit), indent=2, ensure_ascii=False)
+    assert snapshot.fortress_json(amami, unit) == json.dumps(serialize_fortress(amami, unit), indent=2, ensure_ascii=False)
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from src.simulations.models import (EnemyUnit, ExpendableWeapon, Fortress,
+                                    Simulation, Weapon)
+from src.simulations.observers import (JsonlStreamWriter, load_stream,
+                                       simulation_state)
+from src.simulations.policies import (RuleBasedEnemyCommander,
+                                      RuleBasedFortressCommander)
+
+missile = ExpendableWeapon("Missile", cost_per_unit=1, move_distance_per_turn=200)
+
+
+def make_weapon(name):
+    return Weapon(name, range_=300, power=100, move_distance_per_turn=100,
+                  cost=100, hp=100, ammo_type="Missile", ammo_per_shot=1)
+
+
+def make_simulation(observers, fortress_commander_cls=RuleBasedFortressCommander):
+    target = Fortress("Target", 28.3589, 129.4953, {"SAM": [make_weapon("SAM") for _ in range(4)]},
+                      ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile})
+    unit = EnemyUnit("Enemy", target, 31.0, 131.5, speed=60, weapon_stock={"Jet": [make_weapon("Jet") for _ in range(8)]},
+                     ammo_stock={"Missile": 50}, ammo_defs={"Missile": missile}, retreat_cost_threshold=10 ** 6)
+    return Simulation([target], unit, {"目的": "test"}, max_turns=5, observers=observers,
+                      fortress_commander_cls=fortress_commander_cls,
+                      enemy_commander_cls=RuleBasedEnemyCommander)
+
+
+def test_stream_reconstructs_history_and_final_state(tmp_path):
+    path = tmp_path / "stream.jsonl"
+    sim = make_simulation([JsonlStreamWriter(str(path))])
+    sim.run()
+    history, state = load_stream(str(path))
+    assert [(h["turn"], h["name"], h["action"]) for h in history] == [(h.turn, h.name, h.action) for h in sim.history]
+    assert state == json.loads(json.dumps(simulation_state(sim)))
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[-1])["type"] == "sim_end"
+
+
+def test_completed_turns_survive_a_crash(tmp_path):
+    class Crashing(RuleBasedFortressCommander):
+        def decide_action(self, current_turn, history):
+            if current_turn == 1:
+                raise RuntimeError("LLM failed")
+            return super().decide_action(current_turn, history)
+
+    path = tmp_path / "stream.jsonl"
+    sim = make_simulation([JsonlStreamWriter(str(path))], fortress_commander_cls=Crashing)
+    with pytest.raises(RuntimeError):
+        sim.run()
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["turn"] for r in records if r["type"] == "turn_end"] == [0]
+    history, state = load_stream(str(path))
+    assert [(h["turn"], h["action"]) for h in history] == [(0, "idle"), (0, "move_toward_target")]
+    assert state["Enemy"]["lat"] == sim.enemy_unit.latitude
@@ -0,0 +1,43 @@
+import copy
+import dataclasses
+
+import pytest
+
+from src.definitions import predefined_japanese_defenses as defenses
+from src.simulations.checkpoint import capture_state
+from src.simulations.models import ColumnarStock
+from src.simulations.templates import load_unit_template
+
+CODE_NAME = "天空の盾"
+
+
+def test_instantiate_matches_module_level_definitions():
+    fortresses = defenses.make_fortresses()
+    expected = copy.deepcopy([defenses.fortress_naha, defenses.fortress_amami, defenses.fortress_sasebo,
+                              defenses.fortress_kadena, defenses.fortress_kanoya])
+    for fortress, original in zip(fortresses, expected):
+        assert fortress.name == original.name
+        assert fortress.ammo_stock == original.ammo_stock
+        assert {n: len(ws) for n, ws in fortress.weapon_stock.items()} == \
+               {n: len(ws) for n, ws in original.weapon_stock.items()}
+    unit = load_unit_template(CODE_NAME).instantiate(fortresses)
+    assert unit.target_base is next(f for f in fortresses if f.name == unit.target_base.name)
+
+
+def test_simulations_in_one_process_do_not_share_state(make_unit_simulation):
+    first = make_unit_simulation(CODE_NAME)
+    first.run()
+    second = make_unit_simulation(CODE_NAME)
+    assert all(f.current_cost == 0 for f in second.fortresses)
+    assert all(not any(w.destroyed for ws in f.weapon_stock.values() for w in ws) for f in second.fortresses)
+    second.run()
+    assert capture_state(second) == capture_state(first)
+
+
+def test_templates_are_immutable_and_support_columnar_stocks():
+    template = defenses.FORTRESS_TEMPLATES[0]
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        template.name = "changed"
+    assert isinstance(template.instantiate(columnar=True).weapon_stock, ColumnarStock)
+    with pytest.raises(ValueError):
+        load_unit_template(CODE_NAME).instantiate(defenses.make_fortresses()[:1])
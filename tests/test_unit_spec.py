@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+from src.definitions import predefined_japanese_defenses as defenses
+from src.run_all_simulations import discover_units
+from src.simulations import unit_spec
+from src.simulations.models import JammerSpec
+from src.simulations.templates import UNIT_DIR, load_unit_template
+from src.simulations.unit_spec import (UnitSpecError, compile_spec, dump_spec,
+                                       load_spec, parse_spec)
+
+FORTRESS_NAMES = [template.name for template in defenses.FORTRESS_TEMPLATES]
+
+
+def unit_data(code_name="龍の爪"):
+    with open(os.path.join(UNIT_DIR, f"{code_name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_all_units_round_trip_and_instantiate():
+    for code_name in discover_units():
+        template = load_unit_template(code_name)
+        spec = compile_spec(dump_spec(enemy_units=[template]), FORTRESS_NAMES)
+        assert spec.enemy_unit.weapons == template.weapons
+        assert spec.enemy_unit.ammo_stock == template.ammo_stock
+        assert dump_spec(enemy_units=spec.enemy_units) == unit_data(code_name)
+        unit = template.instantiate(defenses.make_fortresses())
+        assert unit.target_base.name == template.target_base
+    assert any(isinstance(spec, JammerSpec) for spec, _ in load_unit_template("龍の爪").weapons)
+
+
+def test_fortress_definitions_match_module_level_fortresses():
+    for template, fortress in zip(defenses.FORTRESS_TEMPLATES, [defenses.fortress_naha, defenses.fortress_amami]):
+        assert template.name == fortress.name
+        assert {spec.name: count for spec, count in template.weapons} == \
+               {name: len(ws) for name, ws in fortress.weapon_stock.items()}
+    naha = defenses.FORTRESS_TEMPLATES[0]
+    assert dict(naha.ammo_stock) == {"LongRangeMissile": 500, "Torpedo": 200}
+    assert [ammo_def.name for ammo_def in naha.ammo_defs] == ["LongRangeMissile", "Torpedo"]
+
+
+def test_validation_reports_every_error_with_its_location():
+    data = unit_data()
+    unit = data["enemy_units"][0]
+    unit["target_base"] = "Unknown Base"
+    unit["weapons"][0]["power"] = "strong"
+    unit["weapons"][0]["ammo_type"] = "Missing"
+    unit["weapons"][1]["count"] = True
+    unit["weapons"].append(dict(unit["weapons"][0]))
+    with pytest.raises(UnitSpecError) as e:
+        compile_spec(data, FORTRESS_NAMES)
+    assert e.value.errors == [
+        "enemy_units[0].target_base: 既知の拠点名ではありません（'Unknown Base'）",
+        "enemy_units[0].weapons[0].power: 整数が必要です（'strong'）",
+        "enemy_units[0].weapons[0].ammo_type: ammo に定義されていない弾薬です（'Missing'）",
+        "enemy_units[0].weapons[1].count: 整数が必要です（True）",
+        "enemy_units[0].weapons[2].name: 武器名が重複しています（'Advanced Destroyer'）",
+        "enemy_units[0].weapons[2].power: 整数が必要です（'strong'）",
+        "enemy_units[0].weapons[2].ammo_type: ammo に定義されていない弾薬です（'Missing'）",
+    ]
+    with pytest.raises(UnitSpecError, match="version"):
+        compile_spec({**unit_data(), "version": 2})
+    with pytest.raises(UnitSpecError, match="JSON"):
+        parse_spec("import os")
+
+
+@pytest.mark.parametrize("key, value, message", [
+    ("latitude", 120, "90以下"),
+    ("latitude", -90.5, "-90以上"),
+    ("longitude", 500, "180以下"),
+    ("longitude", -181, "-180以上"),
+])
+def test_coordinates_out_of_range_are_rejected(key, value, message):
+    data = unit_data()
+    data["enemy_units"][0][key] = value
+    with pytest.raises(UnitSpecError) as e:
+        compile_spec(data, FORTRESS_NAMES)
+    assert e.value.errors == [f"enemy_units[0].{key}: {message}が必要です（{value!r}）"]
+
+
+def test_unchanged_specs_are_not_validated_again(tmp_path, monkeypatch):
+    path = tmp_path / "unit.json"
+    path.write_text(json.dumps(unit_data(), ensure_ascii=False), encoding="utf-8")
+    calls = []
+    validate = unit_spec.validate_spec
+    monkeypatch.setattr(unit_spec, "validate_spec", lambda *args: calls.append(args) or validate(*args))
+    unit_spec._compiled.clear()
+
+    first = load_spec(str(path))
+    assert load_spec(str(path)) is first
+    assert parse_spec(path.read_bytes()) is first
+    assert len(calls) == 1
+
+    data = unit_data()
+    data["enemy_units"][0]["speed"] = 99
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(0, 0))
+    assert load_spec(str(path)).enemy_unit.speed == 99
+    assert len(calls) == 2
@@ -0,0 +1,82 @@
+import pickle
+
+import pytest
+
+from src.simulations.models import ColumnarStock, Weapon, WeaponStock
+
+
+def make_weapon(name="Jet", destroyed=False):
+    weapon = Weapon(name, range_=100, power=50, move_distance_per_turn=100, cost=10, hp=80,
+                    ammo_type="Missile", ammo_per_shot=1)
+    weapon.destroyed = destroyed
+    return weapon
+
+
+def make_weapons(name, active, destroyed=0):
+    return [make_weapon(name) for _ in range(active)] + [make_weapon(name, destroyed=True) for _ in range(destroyed)]
+
+
+def assert_counts_match(stock):
+    for name, weapons in stock.items():
+        assert stock.active_count(name) == sum(1 for w in weapons if not w.destroyed)
+    assert stock.active_count() == sum(1 for ws in stock.values() for w in ws if not w.destroyed)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_every_dict_mutation_keeps_active_counts(columnar):
+    def weapons(name, active, destroyed=0):
+        ws = make_weapons(name, active, destroyed)
+        return ColumnarStock.from_weapon_stock({name: ws})[name] if columnar else ws
+
+    stock = WeaponStock({"Jet": make_weapons("Jet", 3, 1)})
+    if columnar:
+        stock = ColumnarStock.from_weapon_stock(stock)
+    assert stock.active_count() == 3
+
+    stock["Ship"] = weapons("Ship", 2)
+    stock.update({"Jet": weapons("Jet", 1)}, Sub=weapons("Sub", 4, 2))
+    assert (stock.active_count("Jet"), stock.active_count()) == (1, 7)
+    assert_counts_match(stock)
+
+    assert len(stock.setdefault("Ship", weapons("Ship", 9))) == 2
+    stock.setdefault("Drone", weapons("Drone", 5))
+    assert stock.active_count() == 12
+
+    stock |= {"Drone": weapons("Drone", 1)}
+    assert stock.active_count() == 8
+    assert_counts_match(stock)
+
+    assert len(stock.pop("Sub")) == 6
+    assert stock.pop("Sub", None) is None
+    with pytest.raises(KeyError):
+        stock.pop("Sub")
+    name, _ = stock.popitem()
+    assert name == "Drone"
+    del stock["Ship"]
+    assert (stock.active_count(), stock.active_count("Sub")) == (1, 0)
+    assert_counts_match(stock)
+
+    stock.clear()
+    assert stock.active_count() == 0 and not stock
+    with pytest.raises(KeyError):
+        stock.popitem()
+
+
+def test_weapon_lists_cannot_be_mutated_in_place():
+    stock = WeaponStock({"Jet": make_weapons("Jet", 2)})
+    with pytest.raises(AttributeError):
+        stock["Jet"].append(make_weapon())
+    with pytest.raises(TypeError):
+        stock["Jet"][0] = make_weapon(destroyed=True)
+    stock.receive(make_weapon())
+    stock.take("Jet", 1)
+    assert stock.active_count("Jet") == 2 and len(stock["Jet"]) == 2
+    assert_counts_match(stock)
+
+
+def test_pickled_stock_keeps_counts():
+    stock = WeaponStock({"Jet": make_weapons("Jet", 2, 1)})
+    stock.take_damage("Jet", 80)
+    restored = pickle.loads(pickle.dumps(stock))
+    assert restored.active_count() == 1
+    assert_counts_match(restored)